@@ -0,0 +1,17 @@
+from django.conf import settings
+
+DEFAULTS = {
+    'ARTIFACT_DIR': None,   # defaults to <BASE_DIR>/openapi
+    'CODE_VERSION': None,   # defaults to a hash of the project's source files
+    'MAX_AGE': 3600,
+}
+
+
+def apidocs_setting(name):
+    """
+    Read a value from settings.API_SCHEMA, falling back to the defaults above.
+    """
+    value = getattr(settings, 'API_SCHEMA', {}).get(name, DEFAULTS[name])
+    if name == 'ARTIFACT_DIR' and value is None:
+        value = settings.BASE_DIR / 'openapi'
+    return value
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandError
+from apidocs.conf import apidocs_setting
+from apidocs.schema import build_documents, code_version, generate_schema, load_artifact, write_artifact
+
+
+class Command(BaseCommand):
+    help = (
+        "Render the OpenAPI schema into a static artifact served by /schema/. "
+        "Run at deploy time, after the code is in place."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', default=None,
+                            help="Artifact directory (default: API_SCHEMA['ARTIFACT_DIR']).")
+        parser.add_argument('--check', action='store_true',
+                            help="Only check that the artifact matches the current code; exit 1 if not.")
+        parser.add_argument('--validate', action='store_true',
+                            help="Validate the schema against the OpenAPI specification before writing it.")
+
+    def handle(self, *args, **options):
+        directory = options['output'] or apidocs_setting('ARTIFACT_DIR')
+        version = code_version()
+
+        if options['check']:
+            documents = load_artifact(directory)
+            if documents is None:
+                raise CommandError(f"No schema artifact in {directory}.")
+            if documents['code_version'] != version:
+                raise CommandError(
+                    f"Schema artifact is stale: built for {documents['code_version']}, code is {version}."
+                )
+            self.stdout.write(self.style.SUCCESS(f"Schema artifact is up to date ({version})."))
+            return
+
+        schema = generate_schema()
+        if options['validate']:
+            from drf_spectacular.validation import validate_schema
+            validate_schema(schema)
+        documents = build_documents(schema)
+        path = write_artifact(documents, directory)
+        sizes = ', '.join(f"{fmt} {len(document['content'])} bytes" for fmt, document in documents['formats'].items())
+        self.stdout.write(self.style.SUCCESS(f"Wrote schema for {version} to {path} ({sizes})."))
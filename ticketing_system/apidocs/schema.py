@@ -0,0 +1,153 @@
+"""
+Precomputed OpenAPI schema.
+
+`build_schema` renders the schema once, at deploy time, into ARTIFACT_DIR
+(schema.yaml, schema.json and meta.json). The schema view serves those
+bytes instead of introspecting every view on each request. meta.json
+records the code version the artifact was built from. An artifact built
+from other code is stale and is ignored: the process then generates the
+schema itself, once, and logs a warning.
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+from functools import lru_cache
+from pathlib import Path
+from django.conf import settings
+from django.utils import timezone
+from .conf import apidocs_setting
+
+logger = logging.getLogger(__name__)
+
+FORMATS = {
+    'yaml': ('schema.yaml', 'application/vnd.oai.openapi'),
+    'json': ('schema.json', 'application/vnd.oai.openapi+json'),
+}
+META_FILE = 'meta.json'
+SKIPPED_DIRS = {'__pycache__', 'node_modules', 'venv'}
+
+_documents = {}
+_lock = threading.Lock()
+
+
+@lru_cache(maxsize=None)
+def code_version():
+    """
+    API_SCHEMA['CODE_VERSION'] if set (e.g. the deployed commit), else a hash
+    of the project's Python sources and the drf-spectacular version.
+    Computed once per process.
+    """
+    configured = apidocs_setting('CODE_VERSION')
+    if configured:
+        return str(configured)
+
+    from drf_spectacular import __version__ as spectacular_version
+    base = Path(settings.BASE_DIR)
+    digest = hashlib.sha256(spectacular_version.encode())
+    for path in sorted(base.rglob('*.py')):
+        relative = path.relative_to(base)
+        if any(part.startswith('.') or part in SKIPPED_DIRS for part in relative.parts[:-1]):
+            continue
+        digest.update(str(relative).encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()[:16]
+
+
+def _etag(content):
+    return f'"{hashlib.sha256(content).hexdigest()[:32]}"'
+
+
+def generate_schema():
+    """
+    The schema as a dict, exactly as drf-spectacular's SpectacularAPIView builds it.
+    """
+    from drf_spectacular.settings import spectacular_settings
+    generator = spectacular_settings.DEFAULT_GENERATOR_CLASS()
+    return generator.get_schema(request=None, public=True)
+
+
+def build_documents(schema=None):
+    """
+    Render `schema` (generated if not given) in every served format.
+    """
+    from drf_spectacular.renderers import OpenApiJsonRenderer, OpenApiYamlRenderer
+    if schema is None:
+        schema = generate_schema()
+    contents = {
+        'yaml': OpenApiYamlRenderer().render(schema, renderer_context={}),
+        'json': OpenApiJsonRenderer().render(schema, renderer_context={}),
+    }
+    return {
+        'code_version': code_version(),
+        'generated_at': timezone.now().isoformat(),
+        'formats': {fmt: {'content': content, 'etag': _etag(content)} for fmt, content in contents.items()},
+    }
+
+
+def _write(path, content):
+    # Write-then-rename, so a running server never reads a half-written file.
+    tmp = path.with_name(f".{path.name}.tmp")
+    tmp.write_bytes(content)
+    os.replace(tmp, path)
+
+
+def write_artifact(documents, directory=None):
+    directory = Path(directory or apidocs_setting('ARTIFACT_DIR'))
+    directory.mkdir(parents=True, exist_ok=True)
+    for fmt, (filename, _) in FORMATS.items():
+        _write(directory / filename, documents['formats'][fmt]['content'])
+    meta = {
+        'code_version': documents['code_version'],
+        'generated_at': documents['generated_at'],
+        'etags': {fmt: document['etag'] for fmt, document in documents['formats'].items()},
+    }
+    # meta.json goes last: it only names a version once its files are in place.
+    _write(directory / META_FILE, json.dumps(meta, indent=2).encode())
+    return directory
+
+
+def load_artifact(directory=None):
+    """
+    The documents stored in `directory`, or None if there is no complete artifact.
+    """
+    directory = Path(directory or apidocs_setting('ARTIFACT_DIR'))
+    try:
+        meta = json.loads((directory / META_FILE).read_bytes())
+        formats = {}
+        for fmt, (filename, _) in FORMATS.items():
+            content = (directory / filename).read_bytes()
+            formats[fmt] = {'content': content, 'etag': meta['etags'].get(fmt) or _etag(content)}
+    except (OSError, ValueError, KeyError):
+        return None
+    return {'code_version': meta['code_version'], 'generated_at': meta['generated_at'], 'formats': formats}
+
+
+def get_documents():
+    """
+    Schema documents for the running code: from memory, else from the
+    artifact, else generated in-process.
+    """
+    version = code_version()
+    documents = _documents.get(version)
+    if documents is not None:
+        return documents
+
+    with _lock:
+        if version in _documents:
+            return _documents[version]
+        documents = load_artifact()
+        if documents is None:
+            logger.warning("No prebuilt OpenAPI schema found; generating it in-process. Run build_schema when deploying.")
+        elif documents['code_version'] != version:
+            logger.warning(
+                "Prebuilt OpenAPI schema is stale (built for %s, running %s); generating it in-process.",
+                documents['code_version'], version,
+            )
+            documents = None
+        if documents is None:
+            documents = build_documents()
+        _documents.clear()
+        _documents[version] = documents
+    return documents
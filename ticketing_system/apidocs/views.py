@@ -0,0 +1,38 @@
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import parse_etags
+from django.views import View
+from .conf import apidocs_setting
+from .schema import FORMATS, get_documents
+
+
+class PrecomputedSchemaView(View):
+    """
+    GET: the OpenAPI schema, from the artifact written by `build_schema`.
+    YAML by default, JSON with ?format=json or an Accept header asking for JSON.
+    Responses carry an ETag and are cacheable for API_SCHEMA['MAX_AGE'] seconds.
+    """
+
+    def get_format(self, request):
+        requested = request.GET.get('format')
+        if requested in FORMATS:
+            return requested
+        accept = request.headers.get('Accept', '')
+        return 'json' if 'json' in accept and 'yaml' not in accept else 'yaml'
+
+    def get(self, request, *args, **kwargs):
+        fmt = self.get_format(request)
+        documents = get_documents()
+        document = documents['formats'][fmt]
+
+        # Weak comparison: compressed responses carry the ETag as W/"...".
+        etags = [etag.removeprefix('W/') for etag in parse_etags(request.headers.get('If-None-Match', ''))]
+        if document['etag'] in etags:
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(document['content'], content_type=FORMATS[fmt][1])
+        response['ETag'] = document['etag']
+        response['X-Schema-Version'] = documents['code_version']
+        patch_cache_control(response, public=True, max_age=apidocs_setting('MAX_AGE'))
+        patch_vary_headers(response, ['Accept'])
+        return response
@@ -0,0 +1,41 @@
+from django.contrib import admin
+from tickets.admin_tools import LargeTableAdmin
+from .models import ArchivedTicket, ArchivedComment, ArchivedTicketHistory, ArchivedTimeSpent, ArchivedAttachment
+
+
+@admin.register(ArchivedTicket)
+class ArchivedTicketAdmin(LargeTableAdmin):
+    list_display = ('id', 'unique_reference', 'title', 'company', 'status', 'archived_at')
+    list_select_related = ('company',)
+    search_fields = ('=unique_reference', '^title')
+    list_filter = ('company',)
+    raw_id_fields = ('assignee', 'created_by')
+
+
+@admin.register(ArchivedComment)
+class ArchivedCommentAdmin(LargeTableAdmin):
+    list_display = ('id', 'ticket', 'author', 'created_at')
+    list_select_related = ('ticket', 'author')
+    raw_id_fields = ('ticket', 'author')
+
+
+@admin.register(ArchivedTicketHistory)
+class ArchivedTicketHistoryAdmin(LargeTableAdmin):
+    list_display = ('id', 'ticket', 'event_type', 'changed_at')
+    list_select_related = ('ticket',)
+    raw_id_fields = ('ticket', 'user')
+
+
+@admin.register(ArchivedTimeSpent)
+class ArchivedTimeSpentAdmin(LargeTableAdmin):
+    list_display = ('id', 'ticket', 'operator', 'minutes', 'created_at')
+    list_select_related = ('ticket', 'operator')
+    raw_id_fields = ('ticket', 'operator')
+
+
+@admin.register(ArchivedAttachment)
+class ArchivedAttachmentAdmin(LargeTableAdmin):
+    list_display = ('id', 'ticket', 'filename', 'content_type', 'uploaded_by', 'created_at')
+    list_select_related = ('ticket', 'uploaded_by')
+    search_fields = ('=filename',)
+    raw_id_fields = ('ticket', 'comment', 'uploaded_by', 'blob')
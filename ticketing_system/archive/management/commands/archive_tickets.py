@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+from archive.services import archivable_tickets, archive_closed_tickets
+
+
+class Command(BaseCommand):
+    help = "Move tickets closed for more than N days, with their comments, history and time entries, to the archive tables."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=90,
+                            help="Archive tickets closed and untouched for more than this many days.")
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help="Tickets moved per transaction.")
+        parser.add_argument('--pause', type=float, default=0.0,
+                            help="Seconds to sleep between batches.")
+        parser.add_argument('--limit', type=int, default=None,
+                            help="Stop after this many tickets.")
+        parser.add_argument('--dry-run', action='store_true',
+                            help="Only report how many tickets would be archived.")
+
+    def handle(self, *args, **options):
+        if options['dry_run']:
+            count = archivable_tickets(options['days']).count()
+            self.stdout.write(f"{count} ticket(s) would be archived.")
+            return
+
+        totals = {}
+        batches = archive_closed_tickets(
+            options['days'],
+            batch_size=options['batch_size'],
+            pause=options['pause'],
+            limit=options['limit'],
+        )
+        for counts in batches:
+            for name, count in counts.items():
+                totals[name] = totals.get(name, 0) + count
+            self.stdout.write(f"Archived batch: {counts}")
+
+        self.stdout.write(self.style.SUCCESS(f"Done: {totals or 'nothing to archive'}"))
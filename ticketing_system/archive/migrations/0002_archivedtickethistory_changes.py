@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-19 11:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('archive', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedtickethistory',
+            name='changes',
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
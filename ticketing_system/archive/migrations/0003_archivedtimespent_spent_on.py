@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-19 11:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('archive', '0002_archivedtickethistory_changes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedtimespent',
+            name='spent_on',
+            field=models.DateField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-19 11:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('archive', '0004_archivedtickethistory_assigned'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='archivedtickethistory',
+            name='event_type',
+            field=models.CharField(choices=[('status_change', 'Status Change'), ('created', 'Created'), ('updated', 'Updated'), ('resolved', 'Resolved'), ('closed', 'Closed'), ('comment', 'Comment Added'), ('assigned', 'Assigned'), ('merged', 'Merged')], max_length=20),
+        ),
+    ]
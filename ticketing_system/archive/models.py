@@ -0,0 +1,139 @@
+from django.db import models
+from django.conf import settings
+from tickets.models import AttachmentBlob, Ticket, TicketHistory, TicketQuerySet
+
+
+class ArchivedTicket(models.Model):
+    """
+    Cold copy of a closed Ticket, moved out of the hot table by the
+    archive_tickets command. Keeps the original primary key so the ticket
+    stays reachable under its existing URL.
+    """
+    id = models.UUIDField(primary_key=True, editable=False)
+    title = models.CharField(max_length=200)
+    description = models.TextField()
+    priority = models.CharField(max_length=10, choices=Ticket.PRIORITY_CHOICES)
+    type = models.CharField(max_length=20, choices=Ticket.TYPE_CHOICES)
+    status = models.CharField(max_length=20, choices=Ticket.STATUS_CHOICES)
+    assignee = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    company = models.ForeignKey(
+        'companies.Company',
+        on_delete=models.CASCADE,
+        related_name='archived_tickets'
+    )
+    unique_reference = models.CharField(max_length=8, unique=True)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    objects = TicketQuerySet.as_manager()
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.unique_reference} - {self.title} (archived)"
+
+
+class ArchivedComment(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    ticket = models.ForeignKey(ArchivedTicket, on_delete=models.CASCADE, related_name='comments')
+    author = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    message = models.TextField()
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ['created_at']
+
+    def __str__(self):
+        return f"Archived comment {self.id} on {self.ticket}"
+
+
+class ArchivedTicketHistory(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    ticket = models.ForeignKey(ArchivedTicket, on_delete=models.CASCADE, related_name='history')
+    event_type = models.CharField(max_length=20, choices=TicketHistory.EVENT_CHOICES)
+    message = models.TextField(blank=True, null=True)
+    previous_status = models.CharField(max_length=20, blank=True, null=True)
+    new_status = models.CharField(max_length=20, blank=True, null=True)
+    changes = models.JSONField(blank=True, null=True)
+    changed_at = models.DateTimeField()
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+
+    class Meta:
+        ordering = ['-changed_at']
+        verbose_name_plural = 'archived ticket histories'
+
+    def __str__(self):
+        return f"{self.ticket.unique_reference} | {self.event_type} | {self.changed_at}"
+
+
+class ArchivedTimeSpent(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    ticket = models.ForeignKey(ArchivedTicket, on_delete=models.CASCADE, related_name='time_entries')
+    operator = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    minutes = models.PositiveIntegerField()
+    spent_on = models.DateField(blank=True, null=True)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"Archived TimeSpent #{self.id} - {self.minutes} mins on {self.ticket}"
+
+
+class ArchivedAttachment(models.Model):
+    """
+    Archived attachment row. The blob itself is not moved: it stays in the
+    shared content-addressed storage.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    ticket = models.ForeignKey(ArchivedTicket, on_delete=models.CASCADE, related_name='attachments')
+    comment = models.ForeignKey(
+        ArchivedComment,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='attachments'
+    )
+    blob = models.ForeignKey(AttachmentBlob, on_delete=models.PROTECT, related_name='+')
+    filename = models.CharField(max_length=255)
+    content_type = models.CharField(max_length=100)
+    uploaded_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    created_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ['created_at']
+
+    def __str__(self):
+        return f"Archived {self.filename} on {self.ticket}"
@@ -0,0 +1,100 @@
+from rest_framework import serializers
+from .models import ArchivedTicket, ArchivedComment, ArchivedTicketHistory, ArchivedTimeSpent, ArchivedAttachment
+
+
+def _fullname(user):
+    if user:
+        return user.first_name + ' ' + user.last_name
+    return None
+
+
+class ArchivedCommentSerializer(serializers.ModelSerializer):
+    author_fullName = serializers.SerializerMethodField(method_name='get_author_fullName')
+    def get_author_fullName(self, obj):
+        return _fullname(obj.author)
+
+    class Meta:
+        model = ArchivedComment
+        fields = ['id', 'author', 'author_fullName', 'message', 'created_at', 'updated_at']
+
+
+class ArchivedTicketHistorySerializer(serializers.ModelSerializer):
+    user_fullname = serializers.SerializerMethodField(method_name='get_user_fullname')
+    def get_user_fullname(self, obj):
+        return _fullname(obj.user)
+
+    class Meta:
+        model = ArchivedTicketHistory
+        fields = ['id', 'event_type', 'message', 'previous_status', 'new_status', 'changes', 'changed_at', 'user', 'user_fullname']
+
+
+class ArchivedTimeSpentSerializer(serializers.ModelSerializer):
+    operator_fullname = serializers.SerializerMethodField(method_name='get_operator_fullname')
+    def get_operator_fullname(self, obj):
+        return _fullname(obj.operator)
+
+    class Meta:
+        model = ArchivedTimeSpent
+        fields = ['id', 'operator', 'operator_fullname', 'minutes', 'spent_on', 'created_at', 'updated_at']
+
+
+class ArchivedAttachmentSerializer(serializers.ModelSerializer):
+    size = serializers.ReadOnlyField(source='blob.size')
+    sha256 = serializers.ReadOnlyField(source='blob_id')
+
+    class Meta:
+        model = ArchivedAttachment
+        fields = ['id', 'comment', 'filename', 'content_type', 'size', 'sha256', 'uploaded_by', 'created_at']
+
+
+class ArchivedTicketSerializer(serializers.ModelSerializer):
+    """
+    Read-only representation of an archived ticket, shaped like
+    TicketSerializer and embedding the archived children.
+    """
+    archived = serializers.SerializerMethodField()
+    def get_archived(self, obj):
+        return True
+    company_logo = serializers.ReadOnlyField(source='company.logo')
+    created_by_fullname = serializers.SerializerMethodField(method_name='get_created_by_fullname')
+    def get_created_by_fullname(self, obj):
+        return _fullname(obj.created_by)
+    assignee_fullname = serializers.SerializerMethodField(method_name='get_assignee_fullname')
+    def get_assignee_fullname(self, obj):
+        return _fullname(obj.assignee)
+    total_time_spent = serializers.SerializerMethodField()
+    def get_total_time_spent(self, obj):
+        # Annotated by the detail view: included_time_entries only holds the newest ones.
+        return obj.total_minutes or 0
+    comments = ArchivedCommentSerializer(source='included_comments', many=True, read_only=True)
+    history = ArchivedTicketHistorySerializer(source='included_history', many=True, read_only=True)
+    time_entries = ArchivedTimeSpentSerializer(source='included_time_entries', many=True, read_only=True)
+    attachments = ArchivedAttachmentSerializer(source='included_attachments', many=True, read_only=True)
+
+    class Meta:
+        model = ArchivedTicket
+        fields = [
+            'id',
+            'title',
+            'description',
+            'priority',
+            'type',
+            'status',
+            'assignee',
+            'assignee_fullname',
+            'company',
+            'created_by',
+            'created_by_fullname',
+            'unique_reference',
+            'created_at',
+            'updated_at',
+            'total_time_spent',
+            'company_logo',
+            'archived',
+            'archived_at',
+            'comments',
+            'history',
+            'time_entries',
+            'attachments',
+        ]
+        read_only_fields = fields
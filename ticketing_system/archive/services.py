@@ -0,0 +1,76 @@
+import time
+from datetime import timedelta
+from django.db import transaction
+from django.utils import timezone
+from tickets.models import Ticket, Comment, TicketHistory, TimeSpent, Attachment
+from .models import ArchivedTicket, ArchivedComment, ArchivedTicketHistory, ArchivedTimeSpent, ArchivedAttachment
+
+# (hot model, archive model) pairs, parents first.
+ARCHIVE_MODELS = (
+    (Ticket, ArchivedTicket),
+    (Comment, ArchivedComment),
+    (TicketHistory, ArchivedTicketHistory),
+    (TimeSpent, ArchivedTimeSpent),
+    (Attachment, ArchivedAttachment),
+)
+
+
+def _shared_columns(source_model, archive_model):
+    source = {field.attname for field in source_model._meta.concrete_fields}
+    return [field.attname for field in archive_model._meta.concrete_fields if field.attname in source]
+
+
+def _copy(source_model, archive_model, queryset):
+    """
+    Copy rows column by column (as plain values, without instantiating the
+    hot models) into the archive table. Returns the number of rows copied.
+    """
+    columns = _shared_columns(source_model, archive_model)
+    rows = [archive_model(**values) for values in queryset.values(*columns)]
+    archive_model.objects.bulk_create(rows)
+    return len(rows)
+
+
+def archivable_tickets(days):
+    cutoff = timezone.now() - timedelta(days=days)
+    return Ticket.objects.filter(status='closed', updated_at__lt=cutoff)
+
+
+def archive_batch(ticket_ids):
+    """
+    Move one batch of tickets and all of their children to the archive tables.
+    Copy and delete happen in one transaction, so a ticket is always in
+    exactly one of the two places.
+    """
+    counts = {}
+    with transaction.atomic():
+        for source_model, archive_model in ARCHIVE_MODELS:
+            if source_model is Ticket:
+                queryset = Ticket.objects.filter(id__in=ticket_ids)
+            else:
+                queryset = source_model.objects.filter(ticket_id__in=ticket_ids)
+            counts[archive_model._meta.model_name] = _copy(source_model, archive_model, queryset)
+        Ticket.objects.filter(id__in=ticket_ids).delete()
+    return counts
+
+
+def archive_closed_tickets(days, batch_size=500, pause=0.0, limit=None):
+    """
+    Archive tickets closed (and untouched) for more than `days` days,
+    `batch_size` tickets per transaction, sleeping `pause` seconds between
+    batches to leave room for foreground traffic. Yields the per-batch counts.
+    """
+    archived = 0
+    while limit is None or archived < limit:
+        size = batch_size if limit is None else min(batch_size, limit - archived)
+        ticket_ids = list(archivable_tickets(days).order_by('updated_at').values_list('id', flat=True)[:size])
+        if not ticket_ids:
+            return
+        yield archive_batch(ticket_ids)
+        archived += len(ticket_ids)
+        if pause:
+            time.sleep(pause)
+
+
+def archived_ticket_count(company):
+    return ArchivedTicket.objects.filter(company=company).count()
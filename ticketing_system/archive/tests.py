@@ -0,0 +1,61 @@
+from django.test import override_settings
+from tickets.models import Comment, Ticket, TicketHistory, TimeSpent
+from tickets.tests import TicketAPITestCase
+from .models import ArchivedAttachment, ArchivedComment, ArchivedTicket, ArchivedTicketHistory, ArchivedTimeSpent
+from .services import archive_batch
+
+
+@override_settings(TICKETS={'DUPLICATE_DETECTION': False})
+class ArchiveTests(TicketAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.ticket = self.create_ticket("Printer jammed")
+        for n in range(3):
+            Comment.objects.create(ticket=self.ticket, author=self.user, message=f"Update {n}")
+            TimeSpent.objects.create(ticket=self.ticket, operator=self.staff, minutes=10)
+        self.assertEqual(self.upload(self.ticket, b"paper tray log").status_code, 201)
+
+    def test_archive_batch_moves_ticket_and_children(self):
+        events = TicketHistory.objects.filter(ticket=self.ticket).count()
+
+        counts = archive_batch([self.ticket.pk])
+
+        self.assertEqual(counts, {
+            'archivedticket': 1, 'archivedcomment': 3, 'archivedtickethistory': events,
+            'archivedtimespent': 3, 'archivedattachment': 1,
+        })
+        self.assertFalse(Ticket.objects.filter(pk=self.ticket.pk).exists())
+        self.assertFalse(Comment.objects.exists())
+        self.assertFalse(TimeSpent.objects.exists())
+        archived = ArchivedTicket.objects.get(pk=self.ticket.pk)
+        self.assertEqual(archived.unique_reference, self.ticket.unique_reference)
+        self.assertEqual(ArchivedComment.objects.filter(ticket=archived).count(), 3)
+        self.assertEqual(ArchivedTicketHistory.objects.filter(ticket=archived).count(), events)
+        self.assertEqual(ArchivedTimeSpent.objects.filter(ticket=archived).count(), 3)
+        self.assertEqual(ArchivedAttachment.objects.get(ticket=archived).filename, "notes.txt")
+
+    def test_detail_falls_back_to_the_archive(self):
+        archive_batch([self.ticket.pk])
+
+        response = self.client.get(f'/tickets/{self.ticket.pk}/', {'include_limit': 2})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data['archived'])
+        self.assertEqual([c['message'] for c in response.data['comments']], ["Update 2", "Update 1"])
+        self.assertEqual(len(response.data['time_entries']), 2)
+        self.assertLessEqual(len(response.data['history']), 2)
+        self.assertEqual(response.data['total_time_spent'], 30)
+
+        # Archived tickets stay scoped to their company.
+        outsider = self.user.__class__.objects.create_user(
+            email="o@example.com", username="o", password="pw", first_name="O", last_name="Ther",
+        )
+        self.client.force_authenticate(outsider)
+        self.assertEqual(self.client.get(f'/tickets/{self.ticket.pk}/').status_code, 404)
+
+    def test_new_references_count_archived_tickets(self):
+        archive_batch([self.ticket.pk])
+
+        ticket = self.create_ticket("VPN is down")
+
+        self.assertEqual(ticket.unique_reference, "AC-0002")
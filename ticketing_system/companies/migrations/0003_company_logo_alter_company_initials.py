@@ -0,0 +1,24 @@
+# Generated by Django 5.1.7 on 2026-10-19 11:11
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0002_alter_company_id'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='company',
+            name='logo',
+            field=models.URLField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='company',
+            name='initials',
+            field=models.CharField(max_length=3, unique=True, validators=[django.core.validators.RegexValidator(message='Must be 2-3 uppercase letters', regex='^[A-Z]{2,3}$')]),
+        ),
+    ]
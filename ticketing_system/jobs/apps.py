@@ -0,0 +1,13 @@
+from django.apps import AppConfig
+from django.utils.module_loading import autodiscover_modules
+
+
+class JobsConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "jobs"
+    verbose_name = "Background Jobs"
+
+    def ready(self):
+        # Import every app's `tasks` module so @task registrations are known
+        # to both the web process (for enqueueing) and the workers.
+        autodiscover_modules('tasks')
@@ -0,0 +1,20 @@
+from django.conf import settings
+
+DEFAULTS = {
+    'PROCESSES': 1,
+    'THREADS': 4,
+    'POLL_INTERVAL': 1.0,
+    'BATCH_SIZE': 10,
+    'MAX_ATTEMPTS': 3,
+    'BACKOFF_BASE': 5,
+    'BACKOFF_MAX': 3600,
+    'LOCK_TIMEOUT': 600,
+    'EAGER': False,
+}
+
+
+def jobs_setting(name):
+    """
+    Read a value from settings.JOBS, falling back to the defaults above.
+    """
+    return getattr(settings, 'JOBS', {}).get(name, DEFAULTS[name])
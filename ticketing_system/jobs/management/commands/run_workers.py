@@ -0,0 +1,62 @@
+import multiprocessing
+import signal
+import threading
+from django.core.management.base import BaseCommand
+from django.db import connections
+from jobs.conf import jobs_setting
+from jobs.worker import requeue_stale_jobs, run_process, run_threads
+
+
+class Command(BaseCommand):
+    help = "Run background job workers (a pool of processes, each with a pool of threads)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=jobs_setting('PROCESSES'),
+                            help="Number of worker processes.")
+        parser.add_argument('--threads', type=int, default=jobs_setting('THREADS'),
+                            help="Number of worker threads per process.")
+        parser.add_argument('--poll-interval', type=float, default=jobs_setting('POLL_INTERVAL'),
+                            help="Seconds to sleep when no job is due.")
+        parser.add_argument('--once', action='store_true',
+                            help="Drain the due jobs and exit instead of polling forever.")
+
+    def handle(self, *args, **options):
+        processes = max(options['processes'], 1)
+        threads = max(options['threads'], 1)
+        poll_interval = options['poll_interval']
+        once = options['once']
+
+        requeued = requeue_stale_jobs()
+        if requeued:
+            self.stdout.write(f"Requeued {requeued} stale job(s).")
+
+        self.stdout.write(f"Starting {processes} process(es) x {threads} thread(s).")
+
+        if processes == 1:
+            stop_event = threading.Event()
+            signal.signal(signal.SIGTERM, lambda *args: stop_event.set())
+            signal.signal(signal.SIGINT, lambda *args: stop_event.set())
+            processed = run_threads(threads, stop_event, poll_interval, once)
+            if once:
+                self.stdout.write(self.style.SUCCESS(f"Processed {processed} job(s)."))
+            return
+
+        # Connections must not be shared with forked children.
+        connections.close_all()
+        children = [
+            multiprocessing.Process(target=run_process, args=(threads, poll_interval, once), daemon=False)
+            for _ in range(processes)
+        ]
+        for child in children:
+            child.start()
+
+        def stop_children(*args):
+            for child in children:
+                if child.is_alive():
+                    child.terminate()
+
+        signal.signal(signal.SIGTERM, stop_children)
+        signal.signal(signal.SIGINT, stop_children)
+
+        for child in children:
+            child.join()
@@ -0,0 +1,62 @@
+import uuid
+from django.db import models
+from django.conf import settings
+from django.utils import timezone
+
+
+class Job(models.Model):
+    """
+    A unit of background work stored in the database.
+    - name: the registered task name (see jobs.registry.task)
+    - payload: keyword arguments passed to the task
+    - run_at: earliest time a worker may pick the job up (used for retries)
+    - attempts / max_attempts: retry bookkeeping
+    - locked_by / locked_at: which worker claimed the job, and when
+    """
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_SUCCEEDED = 'succeeded'
+    STATUS_FAILED = 'failed'
+
+    STATUS_CHOICES = (
+        (STATUS_QUEUED, 'Queued'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_SUCCEEDED, 'Succeeded'),
+        (STATUS_FAILED, 'Failed'),
+    )
+
+    id = models.UUIDField(
+        primary_key=True,
+        default=uuid.uuid4,
+        editable=False
+    )
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_QUEUED)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    run_at = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(blank=True, null=True)
+    last_error = models.TextField(blank=True)
+    result = models.JSONField(blank=True, null=True)
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='jobs'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            # Workers poll "queued jobs that are due", oldest first.
+            models.Index(fields=['status', 'run_at'], name='jobs_job_status_run_at_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} [{self.status}] ({self.id})"
@@ -0,0 +1,80 @@
+from functools import partial
+from django.db import transaction
+from django.utils import timezone
+from .conf import jobs_setting
+from .models import Job
+
+_registry = {}
+
+
+class UnknownTask(LookupError):
+    pass
+
+
+def task(name, max_attempts=None):
+    """
+    Register a function as a background task under `name`.
+
+        @task('tickets.something')
+        def something(ticket_id):
+            ...
+
+    The function receives the job payload as keyword arguments, so payloads
+    must be JSON-serializable.
+    """
+    def decorator(func):
+        func.task_name = name
+        func.max_attempts = max_attempts
+        _registry[name] = func
+        return func
+    return decorator
+
+
+def get_task(name):
+    try:
+        return _registry[name]
+    except KeyError:
+        raise UnknownTask(f"No task registered under '{name}'.")
+
+
+def enqueue(name, payload=None, run_at=None, max_attempts=None, created_by=None):
+    """
+    Store a new Job for the workers. Returns the Job instance.
+
+    With JOBS['EAGER'] enabled (handy in tests), the job runs inline
+    before returning, going through the same bookkeeping as a worker.
+    """
+    func = get_task(name)
+    job = Job.objects.create(
+        name=name,
+        payload=payload or {},
+        run_at=run_at or timezone.now(),
+        max_attempts=max_attempts or func.max_attempts or jobs_setting('MAX_ATTEMPTS'),
+        created_by=created_by,
+    )
+
+    if jobs_setting('EAGER'):
+        from .worker import Worker
+        Worker(worker_id='eager').execute(job.id)
+        job.refresh_from_db()
+
+    return job
+
+
+def enqueue_on_commit(name, payload=None, **kwargs):
+    """
+    Enqueue `name` once the current transaction commits, so workers never
+    pick up a job that refers to rows they cannot see yet.
+    """
+    transaction.on_commit(partial(enqueue, name, payload, **kwargs))
+
+
+def enqueue_unique(name, payload=None, run_at=None, **kwargs):
+    """
+    Enqueue `name` unless an identical job is already waiting.
+    Useful for "flush" style tasks that process whatever is pending.
+    """
+    pending = Job.objects.filter(name=name, payload=payload or {}, status=Job.STATUS_QUEUED)
+    if pending.exists():
+        return None
+    return enqueue(name, payload, run_at=run_at, **kwargs)
@@ -0,0 +1,25 @@
+from rest_framework import serializers
+from .models import Job
+
+
+class JobSerializer(serializers.ModelSerializer):
+    """
+    Read-only view of a background job's progress.
+    """
+    class Meta:
+        model = Job
+        fields = [
+            'id',
+            'name',
+            'status',
+            'attempts',
+            'max_attempts',
+            'run_at',
+            'last_error',
+            'result',
+            'created_by',
+            'created_at',
+            'updated_at',
+            'finished_at',
+        ]
+        read_only_fields = fields
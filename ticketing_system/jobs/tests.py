@@ -0,0 +1,124 @@
+from datetime import timedelta
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from .models import Job
+from .registry import enqueue, task
+from .worker import Worker, backoff_delay, requeue_stale_jobs
+
+calls = []
+
+
+@task('tests.flaky')
+def flaky(fail_times):
+    calls.append(fail_times)
+    if len(calls) <= fail_times:
+        raise RuntimeError("boom")
+    return {'calls': len(calls)}
+
+
+@override_settings(JOBS={'BACKOFF_BASE': 5, 'BACKOFF_MAX': 60, 'MAX_ATTEMPTS': 3, 'EAGER': False})
+class JobRetryTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def run_due(self):
+        """
+        Make every queued job due and let one worker drain them.
+        """
+        Job.objects.filter(status=Job.STATUS_QUEUED).update(run_at=timezone.now())
+        return Worker(worker_id='test').run_once()
+
+    def test_backoff_doubles_and_is_capped(self):
+        self.assertEqual(
+            [backoff_delay(n).total_seconds() for n in range(1, 6)],
+            [5, 10, 20, 40, 60],
+        )
+
+    def test_failed_job_is_requeued_with_backoff(self):
+        job = enqueue('tests.flaky', {'fail_times': 1})
+        before = timezone.now()
+        with self.assertLogs('jobs.worker', 'WARNING'):
+            Worker(worker_id='test').run_once()
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.STATUS_QUEUED)
+        self.assertEqual(job.attempts, 1)
+        self.assertIn("boom", job.last_error)
+        self.assertEqual(job.locked_by, '')
+        self.assertGreaterEqual(job.run_at, before + timedelta(seconds=5))
+        # Not due yet: a worker leaves it alone.
+        self.assertEqual(Worker(worker_id='test').run_once(), 0)
+
+        self.run_due()
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.STATUS_SUCCEEDED)
+        self.assertEqual(job.attempts, 2)
+        self.assertEqual(job.result, {'calls': 2})
+
+    def test_job_fails_permanently_after_max_attempts(self):
+        job = enqueue('tests.flaky', {'fail_times': 10})
+        with self.assertLogs('jobs.worker', 'WARNING') as logs:
+            for _ in range(3):
+                self.run_due()
+        self.assertIn("failed permanently", logs.output[-1])
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.STATUS_FAILED)
+        self.assertEqual(job.attempts, 3)
+        self.assertIsNotNone(job.finished_at)
+        self.assertEqual(self.run_due(), 0)
+
+    def test_unknown_task_fails_without_retry(self):
+        job = Job.objects.create(name='tests.missing', payload={})
+        with self.assertLogs('jobs.worker', 'ERROR'):
+            Worker(worker_id='test').run_once()
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.STATUS_FAILED)
+        self.assertIn("tests.missing", job.last_error)
+
+    def test_stale_running_job_is_requeued(self):
+        job = Job.objects.create(
+            name='tests.flaky', payload={'fail_times': 0}, status=Job.STATUS_RUNNING,
+            attempts=1, locked_by='dead-worker', locked_at=timezone.now() - timedelta(hours=1),
+        )
+        fresh = Job.objects.create(
+            name='tests.flaky', payload={'fail_times': 0}, status=Job.STATUS_RUNNING,
+            attempts=1, locked_by='live-worker', locked_at=timezone.now(),
+        )
+
+        self.assertEqual(requeue_stale_jobs(timeout=60), 1)
+        job.refresh_from_db()
+        fresh.refresh_from_db()
+        self.assertEqual(job.status, Job.STATUS_QUEUED)
+        self.assertEqual(job.locked_by, '')
+        self.assertEqual(job.attempts, 1)
+        self.assertEqual(fresh.status, Job.STATUS_RUNNING)
+
+    def test_stale_job_out_of_attempts_fails(self):
+        job = Job.objects.create(
+            name='tests.flaky', payload={'fail_times': 0}, status=Job.STATUS_RUNNING,
+            attempts=3, max_attempts=3, locked_by='dead-worker', locked_at=timezone.now() - timedelta(hours=1),
+        )
+
+        with self.assertLogs('jobs.worker', 'ERROR'):
+            self.assertEqual(requeue_stale_jobs(timeout=60), 0)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.STATUS_FAILED)
+        self.assertEqual(job.locked_by, '')
+        self.assertIn("heartbeat", job.last_error)
+        self.assertIsNotNone(job.finished_at)
+
+    def test_heartbeat_keeps_long_running_job_locked(self):
+        worker = Worker(worker_id='test')
+        job = Job.objects.create(
+            name='tests.flaky', payload={'fail_times': 0}, status=Job.STATUS_RUNNING,
+            attempts=1, locked_by='test', locked_at=timezone.now() - timedelta(hours=1),
+        )
+
+        self.assertTrue(worker.touch(job.id))
+        self.assertEqual(requeue_stale_jobs(timeout=60), 0)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.STATUS_RUNNING)
+        # Another worker's job is not ours to refresh.
+        self.assertFalse(Worker(worker_id='other').touch(job.id))
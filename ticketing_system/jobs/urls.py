@@ -0,0 +1,7 @@
+from django.urls import path
+from .views import JobListView, JobRetrieveView
+
+urlpatterns = [
+    path('', JobListView.as_view(), name='job-list'),
+    path('<uuid:pk>/', JobRetrieveView.as_view(), name='job-detail'),
+]
@@ -0,0 +1,35 @@
+from rest_framework import generics, permissions
+from drf_spectacular.utils import extend_schema
+from .models import Job
+from .serializers import JobSerializer
+
+
+class JobQuerysetMixin:
+    """
+    Staff sees every job, other users only the jobs they enqueued.
+    """
+
+    def get_queryset(self):
+        queryset = Job.objects.all()
+        user = self.request.user
+        if user.is_staff or user.role == 'admin':
+            return queryset
+        return queryset.filter(created_by=user)
+
+
+@extend_schema(
+    description="List background jobs and their status. Staff users see all jobs, others only the jobs they started."
+)
+class JobListView(JobQuerysetMixin, generics.ListAPIView):
+    serializer_class = JobSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    filterset_fields = ['status', 'name']
+    ordering_fields = ['created_at', 'run_at', 'status']
+
+
+@extend_schema(
+    description="Retrieve the status of a single background job."
+)
+class JobRetrieveView(JobQuerysetMixin, generics.RetrieveAPIView):
+    serializer_class = JobSerializer
+    permission_classes = [permissions.IsAuthenticated]
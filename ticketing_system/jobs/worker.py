@@ -0,0 +1,233 @@
+import logging
+import os
+import socket
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from django.db import close_old_connections, connection
+from django.db.models import F
+from django.utils import timezone
+from .conf import jobs_setting
+from .models import Job
+from .registry import get_task, UnknownTask
+
+logger = logging.getLogger(__name__)
+
+
+def backoff_delay(attempts):
+    """
+    Exponential backoff: BACKOFF_BASE, 2x, 4x, ... capped at BACKOFF_MAX seconds.
+    """
+    delay = jobs_setting('BACKOFF_BASE') * (2 ** max(attempts - 1, 0))
+    return timedelta(seconds=min(delay, jobs_setting('BACKOFF_MAX')))
+
+
+class Worker:
+    """
+    Claims due jobs from the database and runs them.
+
+    Claiming is a conditional UPDATE (status='queued' -> 'running'), so any
+    number of threads and processes can poll the same table without a broker
+    and without a job ever being handed to two workers. While a job runs, a
+    heartbeat thread refreshes its lock every LOCK_TIMEOUT / 3 seconds; only
+    jobs whose worker has stopped doing so are picked up by
+    requeue_stale_jobs().
+    """
+
+    def __init__(self, worker_id=None, batch_size=None):
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+        self.batch_size = batch_size or jobs_setting('BATCH_SIZE')
+
+    def _claim(self, job_id, now):
+        claimed = Job.objects.filter(id=job_id, status=Job.STATUS_QUEUED).update(
+            status=Job.STATUS_RUNNING,
+            locked_by=self.worker_id,
+            locked_at=now,
+            attempts=F('attempts') + 1,
+            updated_at=now,
+        )
+        return claimed == 1
+
+    def claim(self):
+        """
+        Claim the oldest due job. Returns the Job, or None when nothing is due.
+        """
+        now = timezone.now()
+        candidates = list(
+            Job.objects.filter(status=Job.STATUS_QUEUED, run_at__lte=now)
+            .order_by('run_at')
+            .values_list('id', flat=True)[:self.batch_size]
+        )
+        for job_id in candidates:
+            if self._claim(job_id, now):
+                return Job.objects.get(id=job_id)
+        return None
+
+    def execute(self, job_id):
+        """
+        Claim and run one specific job (used by eager mode).
+        """
+        if self._claim(job_id, timezone.now()):
+            self.run_job(Job.objects.get(id=job_id))
+
+    def run_job(self, job):
+        stop = threading.Event()
+        heartbeat = threading.Thread(
+            target=self._heartbeat, args=(job.id, stop), name='job-heartbeat', daemon=True,
+        )
+        heartbeat.start()
+        try:
+            func = get_task(job.name)
+            result = func(**job.payload)
+        except UnknownTask as exc:
+            self._finish(job, Job.STATUS_FAILED, error=str(exc))
+        except Exception:
+            self._fail(job, traceback.format_exc())
+        else:
+            self._finish(job, Job.STATUS_SUCCEEDED, result=result)
+        finally:
+            stop.set()
+            heartbeat.join()
+
+    def touch(self, job_id):
+        """
+        Refresh the lock of a job this worker is running, so that
+        requeue_stale_jobs() leaves it alone however long it takes.
+        """
+        return Job.objects.filter(id=job_id, status=Job.STATUS_RUNNING, locked_by=self.worker_id).update(
+            locked_at=timezone.now(),
+        ) == 1
+
+    def _heartbeat(self, job_id, stop):
+        interval = jobs_setting('LOCK_TIMEOUT') / 3
+        try:
+            while not stop.wait(interval):
+                self.touch(job_id)
+        finally:
+            connection.close()
+
+    def _finish(self, job, status, result=None, error=''):
+        now = timezone.now()
+        Job.objects.filter(id=job.id).update(
+            status=status,
+            result=result,
+            last_error=error,
+            locked_by='',
+            locked_at=None,
+            finished_at=now,
+            updated_at=now,
+        )
+        if status == Job.STATUS_FAILED:
+            logger.error("Job %s (%s) failed permanently: %s", job.id, job.name, error)
+
+    def _fail(self, job, error):
+        if job.attempts >= job.max_attempts:
+            self._finish(job, Job.STATUS_FAILED, error=error)
+            return
+
+        now = timezone.now()
+        retry_at = now + backoff_delay(job.attempts)
+        Job.objects.filter(id=job.id).update(
+            status=Job.STATUS_QUEUED,
+            run_at=retry_at,
+            last_error=error,
+            locked_by='',
+            locked_at=None,
+            updated_at=now,
+        )
+        logger.warning(
+            "Job %s (%s) failed on attempt %s/%s, retrying at %s",
+            job.id, job.name, job.attempts, job.max_attempts, retry_at,
+        )
+
+    def run_once(self):
+        """
+        Run jobs until none are due. Returns the number of jobs processed.
+        """
+        processed = 0
+        while True:
+            job = self.claim()
+            if job is None:
+                return processed
+            self.run_job(job)
+            processed += 1
+
+    def run_forever(self, stop_event, poll_interval=None):
+        poll_interval = poll_interval or jobs_setting('POLL_INTERVAL')
+        # Jobs of a crashed peer are recovered while the pool keeps running,
+        # not only when it starts.
+        requeue_every = jobs_setting('LOCK_TIMEOUT') / 2
+        next_requeue = time.monotonic() + requeue_every
+        try:
+            while not stop_event.is_set():
+                close_old_connections()
+                if time.monotonic() >= next_requeue:
+                    requeue_stale_jobs()
+                    next_requeue = time.monotonic() + requeue_every
+                if not self.run_once():
+                    stop_event.wait(poll_interval)
+        finally:
+            connection.close()
+
+
+def requeue_stale_jobs(timeout=None):
+    """
+    Put back jobs whose worker died mid-run: running jobs whose lock has not
+    been refreshed by the worker's heartbeat for LOCK_TIMEOUT seconds. The
+    attempt they used counts towards max_attempts, so a job that keeps
+    killing its worker ends up failed rather than requeued forever.
+    Returns the number of jobs requeued.
+    """
+    timeout = timeout or jobs_setting('LOCK_TIMEOUT')
+    now = timezone.now()
+    stale = Job.objects.filter(
+        status=Job.STATUS_RUNNING,
+        locked_at__lt=now - timedelta(seconds=timeout),
+    )
+    failed = stale.filter(attempts__gte=F('max_attempts')).update(
+        status=Job.STATUS_FAILED,
+        last_error=f"Worker stopped responding while running the job (no heartbeat for {timeout}s).",
+        locked_by='',
+        locked_at=None,
+        finished_at=now,
+        updated_at=now,
+    )
+    if failed:
+        logger.error("%s abandoned job(s) reached max_attempts and failed permanently", failed)
+    return stale.update(status=Job.STATUS_QUEUED, locked_by='', locked_at=None, run_at=now, updated_at=now)
+
+
+def run_threads(threads, stop_event, poll_interval=None, once=False):
+    """
+    Run `threads` workers in this process until `stop_event` is set
+    (or, with once=True, until the queue is drained).
+    """
+    def work():
+        worker = Worker()
+        if once:
+            try:
+                return worker.run_once()
+            finally:
+                connection.close()
+        worker.run_forever(stop_event, poll_interval)
+        return 0
+
+    with ThreadPoolExecutor(max_workers=threads, thread_name_prefix='job-worker') as pool:
+        futures = [pool.submit(work) for _ in range(threads)]
+        return sum(future.result() for future in futures)
+
+
+def run_process(threads, poll_interval=None, once=False):
+    """
+    Entry point for a worker process started by the run_workers command.
+    """
+    import signal
+    import django
+    django.setup()
+
+    stop_event = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *args: stop_event.set())
+    signal.signal(signal.SIGINT, lambda *args: stop_event.set())
+    run_threads(threads, stop_event, poll_interval, once)
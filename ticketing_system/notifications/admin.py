@@ -0,0 +1,11 @@
+from django.contrib import admin
+from tickets.admin_tools import LargeTableAdmin
+from .models import Notification
+
+
+@admin.register(Notification)
+class NotificationAdmin(LargeTableAdmin):
+    list_display = ('id', 'channel', 'address', 'event_type', 'status', 'attempts', 'next_attempt_at', 'created_at', 'sent_at')
+    search_fields = ('=address',)
+    list_filter = ('status', 'channel')
+    raw_id_fields = ('recipient', 'ticket')
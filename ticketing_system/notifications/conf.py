@@ -0,0 +1,19 @@
+from django.conf import settings
+
+DEFAULTS = {
+    'DIGEST_WINDOW': 300,
+    'WEBHOOK_URLS': [],
+    'FROM_EMAIL': None,
+    'MAX_ATTEMPTS': 5,
+    'BACKOFF_BASE': 60,
+    'BACKOFF_MAX': 3600,
+    'LOCK_TIMEOUT': 300,
+    'HTTP_TIMEOUT': 5,
+}
+
+
+def notifications_setting(name):
+    """
+    Read a value from settings.NOTIFICATIONS, falling back to the defaults above.
+    """
+    return getattr(settings, 'NOTIFICATIONS', {}).get(name, DEFAULTS[name])
@@ -0,0 +1,188 @@
+import logging
+import os
+import socket
+import threading
+from collections import defaultdict
+from datetime import timedelta
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import F, Min, Q
+from django.utils import timezone
+from .conf import notifications_setting
+from .models import Notification
+from .outbox import schedule_dispatch
+from .transport import HTTPConnectionPool
+
+logger = logging.getLogger(__name__)
+
+RECIPIENTS_PER_BATCH = 100
+
+
+def _digest_lines(notifications):
+    return [
+        f"{n.ticket.unique_reference} - {n.ticket.title}: {n.message or n.event_type}"
+        for n in notifications
+    ]
+
+
+def build_email(address, notifications):
+    if len(notifications) == 1:
+        n = notifications[0]
+        subject = f"[{n.ticket.unique_reference}] {n.message or n.event_type}"
+    else:
+        subject = f"{len(notifications)} updates on your tickets"
+    from_email = notifications_setting('FROM_EMAIL') or settings.DEFAULT_FROM_EMAIL
+    return EmailMessage(subject, "\n".join(_digest_lines(notifications)), from_email, [address])
+
+
+def build_webhook_payload(notifications):
+    return {
+        'events': [
+            {
+                'ticket': str(n.ticket_id),
+                'unique_reference': n.ticket.unique_reference,
+                'event_type': n.event_type,
+                'message': n.message,
+                'created_at': n.created_at,
+            }
+            for n in notifications
+        ]
+    }
+
+
+def backoff_delay(attempts):
+    """
+    Exponential backoff: BACKOFF_BASE, 2x, 4x, ... capped at BACKOFF_MAX seconds.
+    """
+    delay = notifications_setting('BACKOFF_BASE') * (2 ** max(attempts - 1, 0))
+    return timedelta(seconds=min(delay, notifications_setting('BACKOFF_MAX')))
+
+
+def requeue_stale_notifications():
+    """
+    Rows left 'sending' by a crashed dispatcher go back to pending.
+    """
+    cutoff = timezone.now() - timedelta(seconds=notifications_setting('LOCK_TIMEOUT'))
+    return Notification.objects.filter(
+        status=Notification.STATUS_SENDING,
+        locked_at__lt=cutoff,
+    ).update(status=Notification.STATUS_PENDING, locked_by='', locked_at=None)
+
+
+def _due_recipients(window, flush, now):
+    due = (
+        Notification.objects.filter(status=Notification.STATUS_PENDING, next_attempt_at__lte=now)
+        .values('channel', 'address')
+        .annotate(oldest=Min('created_at'))
+        .order_by('oldest')
+    )
+    if not flush:
+        due = due.filter(oldest__lte=now - timedelta(seconds=window))
+    return list(due[:RECIPIENTS_PER_BATCH])
+
+
+def claim(recipients, now, worker_id):
+    """
+    Mark the due rows of `recipients` as being sent by `worker_id` and return
+    them. The conditional UPDATE hands each row to one dispatcher only, so
+    concurrent runs (job threads, the management command) never send the
+    same notification twice.
+    """
+    Notification.objects.filter(
+        recipients, status=Notification.STATUS_PENDING, next_attempt_at__lte=now,
+    ).update(status=Notification.STATUS_SENDING, locked_by=worker_id, locked_at=now)
+    return (
+        Notification.objects.filter(status=Notification.STATUS_SENDING, locked_by=worker_id, locked_at=now)
+        .select_related('ticket')
+    )
+
+
+def _fail(notifications, error):
+    """
+    Put a group back to pending with backoff, or mark it failed once
+    MAX_ATTEMPTS is reached. Returns how many rows failed for good.
+    """
+    attempts = max(n.attempts for n in notifications) + 1
+    ids = [n.id for n in notifications]
+    Notification.objects.filter(id__in=ids).update(
+        status=Notification.STATUS_PENDING,
+        attempts=F('attempts') + 1,
+        next_attempt_at=timezone.now() + backoff_delay(attempts),
+        last_error=error,
+        locked_by='',
+        locked_at=None,
+    )
+    return Notification.objects.filter(
+        id__in=ids,
+        attempts__gte=notifications_setting('MAX_ATTEMPTS'),
+    ).update(status=Notification.STATUS_FAILED)
+
+
+def dispatch_pending(window=None, flush=False):
+    """
+    Deliver pending notifications as one digest per recipient.
+
+    A recipient is due once its oldest pending notification is older than
+    the digest window; everything pending for it at that point is claimed
+    and goes out in a single email or webhook call. All emails of a run
+    share one SMTP connection and webhook calls reuse pooled HTTP
+    connections. Failed deliveries are retried with exponential backoff
+    until MAX_ATTEMPTS is reached.
+    """
+    if window is None:
+        window = notifications_setting('DIGEST_WINDOW')
+
+    requeue_stale_notifications()
+    worker_id = f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+    stats = {'emails': 0, 'webhooks': 0, 'sent': 0, 'failed': 0}
+    pool = HTTPConnectionPool(timeout=notifications_setting('HTTP_TIMEOUT'))
+    try:
+        while True:
+            now = timezone.now()
+            due = _due_recipients(window, flush, now)
+            if not due:
+                break
+
+            recipients = Q()
+            for row in due:
+                recipients |= Q(channel=row['channel'], address=row['address'])
+            groups = defaultdict(list)
+            for notification in claim(recipients, now, worker_id):
+                groups[(notification.channel, notification.address)].append(notification)
+
+            sent_ids = []
+            with get_connection() as mail_connection:
+                for (channel, address), notifications in groups.items():
+                    try:
+                        if channel == Notification.CHANNEL_EMAIL:
+                            mail_connection.send_messages([build_email(address, notifications)])
+                            stats['emails'] += 1
+                        else:
+                            status, _ = pool.post_json(address, build_webhook_payload(notifications))
+                            if not 200 <= status < 300:
+                                raise ConnectionError(f"Webhook responded with HTTP {status}")
+                            stats['webhooks'] += 1
+                    except Exception as exc:
+                        logger.warning("Notification delivery to %s failed: %s", address, exc)
+                        stats['failed'] += _fail(notifications, str(exc))
+                    else:
+                        sent_ids += [n.id for n in notifications]
+
+            Notification.objects.filter(id__in=sent_ids).update(
+                status=Notification.STATUS_SENT,
+                attempts=F('attempts') + 1,
+                sent_at=timezone.now(),
+                locked_by='',
+                locked_at=None,
+            )
+            stats['sent'] += len(sent_ids)
+    finally:
+        pool.close()
+
+    next_due = Notification.objects.filter(status=Notification.STATUS_PENDING).aggregate(
+        next_due=Min('next_attempt_at'),
+    )['next_due']
+    if next_due is not None:
+        schedule_dispatch(max(window, (next_due - timezone.now()).total_seconds()))
+
+    return stats
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from notifications.dispatch import dispatch_pending
+
+
+class Command(BaseCommand):
+    help = "Deliver pending notifications as per-recipient digests."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--window', type=int, default=None,
+                            help="Digest window in seconds (defaults to NOTIFICATIONS['DIGEST_WINDOW']).")
+        parser.add_argument('--flush', action='store_true',
+                            help="Send everything pending now, ignoring the digest window.")
+
+    def handle(self, *args, **options):
+        stats = dispatch_pending(window=options['window'], flush=options['flush'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Sent {stats['sent']} notification(s) in {stats['emails']} email(s) "
+            f"and {stats['webhooks']} webhook call(s); {stats['failed']} failed."
+        ))
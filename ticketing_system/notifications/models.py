@@ -0,0 +1,70 @@
+from django.db import models
+from django.conf import settings
+from django.utils import timezone
+
+
+class Notification(models.Model):
+    """
+    Outbox row for a single outbound notification.
+    Rows are written alongside ticket events and delivered later by the
+    dispatcher, which merges all pending rows of a recipient into one digest.
+    - channel: 'email' (address is an email) or 'webhook' (address is a URL)
+    - recipient: the user being notified (email channel only)
+    - locked_by / locked_at: the dispatcher sending the row (status 'sending')
+    - next_attempt_at: earliest time a failed row is retried
+    """
+    CHANNEL_EMAIL = 'email'
+    CHANNEL_WEBHOOK = 'webhook'
+
+    CHANNEL_CHOICES = (
+        (CHANNEL_EMAIL, 'Email'),
+        (CHANNEL_WEBHOOK, 'Webhook'),
+    )
+
+    STATUS_PENDING = 'pending'
+    STATUS_SENDING = 'sending'
+    STATUS_SENT = 'sent'
+    STATUS_FAILED = 'failed'
+
+    STATUS_CHOICES = (
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_SENDING, 'Sending'),
+        (STATUS_SENT, 'Sent'),
+        (STATUS_FAILED, 'Failed'),
+    )
+
+    id = models.BigAutoField(primary_key=True)
+    channel = models.CharField(max_length=10, choices=CHANNEL_CHOICES, default=CHANNEL_EMAIL)
+    recipient = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='notifications'
+    )
+    address = models.CharField(max_length=255)
+    ticket = models.ForeignKey(
+        'tickets.Ticket',
+        on_delete=models.CASCADE,
+        related_name='notifications'
+    )
+    event_type = models.CharField(max_length=20)
+    message = models.TextField(blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(blank=True, null=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            # The dispatcher groups pending rows per (channel, address).
+            models.Index(fields=['status', 'channel', 'address'], name='notif_pending_recipient_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.channel} to {self.address} | {self.event_type} | {self.status}"
@@ -0,0 +1,57 @@
+from datetime import timedelta
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils import timezone
+from jobs.registry import enqueue_unique
+from .conf import notifications_setting
+from .models import Notification
+
+
+def record_ticket_event(history):
+    """
+    Write outbox rows for a TicketHistory event: one per interested user
+    (creator and assignee, minus whoever caused the event) plus one per
+    configured webhook URL. Nothing is sent here; a dispatch job is scheduled
+    for the end of the digest window instead.
+    """
+    ticket = history.ticket
+    user_ids = {ticket.created_by_id, ticket.assignee_id} - {None, history.user_id}
+    recipients = get_user_model().objects.filter(id__in=user_ids, is_active=True).exclude(email='')
+
+    notifications = [
+        Notification(
+            channel=Notification.CHANNEL_EMAIL,
+            recipient_id=user_id,
+            address=email,
+            ticket=ticket,
+            event_type=history.event_type,
+            message=history.message or '',
+        )
+        for user_id, email in recipients.values_list('id', 'email')
+    ]
+    notifications += [
+        Notification(
+            channel=Notification.CHANNEL_WEBHOOK,
+            address=url,
+            ticket=ticket,
+            event_type=history.event_type,
+            message=history.message or '',
+        )
+        for url in notifications_setting('WEBHOOK_URLS')
+    ]
+    if not notifications:
+        return []
+
+    Notification.objects.bulk_create(notifications)
+    schedule_dispatch()
+    return notifications
+
+
+def schedule_dispatch(delay=None):
+    """
+    Make sure a dispatch job is queued for when the current digest window closes.
+    """
+    if delay is None:
+        delay = notifications_setting('DIGEST_WINDOW')
+    run_at = timezone.now() + timedelta(seconds=delay)
+    transaction.on_commit(lambda: enqueue_unique('notifications.dispatch', run_at=run_at))
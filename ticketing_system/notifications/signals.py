@@ -0,0 +1,10 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from tickets.models import TicketHistory
+from .outbox import record_ticket_event
+
+
+@receiver(post_save, sender=TicketHistory, dispatch_uid='notifications_record_ticket_event')
+def ticket_history_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        record_ticket_event(instance)
@@ -0,0 +1,9 @@
+from jobs.registry import task
+
+
+@task('notifications.dispatch')
+def dispatch():
+    # Imported here so web processes, which only enqueue, don't load the
+    # dispatcher and its mail/HTTP dependencies at startup.
+    from .dispatch import dispatch_pending
+    return dispatch_pending()
@@ -0,0 +1,134 @@
+from datetime import timedelta
+from django.core import mail
+from django.core.mail.backends.base import BaseEmailBackend
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from accounts.models import User
+from companies.models import Company
+from tickets.models import Ticket
+from .dispatch import dispatch_pending
+from .models import Notification
+
+
+class FailingBackend(BaseEmailBackend):
+    def send_messages(self, email_messages):
+        raise ConnectionRefusedError("SMTP server unavailable")
+
+
+@override_settings(
+    EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    NOTIFICATIONS={'DIGEST_WINDOW': 300, 'WEBHOOK_URLS': []},
+)
+class DigestOutboxTests(TestCase):
+    def setUp(self):
+        company = Company.objects.create(name="Acme", initials="AC")
+        self.user = User.objects.create_user(
+            email="u@example.com", username="u", password="pw", first_name="U", last_name="One", company=company,
+        )
+        self.ticket = Ticket.objects.create(
+            title="Printer on fire", description="Help", created_by=self.user, company=company,
+        )
+        # Start from an empty outbox whatever the ticket's creation recorded.
+        Notification.objects.all().delete()
+
+    def notify(self, message, address="u@example.com", age=0):
+        notification = Notification.objects.create(
+            recipient=self.user, address=address, ticket=self.ticket, event_type='comment', message=message,
+        )
+        if age:
+            Notification.objects.filter(id=notification.id).update(
+                created_at=timezone.now() - timedelta(seconds=age),
+            )
+        return notification
+
+    def test_pending_notifications_go_out_as_one_digest(self):
+        self.notify("First", age=600)
+        self.notify("Second")
+        self.notify("Third")
+
+        stats = dispatch_pending()
+
+        self.assertEqual(stats, {'emails': 1, 'webhooks': 0, 'sent': 3, 'failed': 0})
+        self.assertEqual(len(mail.outbox), 1)
+        email = mail.outbox[0]
+        self.assertEqual(email.to, ["u@example.com"])
+        self.assertEqual(email.subject, "3 updates on your tickets")
+        self.assertEqual(len(email.body.splitlines()), 3)
+        self.assertFalse(Notification.objects.filter(status=Notification.STATUS_PENDING).exists())
+
+    def test_single_notification_uses_ticket_subject(self):
+        self.notify("Status changed", age=600)
+
+        dispatch_pending()
+
+        self.assertEqual(mail.outbox[0].subject, f"[{self.ticket.unique_reference}] Status changed")
+
+    def test_recipient_waits_for_digest_window(self):
+        notification = self.notify("Too fresh")
+
+        self.assertEqual(dispatch_pending()['emails'], 0)
+        self.assertEqual(mail.outbox, [])
+        notification.refresh_from_db()
+        self.assertEqual(notification.status, Notification.STATUS_PENDING)
+
+        dispatch_pending(flush=True)
+        notification.refresh_from_db()
+        self.assertEqual(notification.status, Notification.STATUS_SENT)
+        self.assertEqual(notification.attempts, 1)
+        self.assertIsNotNone(notification.sent_at)
+
+    def test_one_email_per_recipient(self):
+        self.notify("For u", age=600)
+        self.notify("For u too", age=600)
+        self.notify("For v", address="v@example.com", age=600)
+
+        stats = dispatch_pending()
+
+        self.assertEqual(stats['emails'], 2)
+        self.assertEqual(sorted(email.to[0] for email in mail.outbox), ["u@example.com", "v@example.com"])
+
+    def test_rows_claimed_by_another_dispatcher_are_not_sent_twice(self):
+        notification = self.notify("Busy", age=600)
+        Notification.objects.filter(id=notification.id).update(
+            status=Notification.STATUS_SENDING, locked_by='other-dispatcher', locked_at=timezone.now(),
+        )
+
+        self.assertEqual(dispatch_pending(flush=True)['sent'], 0)
+        self.assertEqual(mail.outbox, [])
+
+    def test_stale_claims_are_sent_again(self):
+        notification = self.notify("Orphaned", age=600)
+        Notification.objects.filter(id=notification.id).update(
+            status=Notification.STATUS_SENDING, locked_by='dead-dispatcher',
+            locked_at=timezone.now() - timedelta(hours=1),
+        )
+
+        self.assertEqual(dispatch_pending()['sent'], 1)
+        self.assertEqual(len(mail.outbox), 1)
+
+    @override_settings(
+        EMAIL_BACKEND='notifications.tests.FailingBackend',
+        NOTIFICATIONS={'DIGEST_WINDOW': 300, 'MAX_ATTEMPTS': 2, 'BACKOFF_BASE': 60},
+    )
+    def test_failed_delivery_backs_off_then_fails(self):
+        notification = self.notify("Unlucky", age=600)
+
+        with self.assertLogs('notifications.dispatch', 'WARNING'):
+            stats = dispatch_pending()
+        self.assertEqual(stats['failed'], 0)
+        notification.refresh_from_db()
+        self.assertEqual(notification.status, Notification.STATUS_PENDING)
+        self.assertEqual(notification.attempts, 1)
+        self.assertIn("SMTP server unavailable", notification.last_error)
+        self.assertGreater(notification.next_attempt_at, timezone.now() + timedelta(seconds=50))
+
+        # Backing off: the next run leaves it alone, even when flushing.
+        self.assertEqual(dispatch_pending(flush=True), {'emails': 0, 'webhooks': 0, 'sent': 0, 'failed': 0})
+
+        Notification.objects.filter(id=notification.id).update(next_attempt_at=timezone.now())
+        with self.assertLogs('notifications.dispatch', 'WARNING'):
+            stats = dispatch_pending()
+        self.assertEqual(stats['failed'], 1)
+        notification.refresh_from_db()
+        self.assertEqual(notification.status, Notification.STATUS_FAILED)
+        self.assertEqual(notification.attempts, 2)
@@ -0,0 +1,87 @@
+import http.client
+import json
+import threading
+from collections import defaultdict
+from urllib.parse import urlsplit
+from django.core.serializers.json import DjangoJSONEncoder
+
+
+class HTTPConnectionPool:
+    """
+    Small keep-alive pool of http.client connections, keyed by
+    (scheme, host, port). Reusing connections avoids a TCP (and TLS)
+    handshake per webhook call when a dispatcher run posts many payloads
+    to the same receivers.
+    """
+
+    def __init__(self, timeout=5, max_idle_per_host=4):
+        self.timeout = timeout
+        self.max_idle_per_host = max_idle_per_host
+        self._idle = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def _key(self, url):
+        parts = urlsplit(url)
+        port = parts.port or (443 if parts.scheme == 'https' else 80)
+        return parts.scheme, parts.hostname, port
+
+    def _acquire(self, key):
+        with self._lock:
+            if self._idle[key]:
+                return self._idle[key].pop(), True
+        scheme, host, port = key
+        connection_class = http.client.HTTPSConnection if scheme == 'https' else http.client.HTTPConnection
+        return connection_class(host, port, timeout=self.timeout), False
+
+    def _release(self, key, conn):
+        with self._lock:
+            if len(self._idle[key]) < self.max_idle_per_host:
+                self._idle[key].append(conn)
+                return
+        conn.close()
+
+    def request(self, method, url, body=b'', headers=None):
+        """
+        Send a request and return (status, response_body).
+        Idle connections the server has already closed are discarded and the
+        request is retried on the next one (ultimately on a fresh connection).
+        """
+        key = self._key(url)
+        parts = urlsplit(url)
+        path = parts.path or '/'
+        if parts.query:
+            path = f"{path}?{parts.query}"
+
+        while True:
+            conn, reused = self._acquire(key)
+            try:
+                conn.request(method, path, body=body, headers=headers or {})
+                response = conn.getresponse()
+                break
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                conn.close()
+                if not reused:
+                    raise
+            except Exception:
+                conn.close()
+                raise
+
+        data = response.read()
+        if response.will_close:
+            conn.close()
+        else:
+            self._release(key, conn)
+        return response.status, data
+
+    def post_json(self, url, payload, headers=None):
+        body = json.dumps(payload, cls=DjangoJSONEncoder).encode()
+        all_headers = {'Content-Type': 'application/json'}
+        all_headers.update(headers or {})
+        return self.request('POST', url, body=body, headers=all_headers)
+
+    def close(self):
+        with self._lock:
+            for connections in self._idle.values():
+                for conn in connections:
+                    conn.close()
+            self._idle.clear()
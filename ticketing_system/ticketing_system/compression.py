@@ -0,0 +1,98 @@
+"""
+Response body encoders for CompressionMiddleware: gzip always, brotli and
+zstd when their packages (`brotli`, `zstandard`) are installed.
+"""
+import gzip
+from django.conf import settings
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+DEFAULTS = {
+    'MIN_SIZE': 1024,
+    # Server preference when the client accepts several equally.
+    'ENCODINGS': ['zstd', 'br', 'gzip'],
+    'GZIP_LEVEL': 6,
+    'BROTLI_QUALITY': 5,
+    'ZSTD_LEVEL': 3,
+    # API payloads only. HTML pages (browsable API, admin) embed the CSRF
+    # token next to reflected input, which compression would expose to
+    # BREACH-style length oracles.
+    'CONTENT_TYPES': ['application/json', 'application/vnd.oai.openapi'],
+}
+
+
+def compression_setting(name):
+    """
+    Read a value from settings.COMPRESSION, falling back to the defaults above.
+    """
+    return getattr(settings, 'COMPRESSION', {}).get(name, DEFAULTS[name])
+
+
+def _gzip(data):
+    return gzip.compress(data, compresslevel=compression_setting('GZIP_LEVEL'), mtime=0)
+
+
+def _brotli(data):
+    return brotli.compress(data, quality=compression_setting('BROTLI_QUALITY'))
+
+
+def _zstd(data):
+    return zstandard.ZstdCompressor(level=compression_setting('ZSTD_LEVEL')).compress(data)
+
+
+ENCODERS = {'gzip': _gzip}
+if brotli is not None:
+    ENCODERS['br'] = _brotli
+if zstandard is not None:
+    ENCODERS['zstd'] = _zstd
+
+
+def available_encodings():
+    return [name for name in compression_setting('ENCODINGS') if name in ENCODERS]
+
+
+def parse_accept_encoding(header):
+    """
+    {coding: q} from an Accept-Encoding header.
+    """
+    accepted = {}
+    for part in header.split(','):
+        coding, _, params = part.strip().partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[coding] = q
+    return accepted
+
+
+def negotiate(header):
+    """
+    The encoding to use for a client sending `header`, or None for identity.
+    Highest q wins; ties go to the server preference order.
+    """
+    accepted = parse_accept_encoding(header or '')
+    best, best_q = None, 0.0
+    for name in available_encodings():
+        q = accepted.get(name, accepted.get('*', 0.0))
+        if q > best_q:
+            best, best_q = name, q
+    return best
+
+
+def compress(encoding, data):
+    return ENCODERS[encoding](data)
@@ -0,0 +1,120 @@
+"""
+Building blocks of the "structured" logging profile (LOGGING_PROFILE=structured):
+
+- QueueListenerHandler: the request thread only enqueues the record; a
+  background thread formats it and writes it to a size-rotated file.
+- JSONFormatter: one JSON object per line.
+- RequestContextFilter: stamps records with the current request id and view,
+  set by ticketing_system.middleware.RequestIdMiddleware.
+- SampleFilter: keeps a fraction of low-level records (SQL debug logging).
+"""
+import json
+import logging
+import queue
+import random
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+request_id_var = ContextVar('request_id', default=None)
+view_name_var = ContextVar('view_name', default=None)
+
+# LogRecord attributes that are not extra fields passed by the caller.
+RESERVED_ATTRS = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+class RequestContextFilter(logging.Filter):
+    def filter(self, record):
+        # django.request logs responses after the middleware has returned;
+        # those records carry the request itself.
+        request = getattr(record, 'request', None)
+        record.request_id = request_id_var.get() or getattr(request, 'id', None)
+        record.view = view_name_var.get() or getattr(request, 'view_name', None)
+        return True
+
+
+class SampleFilter(logging.Filter):
+    """
+    Let through every record at or above `min_level`, and a `rate` fraction
+    of the ones below it.
+    """
+
+    def __init__(self, rate=0.01, min_level='INFO'):
+        super().__init__()
+        self.rate = float(rate)
+        self.min_level = logging.getLevelName(min_level) if isinstance(min_level, str) else min_level
+
+    def filter(self, record):
+        return record.levelno >= self.min_level or random.random() < self.rate
+
+
+class JSONFormatter(logging.Formatter):
+    def format(self, record):
+        data = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for name, value in vars(record).items():
+            if name not in RESERVED_ATTRS and value is not None and not name.startswith('_'):
+                data[name] = value
+        if record.exc_info:
+            data['exception'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            data['exception'] = record.exc_text
+        if record.stack_info:
+            data['stack'] = self.formatStack(record.stack_info)
+        return json.dumps(data, default=str)
+
+
+class _Listener(QueueListener):
+    def enqueue_sentinel(self):
+        # Block rather than fail when the queue is full: on shutdown every
+        # record already queued is still written.
+        self.queue.put(self._sentinel)
+
+
+class QueueListenerHandler(QueueHandler):
+    """
+    Logs to `filename` from a background thread, rotating the file at
+    `max_bytes` and keeping `backup_count` old files.
+
+    The queue holds at most `queue_size` records; when the writer falls that
+    far behind, new records are dropped (and counted) rather than blocking
+    requests or growing memory without bound.
+    """
+
+    def __init__(self, filename, max_bytes=10 * 1024 * 1024, backup_count=5, queue_size=10000):
+        super().__init__(queue.Queue(queue_size))
+        self.target = RotatingFileHandler(
+            filename, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8', delay=True
+        )
+        self.dropped = 0
+        self.listener = _Listener(self.queue, self.target)
+        self.listener.start()
+
+    def setFormatter(self, fmt):
+        # Formatting happens in the listener thread, on the target handler.
+        self.target.setFormatter(fmt)
+
+    def prepare(self, record):
+        # Resolve the message now, while its arguments still hold the values
+        # they had when it was logged; leave the rest to the writer thread.
+        record = logging.makeLogRecord(vars(record))
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self):
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+        self.target.close()
+        super().close()
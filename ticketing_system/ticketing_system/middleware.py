@@ -0,0 +1,203 @@
+import logging
+import random
+import re
+import threading
+import uuid
+from contextlib import ExitStack
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.utils.cache import patch_vary_headers
+from .compression import compress, compression_setting, negotiate
+from .log import request_id_var, view_name_var
+from .profiling import is_staff_request, profiling_setting, record, sampler
+from .querybudget import QueryBudgetExceeded, QueryCollector, describe, query_budget_setting
+from .throttling import release_slot
+
+# Incoming ids are reused only if they look like ids, not arbitrary text.
+REQUEST_ID_RE = re.compile(r'^[A-Za-z0-9._-]{1,64}$')
+
+query_logger = logging.getLogger('ticketing_system.queries')
+
+
+class RequestIdMiddleware:
+    """
+    Give every request an id, reused from the X-Request-ID header when a
+    proxy already set one, expose it as request.id and in the response's
+    X-Request-ID, and make it and the resolved view name available to
+    log records for the duration of the request.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        incoming = request.headers.get('X-Request-ID', '')
+        request.id = incoming if REQUEST_ID_RE.match(incoming) else uuid.uuid4().hex
+        request_token = request_id_var.set(request.id)
+        view_token = view_name_var.set(None)
+        try:
+            response = self.get_response(request)
+        finally:
+            request_id_var.reset(request_token)
+            view_name_var.reset(view_token)
+        response['X-Request-ID'] = request.id
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view = getattr(view_func, 'view_class', None) or getattr(view_func, 'cls', None) or view_func
+        request.view_name = f"{view.__module__}.{view.__qualname__}"
+        view_name_var.set(request.view_name)
+
+
+class CompressionMiddleware:
+    """
+    Compress responses with the best encoding both sides support (zstd, br
+    or gzip, see ticketing_system/compression.py), for JSON/OpenAPI bodies of
+    at least COMPRESSION['MIN_SIZE'] bytes. HTML is never compressed, as it
+    carries the CSRF token (BREACH). Streaming responses (file downloads,
+    which may be ranged) and already-encoded ones are left alone.
+    Strong ETags are weakened, as the bytes no longer match the identity
+    representation.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if response.streaming or response.has_header('Content-Encoding'):
+            return response
+        if not self.compressible_type(response.get('Content-Type', '')):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if len(response.content) < compression_setting('MIN_SIZE'):
+            return response
+        encoding = negotiate(request.headers.get('Accept-Encoding'))
+        if encoding is None:
+            return response
+
+        compressed = compress(encoding, response.content)
+        if len(compressed) >= len(response.content):
+            return response
+        response.content = compressed
+        response['Content-Length'] = str(len(compressed))
+        response['Content-Encoding'] = encoding
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        return response
+
+    @staticmethod
+    def compressible_type(content_type):
+        content_type = content_type.split(';', 1)[0].strip().lower()
+        return any(content_type.startswith(prefix) for prefix in compression_setting('CONTENT_TYPES'))
+
+
+class ConcurrencyReleaseMiddleware:
+    """
+    Give back the tenant concurrency slot taken by TenantConcurrencyThrottle
+    once the response is ready, whatever happened in between.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        try:
+            return self.get_response(request)
+        finally:
+            slot = getattr(request, '_concurrency_slot', None)
+            if slot:
+                release_slot(slot)
+
+
+class QueryBudgetMiddleware:
+    """
+    Development/test aid, active when QUERY_BUDGET['ENABLED'] is set: count
+    the SQL queries of every request (X-Query-Count response header), warn
+    about query templates repeated QUERY_BUDGET['REPEAT_THRESHOLD'] times or
+    more, naming the serializer field and code line behind them, and about
+    requests over their view's budget:
+
+        class TicketListCreateView(...):
+            query_budget = {'GET': 6, 'POST': 12}   # or one int for all methods
+
+    With QUERY_BUDGET['ENFORCE'], going over budget raises QueryBudgetExceeded
+    instead, failing the request (and the test that made it).
+    """
+
+    def __init__(self, get_response):
+        if not query_budget_setting('ENABLED'):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        collector = QueryCollector()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(collector))
+            response = self.get_response(request)
+
+        response['X-Query-Count'] = str(collector.count)
+        view_name = getattr(request, '_query_budget_view', None) or request.path
+        repeated = collector.repeated(query_budget_setting('REPEAT_THRESHOLD'))
+        if repeated:
+            query_logger.warning(
+                "%s %s repeated queries (possible N+1):\n%s", request.method, view_name, describe(repeated),
+            )
+        budget = getattr(request, '_query_budget', None)
+        if budget is not None and collector.count > budget:
+            message = f"{request.method} {view_name} ran {collector.count} queries, budget is {budget}"
+            if query_budget_setting('ENFORCE'):
+                raise QueryBudgetExceeded(message + (f"\n{describe(repeated)}" if repeated else ''))
+            query_logger.warning(message)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view = getattr(view_func, 'view_class', None) or getattr(view_func, 'cls', None) or view_func
+        request._query_budget_view = f"{view.__module__}.{view.__qualname__}"
+        budget = getattr(view, 'query_budget', None)
+        if isinstance(budget, dict):
+            budget = budget.get(request.method)
+        if budget is None:
+            budget = query_budget_setting('DEFAULT_BUDGET')
+        request._query_budget = budget
+
+
+class ProfilingMiddleware:
+    """
+    Opt-in sampling profiler (PROFILING['ENABLED']): profile one request in
+    PROFILING['SAMPLE_RATE'], plus requests from staff users that carry the
+    PROFILING['HEADER'] header, and add their stacks to the totals of the
+    view class that served them (see ticketing_system/profiling.py). When
+    disabled it is not even installed.
+
+    Sampling starts in process_view, once the view is known and, for the
+    header, the caller has been checked to be staff; other clients sending
+    it cost nothing.
+    """
+
+    def __init__(self, get_response):
+        if not profiling_setting('ENABLED'):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.header = profiling_setting('HEADER')
+
+    def __call__(self, request):
+        try:
+            return self.get_response(request)
+        finally:
+            view_name = getattr(request, '_profiling_view', None)
+            if view_name:
+                record(view_name, sampler.stop(threading.get_ident()))
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        rate = profiling_setting('SAMPLE_RATE')
+        sampled = bool(rate) and random.randrange(rate) == 0
+        if not sampled and not (self.header in request.headers and is_staff_request(request)):
+            return None
+        view = getattr(view_func, 'view_class', None) or getattr(view_func, 'cls', None) or view_func
+        request._profiling_view = f"{view.__module__}.{view.__qualname__}"
+        sampler.start(threading.get_ident(), stop_code=ProfilingMiddleware.__call__.__code__)
+        return None
@@ -0,0 +1,189 @@
+"""
+Sampling profiler behind ProfilingMiddleware.
+
+While a request is profiled, a background thread records the stack of the
+thread serving it every PROFILING['INTERVAL'] seconds; the request thread
+itself runs untouched. The samples are folded into collapsed stacks
+("module:function;module:function count", the input format of
+flamegraph.pl and speedscope), aggregated per view class in the Django
+cache so every worker contributes, and served by ProfileListView and
+ProfileStacksView.
+"""
+import sys
+import threading
+import time
+from collections import Counter
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.authentication import SessionAuthentication
+from rest_framework.exceptions import APIException
+from rest_framework.settings import api_settings
+
+DEFAULTS = {
+    'ENABLED': False,
+    # Profile one request in SAMPLE_RATE; 0 profiles only requests sent by
+    # staff with the header below.
+    'SAMPLE_RATE': 0,
+    'HEADER': 'X-Profile',
+    'INTERVAL': 0.005,
+    'MAX_DEPTH': 64,
+    # Distinct stacks kept per view; rarer ones are folded into one entry.
+    'MAX_STACKS': 2000,
+    'TTL': 86400,
+}
+
+VIEWS_KEY = 'profiling:views'
+LOCK_KEY = 'profiling:lock'
+OTHER_STACKS = '[other]'
+
+
+def profiling_setting(name):
+    """
+    Read a value from settings.PROFILING, falling back to the defaults above.
+    """
+    return getattr(settings, 'PROFILING', {}).get(name, DEFAULTS[name])
+
+
+def collapse(frame, stop_code=None):
+    """
+    'root;...;leaf' for the stack ending at `frame`, up to (not including) the
+    frame running `stop_code`, keeping the MAX_DEPTH innermost frames.
+    """
+    names = []
+    max_depth = profiling_setting('MAX_DEPTH')
+    while frame is not None and frame.f_code is not stop_code:
+        if len(names) < max_depth:
+            names.append(f"{frame.f_globals.get('__name__', '?')}:{frame.f_code.co_name}")
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+class Sampler:
+    """
+    Samples the stacks of the threads registered with start() from a single
+    daemon thread, which sleeps on an event while nothing is being profiled.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.active = {}
+        self.thread = None
+
+    def start(self, thread_id, stop_code=None):
+        with self.lock:
+            self.active[thread_id] = (stop_code, Counter())
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self.run, name='profiling-sampler', daemon=True)
+                self.thread.start()
+            self.wakeup.set()
+
+    def stop(self, thread_id):
+        """
+        The Counter of collapsed stacks sampled since start(). Counters are
+        only written under the lock, so once popped it no longer changes.
+        """
+        with self.lock:
+            return self.active.pop(thread_id)[1]
+
+    def run(self):
+        while True:
+            self.wakeup.wait()
+            frames = sys._current_frames()
+            with self.lock:
+                if not self.active:
+                    self.wakeup.clear()
+                    continue
+                for thread_id, (stop_code, stacks) in self.active.items():
+                    frame = frames.get(thread_id)
+                    if frame is not None:
+                        stacks[collapse(frame, stop_code)] += 1
+            del frames
+            time.sleep(profiling_setting('INTERVAL'))
+
+
+sampler = Sampler()
+
+
+def is_staff_request(request):
+    """
+    Whether `request` comes from a staff user, checked before the view runs:
+    the session user set by AuthenticationMiddleware, or else the API
+    credentials (token, JWT) of REST_FRAMEWORK's authentication classes.
+    """
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return user.is_staff
+    for authentication_class in api_settings.DEFAULT_AUTHENTICATION_CLASSES:
+        if issubclass(authentication_class, SessionAuthentication):
+            continue
+        try:
+            result = authentication_class().authenticate(request)
+        except APIException:
+            return False
+        if result is not None:
+            return result[0].is_staff
+    return False
+
+
+def _stacks_key(view_name):
+    return f"profiling:stacks:{view_name}"
+
+
+def record(view_name, stacks):
+    """
+    Add the samples of one request to the totals of `view_name`. Profiles are
+    statistical: when another request is merging its own, these samples are
+    dropped rather than holding up the response.
+    """
+    if not stacks or not cache.add(LOCK_KEY, True, 5):
+        return
+    try:
+        ttl = profiling_setting('TTL')
+        totals = cache.get(_stacks_key(view_name), {})
+        max_stacks = profiling_setting('MAX_STACKS')
+        for stack, count in stacks.items():
+            if stack not in totals and len(totals) >= max_stacks:
+                stack = OTHER_STACKS
+            totals[stack] = totals.get(stack, 0) + count
+        cache.set(_stacks_key(view_name), totals, ttl)
+
+        views = cache.get(VIEWS_KEY, {})
+        views[view_name] = views.get(view_name, 0) + 1
+        cache.set(VIEWS_KEY, views, ttl)
+    finally:
+        cache.delete(LOCK_KEY)
+
+
+def profiled_views():
+    """
+    [{'view', 'requests', 'samples'}] of every view with recorded samples.
+    """
+    views = cache.get(VIEWS_KEY, {})
+    totals = cache.get_many([_stacks_key(name) for name in views])
+    return [
+        {'view': name, 'requests': requests, 'samples': sum(totals.get(_stacks_key(name), {}).values())}
+        for name, requests in sorted(views.items())
+    ]
+
+
+def collapsed_stacks(view_name):
+    """
+    The collapsed-stack text for `view_name`, None if it has no samples.
+    """
+    totals = cache.get(_stacks_key(view_name))
+    if not totals:
+        return None
+    return ''.join(f"{stack} {count}\n" for stack, count in sorted(totals.items()))
+
+
+def reset(view_name=None):
+    """
+    Forget the samples of `view_name`, or of every view.
+    """
+    views = cache.get(VIEWS_KEY, {})
+    names = list(views) if view_name is None else [view_name]
+    cache.delete_many([_stacks_key(name) for name in names])
+    for name in names:
+        views.pop(name, None)
+    cache.set(VIEWS_KEY, views, profiling_setting('TTL'))
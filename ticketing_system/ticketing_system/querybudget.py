@@ -0,0 +1,105 @@
+"""
+Per-request SQL accounting for development and tests (see
+QueryBudgetMiddleware).
+
+Every query is reduced to a template: placeholders and literals replaced,
+IN lists collapsed. The same template running again and again within one
+request is the signature of an N+1; for those the collector records where
+the second execution came from -- the serializer field being rendered, if
+any, and the innermost line of project code.
+"""
+import os
+import re
+import sys
+from django.conf import settings
+
+DEFAULTS = {
+    'ENABLED': False,
+    'ENFORCE': False,
+    'REPEAT_THRESHOLD': 3,
+    'DEFAULT_BUDGET': None,
+}
+
+_IN_LIST_RE = re.compile(r'%s(?:\s*,\s*%s)+')
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+
+_THIS_FILE = os.path.abspath(__file__)
+_DRF_SERIALIZERS = os.path.join('rest_framework', 'serializers.py')
+
+
+def query_budget_setting(name):
+    """
+    Read a value from settings.QUERY_BUDGET, falling back to the defaults above.
+    """
+    return getattr(settings, 'QUERY_BUDGET', {}).get(name, DEFAULTS[name])
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+def normalize(sql):
+    sql = _IN_LIST_RE.sub('%s, ...', sql)
+    sql = _STRING_RE.sub('?', sql)
+    return _NUMBER_RE.sub('N', sql)
+
+
+def find_origin(frame):
+    """
+    {'field': 'Serializer.field', 'line': 'app/module.py:12 in func'} for the
+    code that issued a query, either key None when not found.
+    """
+    base_dir = str(settings.BASE_DIR)
+    field = line = None
+    while frame is not None and (field is None or line is None):
+        filename = frame.f_code.co_filename
+        if field is None and filename.endswith(_DRF_SERIALIZERS) and frame.f_code.co_name == 'to_representation':
+            serializer, current = frame.f_locals.get('self'), frame.f_locals.get('field')
+            if serializer is not None and current is not None:
+                field = f"{type(serializer).__name__}.{current.field_name}"
+        if (
+            line is None and filename.startswith(base_dir) and 'site-packages' not in filename
+            and os.path.abspath(filename) != _THIS_FILE
+        ):
+            line = f"{os.path.relpath(filename, base_dir)}:{frame.f_lineno} in {frame.f_code.co_name}"
+        frame = frame.f_back
+    return {'field': field, 'line': line}
+
+
+class QueryCollector:
+    """
+    Database execute wrapper counting the queries of one request, by template.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.templates = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        template = normalize(sql)
+        entry = self.templates.setdefault(template, {'count': 0, 'origin': None})
+        entry['count'] += 1
+        if entry['count'] == 2:
+            entry['origin'] = find_origin(sys._getframe(1))
+        return execute(sql, params, many, context)
+
+    def repeated(self, threshold):
+        """
+        [(template, count, origin)] of the templates run at least `threshold`
+        times, most frequent first.
+        """
+        return sorted(
+            ((template, entry['count'], entry['origin'])
+             for template, entry in self.templates.items() if entry['count'] >= threshold),
+            key=lambda item: -item[1],
+        )
+
+
+def describe(repeated):
+    lines = []
+    for template, count, origin in repeated:
+        where = ', '.join(filter(None, (origin['field'], origin['line']))) or 'unknown origin'
+        lines.append(f"  {count}x from {where}: {template[:200]}")
+    return '\n'.join(lines)
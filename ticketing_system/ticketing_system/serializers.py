@@ -0,0 +1,7 @@
+from rest_framework import serializers
+
+
+class ProfiledViewSerializer(serializers.Serializer):
+    view = serializers.CharField()
+    requests = serializers.IntegerField()
+    samples = serializers.IntegerField()
@@ -5,6 +5,17 @@ from datetime import timedelta
 
 load_dotenv()
 
+
+def env_bool(name, default=False):
+    """
+    Read a boolean from the environment: 1/true/yes/on are true, anything else false.
+    """
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -35,10 +46,19 @@ INSTALLED_APPS = [
     'tickets',
     'accounts',
     'companies',
+    'jobs',
+    'notifications',
+    'webhooks',
+    'archive',
+    'apidocs',
 ]
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "ticketing_system.middleware.QueryBudgetMiddleware",
+    "ticketing_system.middleware.ProfilingMiddleware",
+    "ticketing_system.middleware.ConcurrencyReleaseMiddleware",
+    "ticketing_system.middleware.CompressionMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -97,6 +117,11 @@ USE_TZ = True
 # Static files (CSS, JavaScript, Images)
 STATIC_URL = "static/"
 
+# Uploaded files (ticket attachments). Not served directly: downloads go
+# through the company-scoped /tickets/<id>/attachments/<id>/download/ view.
+MEDIA_ROOT = os.getenv("MEDIA_ROOT", BASE_DIR / "media")
+MEDIA_URL = "media/"
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
@@ -130,6 +155,16 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    # orjson-backed when installed, the standard library otherwise.
+    'DEFAULT_RENDERER_CLASSES': [
+        'ticketing_system.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'ticketing_system.renderers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 5,
     'DEFAULT_FILTER_BACKENDS': [
@@ -137,17 +172,105 @@ REST_FRAMEWORK = {
         'rest_framework.filters.OrderingFilter',
         'rest_framework.filters.SearchFilter',
     ],
-    # Throttling (simple example):
-    # 'DEFAULT_THROTTLE_CLASSES': [
-    #     'rest_framework.throttling.UserRateThrottle',
-    # ],
-    # 'DEFAULT_THROTTLE_RATES': {
-    #     'user': '100/hour',
-    #     'anon': '10/minute',
-    # },
+    # Token buckets per company ("tenant") and per user, with separate
+    # budgets for reads, writes and ?search= (see ticketing_system/throttling.py).
+    'DEFAULT_THROTTLE_CLASSES': [
+        'ticketing_system.throttling.TenantConcurrencyThrottle',
+        'ticketing_system.throttling.TenantRateThrottle',
+        'ticketing_system.throttling.UserRateThrottle',
+    ],
+    'DEFAULT_THROTTLE_RATES': {
+        'tenant_read': os.getenv("THROTTLE_TENANT_READ", "1200/min"),
+        'tenant_write': os.getenv("THROTTLE_TENANT_WRITE", "300/min"),
+        'tenant_search': os.getenv("THROTTLE_TENANT_SEARCH", "120/min"),
+        'tenant_time_entry_write': os.getenv("THROTTLE_TENANT_TIME_ENTRY_WRITE", "60/min"),
+        'user_read': os.getenv("THROTTLE_USER_READ", "300/min"),
+        'user_write': os.getenv("THROTTLE_USER_WRITE", "60/min"),
+        'user_search': os.getenv("THROTTLE_USER_SEARCH", "30/min"),
+        'user_time_entry_write': os.getenv("THROTTLE_USER_TIME_ENTRY_WRITE", "20/min"),
+    },
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
 }
 
+# Email
+EMAIL_BACKEND = os.getenv("EMAIL_BACKEND", "django.core.mail.backends.smtp.EmailBackend")
+EMAIL_HOST = os.getenv("EMAIL_HOST", "localhost")
+EMAIL_PORT = int(os.getenv("EMAIL_PORT", 25))
+DEFAULT_FROM_EMAIL = os.getenv("DEFAULT_FROM_EMAIL", "webmaster@localhost")
+
+# Cache. Ticket assignment, idempotency keys and throttling keep their state here, so
+# deployments running several processes need a shared backend, e.g.
+# CACHE_BACKEND=django.core.cache.backends.redis.RedisCache CACHE_LOCATION=redis://...
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv("CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        'LOCATION': os.getenv("CACHE_LOCATION", ""),
+    }
+}
+
+# Per-tenant admission control (see ticketing_system/throttling.py for defaults)
+THROTTLING = {
+    'TENANT_MAX_CONCURRENT': int(os.getenv("THROTTLE_TENANT_MAX_CONCURRENT", 8)),   # requests in flight per company; 0 disables
+    'SLOT_TIMEOUT': 300,    # seconds of tenant inactivity before leaked slots are forgotten
+    'LOCK_WAIT': 0.25,      # seconds to wait for a contended rate bucket before answering 429
+}
+
+# Ticket assignment, duplicate detection, attachments and idempotent creates
+# (see tickets/conf.py for defaults)
+TICKETS = {
+    # round_robin, least_loaded or company_affinity; empty disables automatic assignment
+    'ASSIGNMENT_STRATEGY': os.getenv("TICKET_ASSIGNMENT_STRATEGY", "least_loaded"),
+    'ROSTER_TTL': 300,          # seconds the list of assignable staff is cached
+    'LOAD_TTL': 3600,           # seconds before open-ticket counts are recounted from the database
+    'AFFINITY_MAX_LOAD': 10,    # company_affinity: open tickets before a company's operator is skipped
+    'DUPLICATE_DETECTION': True,    # look for near-duplicates when a ticket is created
+    'DUPLICATE_WINDOW_DAYS': 30,    # only tickets created this recently are compared
+    'DUPLICATE_THRESHOLD': 0.5,     # estimated text similarity (0-1) to report a candidate
+    'DUPLICATE_MAX_RESULTS': 5,
+    'ATTACHMENT_MAX_SIZE': int(os.getenv("TICKET_ATTACHMENT_MAX_SIZE", 50 * 1024 * 1024)),   # bytes per file
+    'IDEMPOTENCY_TTL': 86400,       # seconds a response is replayed for a repeated Idempotency-Key
+    'IDEMPOTENCY_LOCK_TIMEOUT': 60, # seconds before the lock of a crashed request expires
+    'IDEMPOTENCY_WAIT': 5,          # seconds a concurrent duplicate waits for the first request's result
+}
+
+# Ticket notifications (see notifications/conf.py for defaults)
+NOTIFICATIONS = {
+    'DIGEST_WINDOW': 300,   # seconds a recipient's notifications are collected before sending
+    'WEBHOOK_URLS': [url.strip() for url in os.getenv("NOTIFICATION_WEBHOOK_URLS", "").split(",") if url.strip()],
+    'MAX_ATTEMPTS': 5,
+    'BACKOFF_BASE': 60,     # seconds before the first retry of a failed delivery, doubled on every retry
+    'BACKOFF_MAX': 3600,    # seconds
+    'LOCK_TIMEOUT': 300,    # seconds before notifications claimed by a crashed dispatcher are retried
+    'HTTP_TIMEOUT': 5,      # seconds
+}
+
+# Outgoing webhooks (see webhooks/conf.py for defaults)
+WEBHOOKS = {
+    'TIMEOUT': 5,           # seconds per request
+    'BATCH_SIZE': 20,       # events per POST
+    'WORKERS': 8,           # concurrent requests per delivery run, across endpoints
+    'MAX_IN_FLIGHT': 4,     # upper bound of an endpoint's max_in_flight; keep well below WORKERS
+    'MAX_ATTEMPTS': 10,
+    'BACKOFF_BASE': 10,     # seconds, doubled on every retry
+    'BACKOFF_MAX': 3600,    # seconds
+    'LOCK_TIMEOUT': 300,    # seconds before an in-flight delivery is retried
+    'ALLOW_HTTP': env_bool("DEBUG"),    # plain http URLs; https only otherwise
+    # Deliver to private/loopback/link-local addresses (local receivers in development only)
+    'ALLOW_PRIVATE_ADDRESSES': env_bool("WEBHOOK_ALLOW_PRIVATE_ADDRESSES"),
+}
+
+# Background jobs (see jobs/conf.py for defaults)
+JOBS = {
+    'PROCESSES': int(os.getenv("JOBS_PROCESSES", 1)),
+    'THREADS': int(os.getenv("JOBS_THREADS", 4)),
+    'POLL_INTERVAL': 1.0,
+    'MAX_ATTEMPTS': 3,
+    'BACKOFF_BASE': 5,      # seconds, doubled on every retry
+    'BACKOFF_MAX': 3600,    # seconds
+    'LOCK_TIMEOUT': 600,    # seconds without a worker heartbeat before a running job is considered abandoned
+    'EAGER': False,         # run jobs inline when enqueued (tests)
+}
+
 SPECTACULAR_SETTINGS = {
     'SCHEMA_PATH_PREFIX': '/api/',
     'COMPONENT_SPLIT_REQUEST': True,
@@ -158,34 +281,128 @@ SPECTACULAR_SETTINGS = {
     'SERVE_PERMISSIONS': ['rest_framework.permissions.AllowAny'],
 }
 
+# Response compression (see ticketing_system/compression.py for defaults).
+# brotli and zstd are used when the `brotli` / `zstandard` packages are installed.
+COMPRESSION = {
+    'MIN_SIZE': int(os.getenv("COMPRESSION_MIN_SIZE", 1024)),   # bytes; smaller bodies are sent as is
+    'ENCODINGS': ['zstd', 'br', 'gzip'],    # preference order among those the client accepts
+    'GZIP_LEVEL': 6,
+    'BROTLI_QUALITY': 5,
+    'ZSTD_LEVEL': 3,
+}
+
+# Per-request query counting and N+1 detection for development and tests
+# (see ticketing_system/querybudget.py for defaults). Views declare their
+# budget with a `query_budget` attribute.
+QUERY_BUDGET = {
+    'ENABLED': env_bool("QUERY_BUDGET_ENABLED", env_bool("DEBUG")),   # on by default with DEBUG
+    'ENFORCE': env_bool("QUERY_BUDGET_ENFORCE"),    # fail requests over budget instead of logging
+    'REPEAT_THRESHOLD': 3,      # runs of one query template reported as a possible N+1
+    'DEFAULT_BUDGET': None,     # for views without a query_budget; None is unlimited
+}
+
+# Sampling profiler (see ticketing_system/profiling.py for defaults). Stacks
+# are aggregated per view class and served to staff at /profiling/.
+PROFILING = {
+    'ENABLED': env_bool("PROFILING_ENABLED"),
+    'SAMPLE_RATE': int(os.getenv("PROFILING_SAMPLE_RATE", 0)),   # profile 1 request in N; 0 only on request
+    'HEADER': 'X-Profile',      # staff requests carrying this header are always profiled
+    'INTERVAL': 0.005,          # seconds between stack samples
+}
+
+# Prebuilt OpenAPI schema served at /schema/ (see apidocs/conf.py for defaults)
+API_SCHEMA = {
+    'ARTIFACT_DIR': BASE_DIR / 'openapi',   # written by `manage.py build_schema`
+    'CODE_VERSION': os.getenv("CODE_VERSION") or None,  # e.g. the deployed commit; defaults to a source hash
+    'MAX_AGE': 3600,    # seconds clients and proxies may cache the schema
+}
+
 # Logging configuration
+# LOGGING_PROFILE=files (default) keeps the plain per-level log files;
+# LOGGING_PROFILE=structured writes JSON lines from a background thread, with
+# request ids, size-based rotation and sampled SQL debug logging.
+LOGGING_PROFILE = os.getenv("LOGGING_PROFILE", "files")
 LOGGING_CLASS = 'logging.FileHandler'
 
-LOGGING = {
-    'version': 1,
-    'disable_existing_loggers': False,
-    'handlers': {
-        'file': {
-            'level': 'ERROR',
-            'class': LOGGING_CLASS,
-            'filename': 'errors.log',
+if LOGGING_PROFILE == 'structured':
+    LOG_DIR = Path(os.getenv("LOG_DIR", "."))
+    LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", 10 * 1024 * 1024))
+    LOG_BACKUP_COUNT = int(os.getenv("LOG_BACKUP_COUNT", 5))
+    LOG_SQL_SAMPLE_RATE = float(os.getenv("LOG_SQL_SAMPLE_RATE", 0.01))
+
+    MIDDLEWARE.insert(0, "ticketing_system.middleware.RequestIdMiddleware")
+
+    LOGGING = {
+        'version': 1,
+        'disable_existing_loggers': False,
+        'filters': {
+            'request_context': {'()': 'ticketing_system.log.RequestContextFilter'},
+            'sample_sql': {'()': 'ticketing_system.log.SampleFilter', 'rate': LOG_SQL_SAMPLE_RATE},
         },
-        'file_info': {
-            'level': 'INFO',
-            'class': LOGGING_CLASS,
-            'filename': 'info.log',
+        'formatters': {
+            'json': {'()': 'ticketing_system.log.JSONFormatter'},
         },
-        'file_debug': {
-            'level': 'DEBUG',
-            'class': LOGGING_CLASS,
-            'filename': 'debug.log',
+        'handlers': {
+            'app': {
+                'level': 'DEBUG',
+                'class': 'ticketing_system.log.QueueListenerHandler',
+                'filename': LOG_DIR / 'app.log',
+                'max_bytes': LOG_MAX_BYTES,
+                'backup_count': LOG_BACKUP_COUNT,
+                'formatter': 'json',
+                'filters': ['request_context'],
+            },
+            'errors': {
+                'level': 'ERROR',
+                'class': 'ticketing_system.log.QueueListenerHandler',
+                'filename': LOG_DIR / 'errors.log',
+                'max_bytes': LOG_MAX_BYTES,
+                'backup_count': LOG_BACKUP_COUNT,
+                'formatter': 'json',
+                'filters': ['request_context'],
+            },
         },
-    },
-    'loggers': {
-        'django': {
-            'handlers': ['file', 'file_info', 'file_debug'],
-            'level': 'DEBUG',
-            'propagate': True,
+        'root': {
+            'handlers': ['app', 'errors'],
+            'level': os.getenv("LOG_LEVEL", "INFO"),
         },
-    },
-}
+        'loggers': {
+            'django': {
+                'level': os.getenv("LOG_LEVEL", "INFO"),
+            },
+            # Only emitted when DEBUG is on; keep a sample instead of every query.
+            'django.db.backends': {
+                'level': 'DEBUG' if LOG_SQL_SAMPLE_RATE > 0 else 'INFO',
+                'filters': ['sample_sql'],
+            },
+        },
+    }
+else:
+    LOGGING = {
+        'version': 1,
+        'disable_existing_loggers': False,
+        'handlers': {
+            'file': {
+                'level': 'ERROR',
+                'class': LOGGING_CLASS,
+                'filename': 'errors.log',
+            },
+            'file_info': {
+                'level': 'INFO',
+                'class': LOGGING_CLASS,
+                'filename': 'info.log',
+            },
+            'file_debug': {
+                'level': 'DEBUG',
+                'class': LOGGING_CLASS,
+                'filename': 'debug.log',
+            },
+        },
+        'loggers': {
+            'django': {
+                'handlers': ['file', 'file_info', 'file_debug'],
+                'level': 'DEBUG',
+                'propagate': True,
+            },
+        },
+    }
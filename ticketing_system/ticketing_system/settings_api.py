@@ -0,0 +1,66 @@
+"""
+Settings for API-only workers (DJANGO_SETTINGS_MODULE=ticketing_system.settings_api).
+
+Same database, apps and configuration as `settings`, minus everything a pod
+that only serves the JSON API never uses: the admin, sessions, messages,
+static files, djoser, the browsable API and OpenAPI schema generation.
+Requests authenticate with JWT only, unless API_AUTHENTICATION_CLASSES
+lists other DRF authentication classes.
+
+Run migrations, collectstatic and the auth/admin/schema routes from the
+full `settings` profile.
+
+The point is a smaller surface (no session/CSRF/admin code paths), not a
+faster start: bench_startup measures about 100 fewer modules, a few
+percent off the cold start and no meaningful difference in memory, since
+DRF, simplejwt and the apps themselves make up most of the imports.
+"""
+import os
+
+from .settings import *  # noqa: F401,F403
+from .settings import INSTALLED_APPS, MIDDLEWARE, REST_FRAMEWORK, TEMPLATES
+
+EXCLUDED_APPS = (
+    'django.contrib.admin',
+    'django.contrib.sessions',
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
+    'djoser',
+    'rest_framework.authtoken',
+    'drf_spectacular',
+    'apidocs',
+)
+INSTALLED_APPS = [app for app in INSTALLED_APPS if app not in EXCLUDED_APPS]
+
+EXCLUDED_MIDDLEWARE = (
+    "django.contrib.sessions.middleware.SessionMiddleware",
+    "django.middleware.csrf.CsrfViewMiddleware",
+    "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "django.contrib.messages.middleware.MessageMiddleware",
+    "django.middleware.clickjacking.XFrameOptionsMiddleware",
+)
+MIDDLEWARE = [middleware for middleware in MIDDLEWARE if middleware not in EXCLUDED_MIDDLEWARE]
+
+ROOT_URLCONF = "ticketing_system.urls_api"
+
+TEMPLATES = [
+    dict(template, OPTIONS=dict(template["OPTIONS"], context_processors=[
+        processor for processor in template["OPTIONS"]["context_processors"]
+        if processor != "django.contrib.messages.context_processors.messages"
+    ]))
+    for template in TEMPLATES
+]
+
+REST_FRAMEWORK = dict(
+    REST_FRAMEWORK,
+    DEFAULT_AUTHENTICATION_CLASSES=[
+        cls.strip() for cls in os.getenv(
+            "API_AUTHENTICATION_CLASSES",
+            "rest_framework_simplejwt.authentication.JWTAuthentication",
+        ).split(",") if cls.strip()
+    ],
+    DEFAULT_RENDERER_CLASSES=['ticketing_system.renderers.FastJSONRenderer'],
+    # @extend_schema subclasses the default schema class at import time;
+    # DRF's own class avoids importing drf_spectacular's generator.
+    DEFAULT_SCHEMA_CLASS='rest_framework.schemas.openapi.AutoSchema',
+)
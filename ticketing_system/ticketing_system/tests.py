@@ -0,0 +1,225 @@
+import datetime
+import decimal
+import gzip
+import io
+import uuid
+from django.conf import settings
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+from accounts.models import User
+from companies.models import Company
+from tickets.models import Comment, Ticket, TimeSpent
+from webhooks.models import WebhookEndpoint
+from .compression import negotiate, parse_accept_encoding
+from .querybudget import QueryBudgetExceeded, normalize
+from .renderers import FastJSONParser, FastJSONRenderer
+from .throttling import release_slot
+
+
+def throttle_rates(**rates):
+    return {**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': rates}
+
+
+class CompanyAPITestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.company = Company.objects.create(name="Acme", initials="AC")
+        self.staff = User.objects.create_user(
+            email="s@example.com", username="s", password="pw", first_name="S", last_name="Taff",
+            is_staff=True, role='staff',
+        )
+        self.user = User.objects.create_user(
+            email="u@example.com", username="u", password="pw", first_name="U", last_name="One",
+            company=self.company,
+        )
+        self.colleague = User.objects.create_user(
+            email="w@example.com", username="w", password="pw", first_name="W", last_name="Two",
+            company=self.company,
+        )
+
+
+@override_settings(THROTTLING={'TENANT_MAX_CONCURRENT': 8})
+class ThrottlingTests(CompanyAPITestCase):
+    @override_settings(REST_FRAMEWORK=throttle_rates(user_read='2/min'))
+    def test_user_over_rate_gets_429_with_retry_after(self):
+        self.client.force_authenticate(self.user)
+        for _ in range(2):
+            self.assertEqual(self.client.get('/tickets/').status_code, 200)
+
+        response = self.client.get('/tickets/')
+
+        self.assertEqual(response.status_code, 429)
+        self.assertIn(int(response['Retry-After']), range(1, 31))
+
+        # Another user of the same company has a bucket of their own.
+        self.client.force_authenticate(self.colleague)
+        self.assertEqual(self.client.get('/tickets/').status_code, 200)
+
+    @override_settings(REST_FRAMEWORK=throttle_rates(user_read='2/min'))
+    def test_reads_and_writes_have_separate_buckets(self):
+        self.client.force_authenticate(self.user)
+        for _ in range(3):
+            self.client.get('/tickets/')
+
+        response = self.client.post('/tickets/', {'title': "Printer jammed", 'description': "Help"})
+
+        self.assertEqual(response.status_code, 201)
+
+    @override_settings(REST_FRAMEWORK=throttle_rates(tenant_read='3/min'))
+    def test_tenant_rate_is_shared_by_its_users(self):
+        self.client.force_authenticate(self.user)
+        for _ in range(3):
+            self.assertEqual(self.client.get('/tickets/').status_code, 200)
+
+        self.client.force_authenticate(self.colleague)
+        self.assertEqual(self.client.get('/tickets/').status_code, 429)
+
+    @override_settings(
+        REST_FRAMEWORK=throttle_rates(), THROTTLING={'TENANT_MAX_CONCURRENT': 1, 'SLOT_TIMEOUT': 300},
+    )
+    def test_concurrency_cap(self):
+        key = f"throttle:concurrency:company-{self.company.pk}"
+        self.client.force_authenticate(self.user)
+
+        # A request of the same tenant is still in flight elsewhere.
+        cache.set(key, 1, 300)
+        response = self.client.get('/tickets/')
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '1')
+        self.assertEqual(cache.get(key), 1)
+
+        # Once it finishes the slot is free, and given back after each request.
+        release_slot(key)
+        self.assertEqual(self.client.get('/tickets/').status_code, 200)
+        self.assertEqual(cache.get(key), 0)
+
+    def test_release_slot_never_goes_below_zero(self):
+        key = 'throttle:concurrency:test'
+        cache.set(key, 0, 300)
+
+        release_slot(key)
+
+        self.assertEqual(cache.get(key), 0)
+
+
+@override_settings(REST_FRAMEWORK=throttle_rates())
+class QueryBudgetTests(CompanyAPITestCase):
+    def setUp(self):
+        super().setUp()
+        # Listed by /webhooks/ in two queries (count and page), over a budget of 1.
+        WebhookEndpoint.objects.create(company=self.company, url="https://hooks.example.com/tickets")
+        self.client.force_authenticate(self.staff)
+
+    def test_normalize(self):
+        self.assertEqual(
+            normalize("SELECT * FROM t WHERE id IN (%s, %s, %s) AND name = 'x' LIMIT 21"),
+            "SELECT * FROM t WHERE id IN (%s, ...) AND name = ? LIMIT N",
+        )
+
+    @override_settings(QUERY_BUDGET={'ENABLED': True, 'DEFAULT_BUDGET': 1})
+    def test_over_budget_is_logged(self):
+        with self.assertLogs('ticketing_system.queries', 'WARNING') as logs:
+            response = self.client.get('/webhooks/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(int(response['X-Query-Count']), 1)
+        self.assertIn("budget is 1", logs.output[-1])
+
+    @override_settings(QUERY_BUDGET={'ENABLED': True, 'ENFORCE': True, 'DEFAULT_BUDGET': 1})
+    def test_over_budget_fails_when_enforced(self):
+        with self.assertRaisesMessage(QueryBudgetExceeded, "budget is 1"):
+            self.client.get('/webhooks/')
+
+    @override_settings(QUERY_BUDGET={'ENABLED': True, 'ENFORCE': True})
+    def test_ticket_list_stays_within_budget(self):
+        for n in range(5):
+            ticket = Ticket.objects.create(
+                title=f"Ticket {n}", description="Help", created_by=self.user, company=self.company,
+                assignee=self.staff,
+            )
+            Comment.objects.create(ticket=ticket, author=self.user, message="Any news?")
+            TimeSpent.objects.create(ticket=ticket, operator=self.staff, minutes=10)
+
+        response = self.client.get('/tickets/', {'page_size': 5})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertLessEqual(int(response['X-Query-Count']), 3)
+
+    @override_settings(QUERY_BUDGET={'ENABLED': False})
+    def test_disabled_middleware_is_not_installed(self):
+        response = self.client.get('/webhooks/')
+
+        self.assertNotIn('X-Query-Count', response)
+
+
+class JSONRenderingTests(SimpleTestCase):
+    def test_renderer_matches_drf_output(self):
+        data = {
+            'id': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+            'at': datetime.datetime(2024, 1, 2, 3, 4, 5, 600000, tzinfo=datetime.timezone.utc),
+            'on': datetime.date(2024, 1, 2),
+            'amount': decimal.Decimal('1.50'),
+            'text': "caf\u00e9 \u2028",
+            'items': [1, None, True],
+        }
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_parser_reads_utf8_and_rejects_garbage(self):
+        parser = FastJSONParser()
+        self.assertEqual(parser.parse(io.BytesIO('{"title": "caf\u00e9"}'.encode())), {'title': "caf\u00e9"})
+        with self.assertRaises(ParseError):
+            parser.parse(io.BytesIO(b'{"title": '))
+
+
+class NegotiationTests(SimpleTestCase):
+    def test_parse_accept_encoding(self):
+        self.assertEqual(
+            parse_accept_encoding("gzip;q=0.5, br, identity;q=bogus"), {'gzip': 0.5, 'br': 1.0, 'identity': 0.0},
+        )
+
+    @override_settings(COMPRESSION={'ENCODINGS': ['gzip']})
+    def test_negotiate(self):
+        self.assertEqual(negotiate("gzip, deflate"), 'gzip')
+        self.assertEqual(negotiate("*"), 'gzip')
+        self.assertIsNone(negotiate("gzip;q=0"))
+        self.assertIsNone(negotiate("deflate"))
+        self.assertIsNone(negotiate(None))
+
+
+@override_settings(REST_FRAMEWORK=throttle_rates(), COMPRESSION={'MIN_SIZE': 200, 'ENCODINGS': ['gzip']})
+class CompressionMiddlewareTests(CompanyAPITestCase):
+    def setUp(self):
+        super().setUp()
+        for n in range(5):
+            Ticket.objects.create(
+                title=f"Ticket {n}", description="Help " * 20, created_by=self.user, company=self.company,
+            )
+        self.client.force_authenticate(self.staff)
+
+    def test_large_json_is_compressed(self):
+        plain = self.client.get('/tickets/')
+        response = self.client.get('/tickets/', HTTP_ACCEPT_ENCODING='gzip')
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(int(response['Content-Length']), len(response.content))
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+        self.assertNotIn('Content-Encoding', plain)
+
+    @override_settings(COMPRESSION={'MIN_SIZE': 1_000_000, 'ENCODINGS': ['gzip']})
+    def test_small_bodies_are_sent_as_is(self):
+        response = self.client.get('/tickets/', HTTP_ACCEPT_ENCODING='gzip')
+
+        self.assertNotIn('Content-Encoding', response)
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+    def test_html_is_never_compressed(self):
+        response = self.client.get('/tickets/', HTTP_ACCEPT='text/html', HTTP_ACCEPT_ENCODING='gzip')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/html'))
+        self.assertGreater(len(response.content), 200)
+        self.assertNotIn('Content-Encoding', response)
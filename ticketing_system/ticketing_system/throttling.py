@@ -0,0 +1,198 @@
+"""
+Per-tenant and per-user rate limiting, and a per-tenant concurrency cap.
+
+A tenant is the user's company; users without one (staff) and anonymous
+clients are their own tenant. Requests spend tokens from separate buckets
+for reads, writes and searches (`?search=`), at both levels:
+
+    REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'] = {
+        'tenant_read': '1200/min', 'user_read': '300/min', ...
+    }
+
+A view can give some of its requests a budget of their own, e.g.
+`throttle_budgets = {'write': 'time_entry_write'}` uses the
+'tenant_time_entry_write' and 'user_time_entry_write' rates for its writes.
+A budget without a configured rate is not limited.
+
+All state lives in the Django cache, so every worker shares it as long as
+the cache backend is shared.
+"""
+import time
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.throttling import BaseThrottle
+
+DEFAULTS = {
+    'TENANT_MAX_CONCURRENT': 8,
+    'SLOT_TIMEOUT': 300,
+    'LOCK_TIMEOUT': 1,
+    # Seconds to wait for a contended bucket before refusing the request.
+    'LOCK_WAIT': 0.25,
+}
+
+PERIODS = {'s': 1, 'sec': 1, 'm': 60, 'min': 60, 'h': 3600, 'hour': 3600, 'd': 86400, 'day': 86400}
+
+
+def throttling_setting(name):
+    """
+    Read a value from settings.THROTTLING, falling back to the defaults above.
+    """
+    return getattr(settings, 'THROTTLING', {}).get(name, DEFAULTS[name])
+
+
+def parse_rate(rate):
+    """
+    '300/min' -> (capacity, tokens refilled per second).
+    """
+    num, _, period = rate.partition('/')
+    count, seconds = int(num), PERIODS[period.strip().lower()]
+    return count, count / seconds
+
+
+def request_kind(request):
+    if request.method not in SAFE_METHODS:
+        return 'write'
+    if request.query_params.get('search'):
+        return 'search'
+    return 'read'
+
+
+def tenant_of(request, throttle):
+    user = request.user
+    if not user or not user.is_authenticated:
+        return f"anon-{throttle.get_ident(request)}"
+    return f"company-{user.company_id}" if user.company_id else f"user-{user.pk}"
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Token bucket per (level, budget, key): holds up to `capacity` tokens,
+    refilled continuously, one spent per request. Bursts up to the capacity
+    pass; sustained traffic is held to the refill rate.
+    """
+    level = None
+
+    def get_key(self, request):
+        raise NotImplementedError
+
+    def get_budget(self, request, view):
+        kind = request_kind(request)
+        return getattr(view, 'throttle_budgets', {}).get(kind, kind)
+
+    def allow_request(self, request, view):
+        self.retry_after = None
+        rates = getattr(settings, 'REST_FRAMEWORK', {}).get('DEFAULT_THROTTLE_RATES', {})
+        rate = rates.get(f"{self.level}_{self.get_budget(request, view)}")
+        if rate is None:
+            return True
+        capacity, refill = parse_rate(rate)
+        key = f"throttle:{self.level}:{self.get_budget(request, view)}:{self.get_key(request)}"
+
+        with _locked(key) as locked:
+            if not locked:
+                # Contention means a burst: refuse rather than let requests
+                # through without spending a token.
+                self.retry_after = 1
+                return False
+            now = time.time()
+            tokens, updated = cache.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * refill)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            else:
+                self.retry_after = (1 - tokens) / refill
+            cache.set(key, (tokens, now), int(capacity / refill) + 1)
+        return allowed
+
+    def wait(self):
+        return self.retry_after
+
+
+class TenantRateThrottle(TokenBucketThrottle):
+    level = 'tenant'
+
+    def get_key(self, request):
+        return tenant_of(request, self)
+
+
+class UserRateThrottle(TokenBucketThrottle):
+    level = 'user'
+
+    def get_key(self, request):
+        user = request.user
+        if user and user.is_authenticated:
+            return f"user-{user.pk}"
+        return f"anon-{self.get_ident(request)}"
+
+
+class TenantConcurrencyThrottle(BaseThrottle):
+    """
+    At most THROTTLING['TENANT_MAX_CONCURRENT'] requests of one tenant in
+    flight at once. The slot is taken with an atomic cache.incr() and given
+    back by ConcurrencyReleaseMiddleware once the response is ready. The
+    count expires SLOT_TIMEOUT seconds after the tenant's last admitted
+    request, which clears slots leaked by crashed workers.
+    """
+
+    def allow_request(self, request, view):
+        limit = throttling_setting('TENANT_MAX_CONCURRENT')
+        if not limit:
+            return True
+        django_request = request._request
+        if getattr(django_request, '_concurrency_slot', None):
+            return True
+        key = f"throttle:concurrency:{tenant_of(request, self)}"
+        cache.add(key, 0, throttling_setting('SLOT_TIMEOUT'))
+        try:
+            in_flight = cache.incr(key)
+        except ValueError:
+            # Expired between add() and incr(): count from scratch.
+            cache.add(key, 1, throttling_setting('SLOT_TIMEOUT'))
+            in_flight = 1
+        else:
+            # incr() keeps the original expiry: push it back while the tenant
+            # has requests in flight, so the count does not vanish under them.
+            cache.touch(key, throttling_setting('SLOT_TIMEOUT'))
+        if in_flight > limit:
+            release_slot(key)
+            return False
+        django_request._concurrency_slot = key
+        return True
+
+    def wait(self):
+        return 1
+
+
+def release_slot(key):
+    try:
+        in_flight = cache.decr(key)
+    except ValueError:
+        return
+    if in_flight < 0:
+        # The counter expired and restarted while this request was in
+        # flight; never let it go below zero and admit extra requests.
+        cache.incr(key, -in_flight)
+
+
+class _locked:
+    """
+    Short-lived cache lock around a read-modify-write of `key`.
+    """
+
+    def __init__(self, key):
+        self.lock_key = key + ':lock'
+        self.acquired = False
+
+    def __enter__(self):
+        deadline = time.monotonic() + throttling_setting('LOCK_WAIT')
+        while True:
+            self.acquired = cache.add(self.lock_key, True, throttling_setting('LOCK_TIMEOUT'))
+            if self.acquired or time.monotonic() > deadline:
+                return self.acquired
+            time.sleep(0.002)
+
+    def __exit__(self, *exc_info):
+        if self.acquired:
+            cache.delete(self.lock_key)
@@ -2,10 +2,11 @@ from django.contrib import admin
 from django.urls import path, include
 from drf_spectacular.utils import extend_schema_view, extend_schema
 from drf_spectacular.views import (
-    SpectacularAPIView, 
     SpectacularRedocView, 
     SpectacularSwaggerView
 )
+from apidocs.views import PrecomputedSchemaView
+from .views import ProfileListView, ProfileStacksView
 from djoser.views import UserViewSet
 
 # Extend Djoser views with schema descriptions
@@ -27,7 +28,11 @@ urlpatterns = [
     path('accounts/', include('accounts.urls')),
     path('companies/', include('companies.urls')),
     path('tickets/', include('tickets.urls')),
-    path('schema/', SpectacularAPIView.as_view(), name='schema'),
+    path('jobs/', include('jobs.urls')),
+    path('webhooks/', include('webhooks.urls')),
+    path('profiling/', ProfileListView.as_view(), name='profiling-list'),
+    path('profiling/<str:view_name>/', ProfileStacksView.as_view(), name='profiling-stacks'),
+    path('schema/', PrecomputedSchemaView.as_view(), name='schema'),
     path('schema/swagger/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
     path('schema/redoc/', SpectacularRedocView.as_view(url_name='schema'), name='redoc'),
 ]
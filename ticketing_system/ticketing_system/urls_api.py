@@ -0,0 +1,16 @@
+"""
+URLconf of the API-only profile (see settings_api): the resource endpoints,
+without admin, browsable-API login, djoser auth or schema routes.
+"""
+from django.urls import path, include
+from .views import ProfileListView, ProfileStacksView
+
+urlpatterns = [
+    path('accounts/', include('accounts.urls')),
+    path('companies/', include('companies.urls')),
+    path('tickets/', include('tickets.urls')),
+    path('jobs/', include('jobs.urls')),
+    path('webhooks/', include('webhooks.urls')),
+    path('profiling/', ProfileListView.as_view(), name='profiling-list'),
+    path('profiling/<str:view_name>/', ProfileStacksView.as_view(), name='profiling-stacks'),
+]
@@ -0,0 +1,52 @@
+from django.http import HttpResponse
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema
+from rest_framework import generics, permissions, status
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
+from .profiling import collapsed_stacks, profiled_views, reset
+from .serializers import ProfiledViewSerializer
+
+
+@extend_schema(
+    description=(
+        "Staff only. Views with profiling samples (see PROFILING in settings), with the number of profiled "
+        "requests and stack samples. DELETE clears every view's samples."
+    ),
+)
+class ProfileListView(generics.ListAPIView):
+    serializer_class = ProfiledViewSerializer
+    permission_classes = [permissions.IsAdminUser]
+    pagination_class = None
+    filter_backends = []
+
+    def get_queryset(self):
+        return profiled_views()
+
+    @extend_schema(operation_id='profiling_reset', responses={204: None})
+    def delete(self, request, *args, **kwargs):
+        reset()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+@extend_schema(
+    description=(
+        "Staff only. Sampled stacks of one view class (e.g. `tickets.views.TicketListCreateView`) in collapsed "
+        "format, one `frame;frame;... count` line per stack, ready for flamegraph.pl or speedscope. "
+        "DELETE clears the view's samples."
+    ),
+    responses={(200, 'text/plain'): OpenApiTypes.STR},
+)
+class ProfileStacksView(generics.GenericAPIView):
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request, view_name, *args, **kwargs):
+        stacks = collapsed_stacks(view_name)
+        if stacks is None:
+            raise NotFound("No profiling samples for this view.")
+        return HttpResponse(stacks, content_type='text/plain; charset=utf-8')
+
+    @extend_schema(responses={204: None})
+    def delete(self, request, view_name, *args, **kwargs):
+        reset(view_name)
+        return Response(status=status.HTTP_204_NO_CONTENT)
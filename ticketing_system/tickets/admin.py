@@ -1,35 +1,77 @@
 from django.contrib import admin
+from django.urls import reverse
+from django.utils.html import format_html
+from .admin_tools import LargeTableAdmin, LatestRowsInlineFormSet
 from .models import Ticket, TicketHistory, Comment, TimeSpent
 
 
 class CommentInline(admin.TabularInline):
+    """
+    The latest comments of the ticket; the full list is one click away
+    (see TicketAdmin.all_comments).
+    """
     model = Comment
-    extra = 1 
-    
+    formset = LatestRowsInlineFormSet
+    extra = 1
+    fields = ('message', 'author', 'created_at')
+    # New comments are authored by the admin user (see TicketAdmin.save_formset).
+    readonly_fields = ('author', 'created_at')
+    show_change_link = True
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('ticket', 'author').order_by('-created_at')
+
 
 @admin.register(Ticket)
-class TicketAdmin(admin.ModelAdmin):
+class TicketAdmin(LargeTableAdmin):
     list_display = ('id', 'unique_reference', 'title', 'company', 'status', 'priority', 'assignee')
-    search_fields = ('unique_reference', 'title')
+    list_select_related = ('company', 'assignee')
+    # Exact reference (unique index) or title prefix; no full-text scans.
+    search_fields = ('=unique_reference', '^title')
     list_filter = ('status', 'priority', 'company')
+    autocomplete_fields = ('company', 'assignee', 'created_by')
+    readonly_fields = ('version', 'all_comments')
     inlines = [CommentInline]
 
+    def save_formset(self, request, form, formset, change):
+        for instance in formset.save(commit=False):
+            if isinstance(instance, Comment) and instance.author_id is None:
+                instance.author = request.user
+            instance.save()
+        for obj in formset.deleted_objects:
+            obj.delete()
+        formset.save_m2m()
+
+    @admin.display(description="Comments")
+    def all_comments(self, obj):
+        if obj._state.adding:
+            return "-"
+        url = reverse('admin:tickets_comment_changelist') + f"?ticket__exact={obj.pk}"
+        return format_html('<a href="{}">All comments of this ticket</a>', url)
+
 
 @admin.register(TicketHistory)
-class TicketHistoryAdmin(admin.ModelAdmin):
-    list_display = ('id', 'ticket', 'previous_status', 'new_status', 'changed_at')
-    list_filter = ('changed_at', 'previous_status', 'new_status')
+class TicketHistoryAdmin(LargeTableAdmin):
+    list_display = ('id', 'ticket', 'event_type', 'previous_status', 'new_status', 'changed_at')
+    list_select_related = ('ticket',)
+    search_fields = ('=ticket__unique_reference',)
+    list_filter = ('event_type', 'changed_at')
+    raw_id_fields = ('ticket', 'user')
 
 
 @admin.register(Comment)
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(LargeTableAdmin):
     list_display = ('id', 'ticket', 'author', 'created_at', 'updated_at')
-    search_fields = ('message', 'author__email', 'author__username')
-    list_filter = ('created_at', 'author')
+    list_select_related = ('ticket', 'author')
+    search_fields = ('=ticket__unique_reference', '=author__email')
+    list_filter = ('created_at',)
+    raw_id_fields = ('ticket', 'author')
 
 
 @admin.register(TimeSpent)
-class TimeSpentAdmin(admin.ModelAdmin):
-    list_display = ('id', 'ticket', 'operator', 'minutes', 'created_at')
-    search_fields = ('operator__username', 'ticket__title')
-    list_filter = ('operator', 'ticket')
\ No newline at end of file
+class TimeSpentAdmin(LargeTableAdmin):
+    list_display = ('id', 'ticket', 'operator', 'minutes', 'spent_on', 'created_at')
+    list_select_related = ('ticket', 'operator')
+    search_fields = ('=ticket__unique_reference', '=operator__email')
+    list_filter = ('spent_on',)
+    raw_id_fields = ('ticket', 'operator')
@@ -0,0 +1,63 @@
+"""
+Admin building blocks for tables too large to count or list in full.
+"""
+from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db import connections
+from django.forms.models import BaseInlineFormSet
+from django.utils.functional import cached_property
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that never runs an unbounded COUNT(*).
+
+    Unfiltered PostgreSQL tables report the planner's row estimate. Anything
+    else is counted up to `max_exact_count` rows with a LIMITed subquery, so
+    the admin shows at most that many results' worth of pages.
+    """
+    max_exact_count = 10000
+
+    def _estimate(self, queryset):
+        connection = connections[queryset.db]
+        if connection.vendor != 'postgresql' or queryset.query.where:
+            return None
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                [queryset.model._meta.db_table],
+            )
+            row = cursor.fetchone()
+        return row[0] if row and row[0] > 0 else None
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not hasattr(queryset, 'query'):
+            return super().count
+        estimate = self._estimate(queryset)
+        if estimate is not None and estimate > self.max_exact_count:
+            return estimate
+        return queryset.order_by()[:self.max_exact_count].count()
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """
+    ModelAdmin defaults for big tables: estimated counts, no second
+    "N total" COUNT(*), and a modest page size.
+    """
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    list_per_page = 50
+
+
+class LatestRowsInlineFormSet(BaseInlineFormSet):
+    """
+    Inline formset showing only the newest `max_rows` related rows.
+    """
+    max_rows = 20
+
+    def get_queryset(self):
+        if not hasattr(self, '_queryset'):
+            self._queryset = super().get_queryset()[:self.max_rows]
+        return self._queryset
@@ -0,0 +1,207 @@
+"""
+Automatic assignment of new tickets to staff operators.
+
+Choosing an assignee never reads the ticket table: the roster of operators
+and their open-ticket counts live in the cache. Counts are seeded with one
+grouped query when the cache is cold (or after TICKETS['LOAD_TTL']) and
+then adjusted from TicketHistory rows whenever a ticket changes assignee or
+enters/leaves an unresolved status.
+"""
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count
+from .conf import tickets_setting
+from .models import Ticket, TicketHistory
+
+ROSTER_KEY = 'tickets:assignment:roster'
+LOADS_PRIMED_KEY = 'tickets:assignment:loads-primed'
+LOADS_PRIMING_KEY = 'tickets:assignment:loads-priming'
+ROUND_ROBIN_KEY = 'tickets:assignment:round-robin'
+
+# Seconds the priming lock is held at most, should its holder die mid-way.
+PRIMING_TIMEOUT = 30
+
+_strategies = {}
+
+
+class UnknownStrategy(LookupError):
+    pass
+
+
+def strategy(name):
+    """
+    Register `func(ticket, roster)` as an assignment strategy. It receives
+    the unsaved ticket and the operator ids (strings, stable order) and
+    returns one of those ids.
+    """
+    def decorator(func):
+        _strategies[name] = func
+        return func
+    return decorator
+
+
+def _load_key(user_id):
+    return f'tickets:assignment:load:{user_id}'
+
+
+def _affinity_key(company_id):
+    return f'tickets:assignment:company:{company_id}'
+
+
+def get_roster():
+    """
+    Ids of the operators tickets can be assigned to: active staff users.
+    """
+    roster = cache.get(ROSTER_KEY)
+    if roster is None:
+        User = get_user_model()
+        roster = [
+            str(pk) for pk in
+            User.objects.filter(is_active=True, is_staff=True).order_by('id').values_list('id', flat=True)
+        ]
+        cache.set(ROSTER_KEY, roster, tickets_setting('ROSTER_TTL'))
+    return roster
+
+
+def count_loads(roster):
+    """
+    {operator id: number of unresolved tickets} straight from the database,
+    one grouped query on the (assignee, ...) partial index.
+    """
+    counts = dict.fromkeys(roster, 0)
+    rows = (
+        Ticket.objects.filter(status__in=Ticket.UNRESOLVED_STATUSES, assignee__isnull=False)
+        .order_by().values('assignee').annotate(n=Count('id'))
+    )
+    counts.update((str(row['assignee']), row['n']) for row in rows)
+    return counts
+
+
+def prime_loads(roster):
+    """
+    Count the loads and, unless another process is already doing it, seed
+    the cached counters with them. The primed flag is only set once the
+    counters are in place, so nobody reads (or adjusts) a half-seeded cache;
+    callers that lose the race use their own counts meanwhile.
+    """
+    counts = count_loads(roster)
+    if cache.add(LOADS_PRIMING_KEY, True, PRIMING_TIMEOUT):
+        try:
+            cache.set_many({_load_key(user_id): n for user_id, n in counts.items()}, None)
+            cache.set(LOADS_PRIMED_KEY, True, tickets_setting('LOAD_TTL'))
+        finally:
+            cache.delete(LOADS_PRIMING_KEY)
+    return counts
+
+
+def get_loads(roster):
+    """
+    {operator id: number of unresolved tickets assigned to them}.
+    """
+    if cache.get(LOADS_PRIMED_KEY) is None:
+        return prime_loads(roster)
+    cached = cache.get_many([_load_key(user_id) for user_id in roster])
+    return {user_id: max(cached.get(_load_key(user_id), 0), 0) for user_id in roster}
+
+
+def adjust_load(user_id, delta):
+    if user_id is None or cache.get(LOADS_PRIMED_KEY) is None:
+        # The next get_loads() seeds fresh counts anyway.
+        return
+    try:
+        cache.incr(_load_key(user_id), delta)
+    except ValueError:
+        cache.add(_load_key(user_id), max(delta, 0), None)
+
+
+def reset():
+    """
+    Forget the cached roster and counts, e.g. after staff accounts change.
+    """
+    cache.delete_many([ROSTER_KEY, LOADS_PRIMED_KEY])
+
+
+@strategy('round_robin')
+def round_robin(ticket, roster):
+    if cache.add(ROUND_ROBIN_KEY, 0, None):
+        turn = 0
+    else:
+        turn = cache.incr(ROUND_ROBIN_KEY)
+    return roster[turn % len(roster)]
+
+
+@strategy('least_loaded')
+def least_loaded(ticket, roster):
+    loads = get_loads(roster)
+    return min(roster, key=lambda user_id: loads[user_id])
+
+
+@strategy('company_affinity')
+def company_affinity(ticket, roster):
+    """
+    Keep a company with the operator who last took one of its tickets, as
+    long as they have fewer than AFFINITY_MAX_LOAD open tickets; otherwise
+    fall back to the least loaded operator.
+    """
+    owner = cache.get(_affinity_key(ticket.company_id))
+    if owner in roster and get_loads(roster)[owner] < tickets_setting('AFFINITY_MAX_LOAD'):
+        return owner
+    return least_loaded(ticket, roster)
+
+
+def choose_assignee(ticket, strategy_name=None):
+    """
+    Operator id picked for `ticket` by the configured strategy, or None when
+    automatic assignment is disabled or there is nobody to assign to.
+    """
+    name = strategy_name or tickets_setting('ASSIGNMENT_STRATEGY')
+    if not name:
+        return None
+    try:
+        pick = _strategies[name]
+    except KeyError:
+        raise UnknownStrategy(f"No assignment strategy registered under '{name}'.")
+    roster = get_roster()
+    if not roster:
+        return None
+    return pick(ticket, roster)
+
+
+def record_assignment(ticket, user, strategy_name=None):
+    """
+    'assigned' history row for a ticket created with an assignee.
+    """
+    how = f" ({strategy_name})" if strategy_name else ""
+    return TicketHistory.objects.create(
+        ticket=ticket,
+        event_type='assigned',
+        message=f"Ticket assigned to {ticket.assignee}{how}",
+        changes={'assignee': [None, str(ticket.assignee_id)]},
+        user=user,
+    )
+
+
+def track_history(history):
+    """
+    Update the cached loads (and company affinity) from a history row's
+    status/assignee changes, once the transaction commits.
+    """
+    changes = history.changes or {}
+    if 'status' not in changes and 'assignee' not in changes:
+        return
+    ticket = history.ticket
+    assignee = str(ticket.assignee_id) if ticket.assignee_id else None
+    old_status, new_status = changes.get('status', [ticket.status, ticket.status])
+    old_assignee, new_assignee = changes.get('assignee', [assignee, assignee])
+    counted_before = old_assignee if old_status in Ticket.UNRESOLVED_STATUSES else None
+    counted_after = new_assignee if new_status in Ticket.UNRESOLVED_STATUSES else None
+
+    def apply():
+        if counted_before != counted_after:
+            adjust_load(counted_before, -1)
+            adjust_load(counted_after, 1)
+        if 'assignee' in changes and new_assignee is not None:
+            cache.set(_affinity_key(ticket.company_id), new_assignee, None)
+
+    transaction.on_commit(apply)
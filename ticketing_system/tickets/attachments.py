@@ -0,0 +1,182 @@
+"""
+Attachment storage: streamed uploads, content-addressed blobs and ranged
+downloads.
+
+Uploads never sit in memory: AttachmentUploadHandler writes every chunk to
+a temporary file while hashing it, and the finished file is moved (not
+copied) into the storage under its SHA-256, or dropped when a blob with
+that hash already exists. Downloads stream from disk, with ETag and
+single-range (HTTP 206) support so large files can be resumed.
+"""
+import hashlib
+import re
+from django.core.files.storage import default_storage
+from django.core.files.uploadhandler import StopUpload, TemporaryFileUploadHandler
+from django.db import transaction
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.http import content_disposition_header
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from .conf import tickets_setting
+from .models import Attachment, AttachmentBlob, blob_path
+
+CHUNK_SIZE = 64 * 1024
+_RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class PayloadTooLarge(APIException):
+    status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    default_detail = "The file is too large."
+    default_code = 'payload_too_large'
+
+
+class AttachmentUploadHandler(TemporaryFileUploadHandler):
+    """
+    Write uploaded files straight to a temporary file, hashing them on the
+    way and giving up past TICKETS['ATTACHMENT_MAX_SIZE'] bytes.
+    """
+    chunk_size = CHUNK_SIZE
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        self.max_size = tickets_setting('ATTACHMENT_MAX_SIZE')
+        self.too_large = False
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.digest = hashlib.sha256()
+        self.received = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > self.max_size:
+            self.too_large = True
+            raise StopUpload(connection_reset=False)
+        self.digest.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        uploaded = super().file_complete(file_size)
+        uploaded.sha256 = self.digest.hexdigest()
+        return uploaded
+
+
+def store_blob(uploaded):
+    """
+    The AttachmentBlob holding the content of `uploaded`, storing it first
+    unless identical content is already stored.
+    """
+    sha256 = getattr(uploaded, 'sha256', None)
+    if sha256 is None:
+        digest = hashlib.sha256()
+        for chunk in uploaded.chunks(CHUNK_SIZE):
+            digest.update(chunk)
+        sha256 = digest.hexdigest()
+
+    blob = AttachmentBlob.objects.filter(pk=sha256).first()
+    if blob is not None:
+        return blob
+    blob = AttachmentBlob(sha256=sha256, size=uploaded.size)
+    name = blob_path(blob, uploaded.name)
+    if default_storage.exists(name):
+        blob.file.name = name
+    else:
+        uploaded.seek(0)
+        blob.file.save(name, uploaded, save=False)
+    blob, _ = AttachmentBlob.objects.get_or_create(
+        sha256=sha256, defaults={'file': blob.file.name, 'size': blob.size}
+    )
+    return blob
+
+
+def release_blobs(blob_ids):
+    """
+    Delete the given blobs (rows now, files once committed) when no hot or
+    archived attachment refers to them any more.
+    """
+    from archive.models import ArchivedAttachment
+
+    in_use = set(
+        Attachment.objects.filter(blob_id__in=blob_ids).values_list('blob_id', flat=True)
+    ) | set(
+        ArchivedAttachment.objects.filter(blob_id__in=blob_ids).values_list('blob_id', flat=True)
+    )
+    orphans = list(AttachmentBlob.objects.filter(pk__in=set(blob_ids) - in_use))
+    if not orphans:
+        return 0
+    AttachmentBlob.objects.filter(pk__in=[blob.pk for blob in orphans]).delete()
+    names = [blob.file.name for blob in orphans]
+    transaction.on_commit(lambda: [default_storage.delete(name) for name in names])
+    return len(orphans)
+
+
+def parse_range(header, size):
+    """
+    (start, end) byte positions, inclusive, of a single-range Range header,
+    or None to send the whole file. Raises ValueError when the range
+    cannot be satisfied.
+    """
+    match = _RANGE_RE.match(header.strip()) if header else None
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if first == '':
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    if start > end or start >= size:
+        raise ValueError(header)
+    return start, end
+
+
+def _read_range(file, start, length):
+    with file:
+        file.seek(start)
+        while length > 0:
+            data = file.read(min(CHUNK_SIZE, length))
+            if not data:
+                break
+            length -= len(data)
+            yield data
+
+
+def serve_blob(request, blob, filename, content_type):
+    """
+    Stream `blob` as a download named `filename`, honouring If-None-Match,
+    Range and If-Range. The SHA-256 doubles as a strong ETag.
+    """
+    etag = f'"{blob.sha256}"'
+    if request.headers.get('If-None-Match') == etag:
+        response = HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+        response['ETag'] = etag
+        return response
+
+    byte_range = None
+    if_range = request.headers.get('If-Range')
+    if if_range is None or if_range == etag:
+        try:
+            byte_range = parse_range(request.headers.get('Range'), blob.size)
+        except ValueError:
+            response = HttpResponse(status=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+            response['Content-Range'] = f"bytes */{blob.size}"
+            return response
+
+    if byte_range is None:
+        response = FileResponse(
+            blob.file.open('rb'), as_attachment=True, filename=filename, content_type=content_type
+        )
+    else:
+        start, end = byte_range
+        response = StreamingHttpResponse(
+            _read_range(blob.file.open('rb'), start, end - start + 1),
+            status=status.HTTP_206_PARTIAL_CONTENT,
+            content_type=content_type,
+        )
+        response['Content-Length'] = str(end - start + 1)
+        response['Content-Range'] = f"bytes {start}-{end}/{blob.size}"
+        response['Content-Disposition'] = content_disposition_header(True, filename)
+    response['ETag'] = etag
+    response['Accept-Ranges'] = 'bytes'
+    response['Cache-Control'] = 'private, max-age=3600'
+    return response
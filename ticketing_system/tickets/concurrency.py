@@ -0,0 +1,41 @@
+from django.db.models import F
+
+
+class VersionConflict(Exception):
+    """
+    Raised when a conditional update finds the row at another version.
+    """
+
+
+def save_with_version(instance, expected_version, fields=None):
+    """
+    Write `instance` with a single conditional UPDATE:
+
+        UPDATE ... SET <fields>, version = version + 1
+        WHERE id = <pk> AND version = <expected_version>
+
+    Nothing is locked and nothing is read: if another request bumped the
+    version first, no row matches and VersionConflict is raised.
+    `fields` limits the written columns (all of them by default);
+    auto_now columns such as updated_at are always refreshed.
+    """
+    model = type(instance)
+    if hasattr(instance, 'sync_derived_fields'):
+        # Denormalized columns (e.g. Ticket.priority_rank) follow their source.
+        fields = instance.sync_derived_fields(fields)
+    values = {}
+    for field in model._meta.concrete_fields:
+        if field.primary_key or field.name == 'version':
+            continue
+        if fields is not None and field.name not in fields and not getattr(field, 'auto_now', False):
+            continue
+        values[field.attname] = field.pre_save(instance, add=False)
+
+    updated = model._default_manager.filter(pk=instance.pk, version=expected_version).update(
+        version=F('version') + 1,
+        **values
+    )
+    if not updated:
+        raise VersionConflict(f"{model.__name__} {instance.pk} is no longer at version {expected_version}.")
+    instance.version = expected_version + 1
+    return instance
@@ -0,0 +1,23 @@
+from django.conf import settings
+
+DEFAULTS = {
+    'ASSIGNMENT_STRATEGY': None,
+    'ROSTER_TTL': 300,
+    'LOAD_TTL': 3600,
+    'AFFINITY_MAX_LOAD': 10,
+    'DUPLICATE_DETECTION': True,
+    'DUPLICATE_WINDOW_DAYS': 30,
+    'DUPLICATE_THRESHOLD': 0.5,
+    'DUPLICATE_MAX_RESULTS': 5,
+    'ATTACHMENT_MAX_SIZE': 50 * 1024 * 1024,
+    'IDEMPOTENCY_TTL': 86400,
+    'IDEMPOTENCY_LOCK_TIMEOUT': 60,
+    'IDEMPOTENCY_WAIT': 5,
+}
+
+
+def tickets_setting(name):
+    """
+    Read a value from settings.TICKETS, falling back to the defaults above.
+    """
+    return getattr(settings, 'TICKETS', {}).get(name, DEFAULTS[name])
@@ -0,0 +1,184 @@
+"""
+Near-duplicate ticket detection with MinHash and locality-sensitive hashing.
+
+Every ticket gets a MinHash signature of the character shingles of its
+title and description (TicketSignature), split into LSH bands stored as
+indexed keys (TicketSignatureBand). Finding duplicates is then an index
+lookup on the new ticket's band keys within its company, followed by a
+similarity estimate on the few tickets sharing a band -- never a pairwise
+text comparison against the whole table.
+
+With 16 bands of 4 rows, two tickets 50% similar share at least one band
+about two times in three; tickets 80% similar practically always do.
+"""
+import hashlib
+import random
+import re
+from datetime import timedelta
+from django.db import transaction
+from django.db.models import Count, F
+from django.utils import timezone
+from .conf import tickets_setting
+from .models import Attachment, Comment, Ticket, TicketHistory, TicketSignature, TicketSignatureBand, TimeSpent
+
+# Changing any of these invalidates the stored signatures; rebuild them with
+# `manage.py index_ticket_signatures --all`.
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 4
+# Signing costs about 25 ms of CPU per 1,000 characters; the opening of a
+# ticket is what near-duplicates share anyway.
+MAX_TEXT_LENGTH = 2000
+# Tickets sharing a band with the new one, checked at most.
+MAX_CANDIDATE_SCAN = 200
+
+_PRIME = (1 << 61) - 1
+_rng = random.Random(20240917)
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+
+
+def _hash(value, signed=False):
+    digest = hashlib.blake2b(value.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'big', signed=signed)
+
+
+def shingles(text):
+    """
+    Set of overlapping SHINGLE_SIZE-character pieces of the normalized text.
+    """
+    text = ' '.join(re.findall(r'\w+', text.lower()))[:MAX_TEXT_LENGTH]
+    if len(text) <= SHINGLE_SIZE:
+        return {text} if text else set()
+    return {text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+
+
+def minhash(title, description):
+    """
+    NUM_PERM-value MinHash signature of a ticket's text, or None when it
+    has no words at all.
+    """
+    hashes = [_hash(shingle) % _PRIME for shingle in shingles(f"{title} {description}")]
+    if not hashes:
+        return None
+    return [min((a * h + b) % _PRIME for h in hashes) for a, b in _PERMUTATIONS]
+
+
+def band_keys(signature):
+    """
+    One 64-bit key per band, so a lookup is an equality match on an index.
+    """
+    return [
+        _hash(f"{band}:" + ','.join(map(str, signature[band * ROWS:(band + 1) * ROWS])), signed=True)
+        for band in range(BANDS)
+    ]
+
+
+def similarity(a, b):
+    """
+    Estimated Jaccard similarity of the texts behind two signatures.
+    """
+    return sum(x == y for x, y in zip(a, b)) / NUM_PERM
+
+
+def index_ticket(ticket, created=False):
+    """
+    Store (or refresh) the signature and band keys of `ticket`. Returns the
+    signature. `created` skips clearing old rows for a brand-new ticket.
+    """
+    return store_signature(ticket, minhash(ticket.title, ticket.description), created)
+
+
+def store_signature(ticket, signature, created=False):
+    """
+    Write an already computed signature of `ticket` and its band keys, so
+    callers can do the hashing before opening a transaction.
+    """
+    if not created:
+        TicketSignatureBand.objects.filter(ticket=ticket).delete()
+        TicketSignature.objects.filter(ticket=ticket).delete()
+    if signature is None:
+        return None
+    TicketSignature.objects.create(ticket=ticket, minhash=signature)
+    TicketSignatureBand.objects.bulk_create([
+        TicketSignatureBand(ticket=ticket, company_id=ticket.company_id, key=key)
+        for key in band_keys(signature)
+    ])
+    return signature
+
+
+def find_duplicates(ticket, signature=None):
+    """
+    Recent unresolved tickets of the same company that look like `ticket`,
+    most similar first, each with a `similarity` attribute.
+    """
+    if signature is None:
+        signature = minhash(ticket.title, ticket.description)
+    if signature is None:
+        return []
+
+    since = timezone.now() - timedelta(days=tickets_setting('DUPLICATE_WINDOW_DAYS'))
+    candidate_ids = (
+        TicketSignatureBand.objects
+        .filter(
+            company_id=ticket.company_id,
+            key__in=band_keys(signature),
+            ticket__status__in=Ticket.UNRESOLVED_STATUSES,
+            ticket__created_at__gte=since,
+        )
+        .exclude(ticket_id=ticket.pk)
+        .values('ticket_id').annotate(hits=Count('id')).order_by('-hits')
+        .values_list('ticket_id', flat=True)[:MAX_CANDIDATE_SCAN]
+    )
+    threshold = tickets_setting('DUPLICATE_THRESHOLD')
+    duplicates = []
+    for stored in TicketSignature.objects.filter(ticket_id__in=list(candidate_ids)).select_related('ticket'):
+        score = similarity(signature, stored.minhash)
+        if score >= threshold:
+            stored.ticket.similarity = round(score, 2)
+            duplicates.append(stored.ticket)
+    duplicates.sort(key=lambda candidate: (-candidate.similarity, candidate.created_at))
+    return duplicates[:tickets_setting('DUPLICATE_MAX_RESULTS')]
+
+
+
+
+@transaction.atomic
+def merge_tickets(source, target, user):
+    """
+    Fold `source` into `target`: its comments, time entries and attachments
+    move to `target`, and `source` is closed as a duplicate. History stays
+    with `source`, so each ticket keeps its own created/status/assignment
+    timeline; `target` gets one 'merged' event. An already closed `source`
+    is left as it is. Returns how many rows of each kind were moved.
+    """
+    moved = {
+        'comments': Comment.objects.filter(ticket=source).update(ticket=target),
+        'time_entries': TimeSpent.objects.filter(ticket=source).update(ticket=target),
+        'attachments': Attachment.objects.filter(ticket=source).update(ticket=target),
+    }
+    TicketSignatureBand.objects.filter(ticket=source).delete()
+
+    previous_status = source.status
+    if previous_status != 'closed':
+        Ticket.objects.filter(pk=source.pk).update(
+            status='closed', version=F('version') + 1, updated_at=timezone.now()
+        )
+        source.status = 'closed'
+        source.version += 1
+        TicketHistory.objects.create(
+            ticket=source,
+            event_type='closed',
+            previous_status=previous_status,
+            new_status='closed',
+            message=f"Closed as a duplicate of {target.unique_reference}",
+            changes={'status': [previous_status, 'closed']},
+            user=user,
+        )
+    TicketHistory.objects.create(
+        ticket=target,
+        event_type='merged',
+        message=f"Merged {source.unique_reference} into this ticket",
+        user=user,
+    )
+    return moved
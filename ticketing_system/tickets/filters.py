@@ -1,5 +1,6 @@
 # tickets/filters.py
 import django_filters
+from rest_framework.filters import OrderingFilter
 from .models import Ticket
 
 
@@ -19,3 +20,18 @@ class TicketFilter(django_filters.FilterSet):
             'status': ['exact'],
             'type': ['exact'],
         }
+
+
+class TicketOrderingFilter(OrderingFilter):
+    """
+    ?ordering=priority sorts by severity (low, medium, high) through the
+    stored priority_rank rather than alphabetically; -priority is most
+    urgent first.
+    """
+    aliases = {'priority': '-priority_rank', '-priority': 'priority_rank'}
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        if not ordering:
+            return ordering
+        return [self.aliases.get(term, term) for term in ordering]
@@ -0,0 +1,81 @@
+from .models import TicketHistory
+
+# Fields whose old/new values are stored in TicketHistory.changes.
+TRACKED_FIELDS = ('status', 'priority', 'type', 'title', 'assignee')
+
+
+def _value(instance, name):
+    field = instance._meta.get_field(name)
+    value = getattr(instance, field.attname)
+    # Foreign keys are stored by id, as strings to stay JSON-serializable.
+    return str(value) if field.is_relation and value is not None else value
+
+
+def snapshot(instance):
+    """
+    Capture the tracked fields (and the description, for change detection)
+    from an instance that is already in memory, before it gets saved.
+    """
+    values = {name: _value(instance, name) for name in TRACKED_FIELDS}
+    values['description'] = instance.description
+    return values
+
+
+def diff(before, instance):
+    """
+    Compact {field: [old, new]} diff of the tracked fields.
+    """
+    return {
+        name: [before[name], _value(instance, name)]
+        for name in TRACKED_FIELDS
+        if before[name] != _value(instance, name)
+    }
+
+
+def record_update(ticket, before, user):
+    """
+    Write the history row for an update of `ticket`, given the snapshot taken
+    before saving. Status transitions keep their dedicated event types, a
+    change of assignee alone is an 'assigned' event and anything else is an
+    'updated' event. Returns None when nothing changed.
+    """
+    changes = diff(before, ticket)
+    description_changed = before['description'] != ticket.description
+    if not changes and not description_changed:
+        return None
+
+    if 'status' in changes:
+        old_status, new_status = changes['status']
+        if new_status == 'closed':
+            event_type, message = 'closed', "Ticket closed"
+        elif new_status == 'resolved':
+            event_type, message = 'resolved', "Ticket resolved"
+        else:
+            event_type, message = 'status_change', "Status changed"
+        return TicketHistory.objects.create(
+            ticket=ticket,
+            event_type=event_type,
+            previous_status=old_status,
+            new_status=new_status,
+            message=message,
+            changes=changes,
+            user=user
+        )
+
+    if set(changes) == {'assignee'} and not description_changed:
+        return TicketHistory.objects.create(
+            ticket=ticket,
+            event_type="assigned",
+            message="Ticket assigned" if ticket.assignee_id else "Ticket unassigned",
+            changes=changes,
+            user=user
+        )
+
+    changed = list(changes) + (['description'] if description_changed else [])
+    return TicketHistory.objects.create(
+        ticket=ticket,
+        event_type="updated",
+        message=f"Ticket updated: {', '.join(changed)}",
+        changes=changes,
+        user=user
+    )
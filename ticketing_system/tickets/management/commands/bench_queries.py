@@ -0,0 +1,94 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+from rest_framework.test import APIClient
+from accounts.models import User
+from companies.models import Company
+from tickets.models import Ticket, Comment, TicketHistory, TimeSpent
+
+
+class Command(BaseCommand):
+    help = (
+        "Count the SQL queries issued by the ticket endpoints, as a customer and as staff. "
+        "Runs against a throwaway test database seeded with one ticket and --rows children per kind."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=50,
+                            help="Comments, history events and time entries created on the benchmark ticket.")
+        parser.add_argument('--keepdb', action='store_true',
+                            help="Reuse the test database between runs.")
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, keepdb=options['keepdb'])
+        try:
+            results = self.run_benchmark(options['rows'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=options['keepdb'])
+            teardown_test_environment()
+
+        width = max(len(name) for name, _, _ in results)
+        self.stdout.write(f"{'endpoint'.ljust(width)}  status  queries")
+        for name, status_code, queries in results:
+            self.stdout.write(f"{name.ljust(width)}  {status_code:>6}  {queries:>7}")
+        self.stdout.write(self.style.SUCCESS(f"Total: {sum(queries for _, _, queries in results)} queries."))
+
+    def seed(self, rows):
+        company = Company.objects.create(name="Bench", initials="BEN")
+        staff = User.objects.create_user(
+            email='bench-staff@example.com', username='bench-staff', password='bench',
+            first_name='Bench', last_name='Staff', is_staff=True, role='staff',
+        )
+        customer = User.objects.create_user(
+            email='bench-customer@example.com', username='bench-customer', password='bench',
+            first_name='Bench', last_name='Customer', company=company,
+        )
+        ticket = Ticket.objects.create(
+            title="Benchmark ticket", description="Seeded by bench_queries.",
+            created_by=customer, company=company,
+        )
+        Comment.objects.bulk_create(
+            Comment(ticket=ticket, author=customer if i % 2 else staff, message=f"Comment {i}") for i in range(rows)
+        )
+        TicketHistory.objects.bulk_create(
+            TicketHistory(ticket=ticket, event_type='updated', message=f"Edit {i}", user=customer) for i in range(rows)
+        )
+        TimeSpent.objects.bulk_create(
+            TimeSpent(ticket=ticket, operator=staff, minutes=15) for _ in range(rows)
+        )
+        return staff, customer, ticket
+
+    def run_benchmark(self, rows):
+        staff, customer, ticket = self.seed(rows)
+        comment = Comment.objects.filter(ticket=ticket).first()
+        history = TicketHistory.objects.filter(ticket=ticket).first()
+        entry = TimeSpent.objects.filter(ticket=ticket).first()
+        base = f'/tickets/{ticket.id}'
+
+        scenarios = [
+            ('ticket list', customer, 'get', '/tickets/', None),
+            ('ticket detail', customer, 'get', f'{base}/', None),
+            ('ticket detail ?include=all', customer, 'get', f'{base}/?include=comments,history,time_entries', None),
+            ('ticket update', customer, 'patch', f'{base}/', {'title': "Benchmark ticket (edited)"}),
+            ('history list', customer, 'get', f'{base}/history/', None),
+            ('history detail', customer, 'get', f'{base}/history/{history.id}/', None),
+            ('comment list', customer, 'get', f'{base}/comments/', None),
+            ('comment create', customer, 'post', f'{base}/comments/', {'message': "Benchmark comment"}),
+            ('comment detail', customer, 'get', f'{base}/comments/{comment.id}/', None),
+            ('latest comments', customer, 'get', f'/tickets/comments/latest/?tickets={ticket.id}', None),
+            ('time entry list', staff, 'get', f'{base}/time-entries/', None),
+            ('time entry create', staff, 'post', f'{base}/time-entries/', {'minutes': 30}),
+            ('time entry detail', staff, 'get', f'{base}/time-entries/{entry.id}/', None),
+        ]
+
+        results = []
+        for name, user, method, url, data in scenarios:
+            client = APIClient()
+            # A fresh user instance per request, as token authentication
+            # would load, so lazily loaded relations are counted.
+            client.force_authenticate(User.objects.get(pk=user.pk))
+            with CaptureQueriesContext(connection) as captured:
+                response = getattr(client, method)(url, data, format='json')
+            results.append((name, response.status_code, len(captured)))
+        return results
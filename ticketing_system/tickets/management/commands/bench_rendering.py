@@ -0,0 +1,103 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from ticketing_system.compression import available_encodings, compress, compression_setting
+from ticketing_system.renderers import FastJSONRenderer, orjson
+from tickets.models import Ticket
+from .bench_queries import Command as QueryBenchmark
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure JSON rendering CPU time and bytes on the wire for the ticket list, comment list and "
+        "history endpoints, with DRF's JSONRenderer and FastJSONRenderer, uncompressed and with every "
+        "available encoding. Runs against a throwaway test database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=200,
+                            help="Tickets, comments and history events to seed.")
+        parser.add_argument('--repeat', type=int, default=20,
+                            help="Times every page is rendered per renderer.")
+        parser.add_argument('--keepdb', action='store_true',
+                            help="Reuse the test database between runs.")
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, keepdb=options['keepdb'])
+        try:
+            pages = self.collect_pages(options['rows'])
+            results = [
+                (name, self.measure(data, options['repeat'])) for name, data in pages.items()
+            ]
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=options['keepdb'])
+            teardown_test_environment()
+
+        encodings = available_encodings()
+        self.stdout.write(
+            f"Renderer: {'orjson' if orjson else 'standard library (orjson not installed)'}; "
+            f"encodings: {', '.join(encodings)}; pages under {compression_setting('MIN_SIZE')} bytes sent as is."
+        )
+        header = f"{'endpoint':<14} {'pages':>5} {'std ms':>8} {'fast ms':>8} {'bytes':>9}"
+        header += ''.join(f" {encoding:>9}" for encoding in encodings)
+        self.stdout.write(header)
+        for name, result in results:
+            line = (
+                f"{name:<14} {result['pages']:>5} {result['std_ms']:>8.2f} {result['fast_ms']:>8.2f} "
+                f"{result['bytes']:>9}"
+            )
+            line += ''.join(f" {result[encoding]:>9}" for encoding in encodings)
+            self.stdout.write(line)
+        self.stdout.write("Times are CPU milliseconds to render every page once; sizes are totals over all pages.")
+
+    def collect_pages(self, rows):
+        """
+        Seed the database and fetch every page of each endpoint, keeping the
+        response data (before rendering).
+        """
+        staff, customer, ticket = QueryBenchmark().seed(rows)
+        description = "Seeded by bench_rendering. " * 20
+        Ticket.objects.bulk_create(
+            Ticket(
+                title=f"Benchmark ticket {i}", description=description, created_by=customer,
+                company=ticket.company, unique_reference=f"BEN-{i + 2:04d}",
+            )
+            for i in range(rows)
+        )
+        client = APIClient()
+        client.force_authenticate(customer)
+        endpoints = {
+            'ticket list': '/tickets/',
+            'comment list': f'/tickets/{ticket.id}/comments/',
+            'history list': f'/tickets/{ticket.id}/history/',
+        }
+        pages = {}
+        for name, url in endpoints.items():
+            pages[name] = []
+            page = 1
+            while True:
+                response = client.get(url, {'page': page})
+                pages[name].append(response.data)
+                if not response.data.get('next'):
+                    break
+                page += 1
+        return pages
+
+    def measure(self, pages, repeat):
+        result = {'pages': len(pages)}
+        for key, renderer in (('std_ms', JSONRenderer()), ('fast_ms', FastJSONRenderer())):
+            start = time.process_time()
+            for _ in range(repeat):
+                bodies = [renderer.render(data, 'application/json') for data in pages]
+            result[key] = (time.process_time() - start) * 1000 / repeat
+        result['bytes'] = sum(len(body) for body in bodies)
+        min_size = compression_setting('MIN_SIZE')
+        for encoding in available_encodings():
+            result[encoding] = sum(
+                len(compress(encoding, body)) if len(body) >= min_size else len(body) for body in bodies
+            )
+        return result
@@ -0,0 +1,94 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+# Runs in a fresh interpreter per sample: builds the WSGI application, serves
+# one authenticated request through it and reports timings and memory.
+PROBE = """
+import json, os, resource, sys, time
+from wsgiref.util import setup_testing_defaults
+started = time.perf_counter()
+from django.core.wsgi import get_wsgi_application
+application = get_wsgi_application()
+ready = time.perf_counter()
+environ = {
+    'PATH_INFO': sys.argv[1],
+    'HTTP_HOST': sys.argv[2],
+    'HTTP_AUTHORIZATION': f"Bearer {os.environ['BENCH_STARTUP_TOKEN']}",
+}
+setup_testing_defaults(environ)
+status = []
+b''.join(application(environ, lambda code, headers, exc_info=None: status.append(code)))
+served = time.perf_counter()
+print(json.dumps({
+    'setup_ms': (ready - started) * 1000,
+    'first_request_ms': (served - ready) * 1000,
+    'rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    'modules': len(sys.modules),
+    'status': status[0],
+}))
+"""
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare cold-start time and memory of settings profiles: each sample is a fresh "
+        "interpreter that builds the WSGI app and serves one request, authenticated with a "
+        "JWT for --user. Any non-2xx response aborts the run, so errors are never timed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--profiles', nargs='+',
+                            default=['ticketing_system.settings', 'ticketing_system.settings_api'],
+                            help="Settings modules to compare.")
+        parser.add_argument('--runs', type=int, default=5,
+                            help="Samples per profile; medians are reported.")
+        parser.add_argument('--path', default='/tickets/',
+                            help="Path of the request served after startup.")
+        parser.add_argument('--user', default=None,
+                            help="Email of the user the request is made as (defaults to the first active staff user).")
+
+    def handle(self, *args, **options):
+        token = self.access_token(options['user'])
+        host = next((host for host in settings.ALLOWED_HOSTS if host[0] not in '.*'), 'localhost')
+        self.stdout.write(
+            f"{'profile':<32} {'wall ms':>8} {'setup ms':>9} {'1st req ms':>11} {'RSS MB':>7} {'modules':>8}"
+        )
+        for profile in options['profiles']:
+            samples = [self.sample(profile, options['path'], host, token) for _ in range(options['runs'])]
+            median = {key: statistics.median(sample[key] for sample in samples)
+                      for key in ('wall_ms', 'setup_ms', 'first_request_ms', 'rss_mb', 'modules')}
+            self.stdout.write(
+                f"{profile:<32} {median['wall_ms']:>8.0f} {median['setup_ms']:>9.0f} "
+                f"{median['first_request_ms']:>11.0f} {median['rss_mb']:>7.1f} {median['modules']:>8.0f}"
+            )
+
+    def access_token(self, email):
+        from rest_framework_simplejwt.tokens import AccessToken
+
+        users = get_user_model().objects.filter(is_active=True)
+        user = users.filter(email=email).first() if email else users.filter(is_staff=True).order_by('pk').first()
+        if user is None:
+            raise CommandError(f"No active user {email}." if email else "No active staff user; pass --user.")
+        return str(AccessToken.for_user(user))
+
+    def sample(self, profile, path, host, token):
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=profile, BENCH_STARTUP_TOKEN=token)
+        started = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, '-c', PROBE, path, host],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+        )
+        wall_ms = (time.perf_counter() - started) * 1000
+        if result.returncode != 0:
+            raise CommandError(f"{profile} failed to start:\n{result.stderr}")
+        sample = dict(json.loads(result.stdout.strip().splitlines()[-1]), wall_ms=wall_ms)
+        if not sample['status'].startswith('2'):
+            raise CommandError(f"{profile} answered {path} with {sample['status']}; not timing an error path.")
+        return sample
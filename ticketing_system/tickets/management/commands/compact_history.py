@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+from tickets.retention import apply_retention
+
+
+class Command(BaseCommand):
+    help = (
+        "Apply TicketHistory retention: collapse runs of generic 'updated' events "
+        "and optionally drop old 'comment' events. Status transitions are kept."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--comment-days', type=int, default=None,
+                            help="Drop 'comment' history events older than this many days (comments are kept).")
+        parser.add_argument('--no-collapse', action='store_true',
+                            help="Do not collapse consecutive 'updated' events.")
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help="Tickets (or rows, for comment events) handled per batch.")
+        parser.add_argument('--pause', type=float, default=0.0,
+                            help="Seconds to sleep between batches.")
+        parser.add_argument('--dry-run', action='store_true',
+                            help="Report what would be reclaimed without deleting anything.")
+
+    def handle(self, *args, **options):
+        report = apply_retention(
+            comment_days=options['comment_days'],
+            collapse=not options['no_collapse'],
+            batch_size=options['batch_size'],
+            pause=options['pause'],
+            dry_run=options['dry_run'],
+        )
+        prefix = "Would reclaim" if options['dry_run'] else "Reclaimed"
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix} {report['rows']} row(s), ~{report['bytes']} bytes "
+            f"({report['collapsed_updates']} collapsed update(s), "
+            f"{report['dropped_comment_events']} comment event(s))."
+        ))
@@ -0,0 +1,44 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from tickets.conf import tickets_setting
+from tickets.duplicates import index_ticket
+from tickets.models import Ticket
+
+
+class Command(BaseCommand):
+    help = (
+        "Compute the duplicate-detection signatures of tickets that have none yet: unresolved "
+        "tickets inside TICKETS['DUPLICATE_WINDOW_DAYS'] by default."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true',
+                            help="Recompute every ticket's signature, whatever its age or status.")
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help="Tickets indexed per transaction.")
+
+    def handle(self, *args, **options):
+        tickets = Ticket.objects.only('id', 'company_id', 'title', 'description').order_by('created_at')
+        if not options['all']:
+            since = timezone.now() - timedelta(days=tickets_setting('DUPLICATE_WINDOW_DAYS'))
+            tickets = tickets.filter(
+                status__in=Ticket.UNRESOLVED_STATUSES, created_at__gte=since, signature__isnull=True
+            )
+
+        indexed = 0
+        batch = []
+        for ticket in tickets.iterator(chunk_size=options['batch_size']):
+            batch.append(ticket)
+            if len(batch) >= options['batch_size']:
+                indexed += self.index(batch)
+                batch = []
+        indexed += self.index(batch)
+        self.stdout.write(self.style.SUCCESS(f"Indexed {indexed} ticket(s)."))
+
+    @transaction.atomic
+    def index(self, tickets):
+        for ticket in tickets:
+            index_ticket(ticket)
+        return len(tickets)
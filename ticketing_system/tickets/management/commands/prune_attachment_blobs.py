@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from tickets.attachments import release_blobs
+from tickets.models import AttachmentBlob
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete stored attachment files that no ticket or archived ticket refers to any more, "
+        "e.g. after tickets were deleted."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help="Blobs checked per transaction.")
+
+    def handle(self, *args, **options):
+        released = 0
+        last = ''
+        while True:
+            batch = list(
+                AttachmentBlob.objects.filter(pk__gt=last).order_by('pk')
+                .values_list('pk', flat=True)[:options['batch_size']]
+            )
+            if not batch:
+                break
+            with transaction.atomic():
+                released += release_blobs(batch)
+            last = batch[-1]
+        self.stdout.write(self.style.SUCCESS(f"Deleted {released} unreferenced blob(s)."))
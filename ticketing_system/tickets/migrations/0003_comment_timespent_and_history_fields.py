@@ -0,0 +1,68 @@
+# Generated by Django 5.1.7 on 2026-10-19 11:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0002_alter_ticket_created_at_alter_ticket_id_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='ticket',
+            options={'ordering': ['-created_at']},
+        ),
+        migrations.AddField(
+            model_name='tickethistory',
+            name='event_type',
+            field=models.CharField(choices=[('status_change', 'Status Change'), ('created', 'Created'), ('updated', 'Updated'), ('resolved', 'Resolved'), ('closed', 'Closed'), ('comment', 'Comment Added')], default='updated', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='tickethistory',
+            name='message',
+            field=models.TextField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='tickethistory',
+            name='user',
+            field=models.ForeignKey(default=None, on_delete=django.db.models.deletion.CASCADE, related_name='ticket_history', to=settings.AUTH_USER_MODEL),
+            preserve_default=False,
+        ),
+        migrations.AlterField(
+            model_name='ticket',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, db_index=True),
+        ),
+        migrations.AlterField(
+            model_name='tickethistory',
+            name='new_status',
+            field=models.CharField(blank=True, max_length=20, null=True),
+        ),
+        migrations.CreateModel(
+            name='Comment',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('message', models.TextField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='comments', to=settings.AUTH_USER_MODEL)),
+                ('ticket', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='comments', to='tickets.ticket')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TimeSpent',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('minutes', models.PositiveIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('operator', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='time_entries', to=settings.AUTH_USER_MODEL)),
+                ('ticket', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='time_entries', to='tickets.ticket')),
+            ],
+        ),
+    ]
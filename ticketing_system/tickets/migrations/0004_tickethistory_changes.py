@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-19 11:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0003_comment_timespent_and_history_fields'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tickethistory',
+            name='changes',
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.1.7 on 2026-10-19 11:07
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models.functions import TruncDate
+
+
+def backfill_spent_on(apps, schema_editor):
+    """
+    Existing entries were logged on the day they were created (in the
+    active time zone, like localdate()). One set-based UPDATE.
+    """
+    TimeSpent = apps.get_model('tickets', 'TimeSpent')
+    TimeSpent.objects.update(spent_on=TruncDate('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0005_ticket_comment_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='timespent',
+            name='spent_on',
+            field=models.DateField(default=django.utils.timezone.localdate),
+        ),
+        migrations.RunPython(backfill_spent_on, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.1.7 on 2026-10-19 11:19
+
+from django.conf import settings
+from django.db import migrations, models
+
+PRIORITY_RANKS = {'high': 1, 'medium': 2, 'low': 3}
+
+
+def backfill_priority_rank(apps, schema_editor):
+    """
+    One UPDATE per priority; 'low' rows already have the default rank.
+    """
+    Ticket = apps.get_model('tickets', 'Ticket')
+    for priority, rank in PRIORITY_RANKS.items():
+        if rank != 3:
+            Ticket.objects.filter(priority=priority).update(priority_rank=rank)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0003_company_logo_alter_company_initials'),
+        ('tickets', '0006_timespent_spent_on'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ticket',
+            name='priority_rank',
+            field=models.PositiveSmallIntegerField(default=3, editable=False),
+        ),
+        migrations.RunPython(backfill_priority_rank, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(condition=models.Q(('status__in', ('open', 'in_progress', 'pending'))), fields=['priority_rank', 'created_at'], name='ticket_queue_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(condition=models.Q(('status__in', ('open', 'in_progress', 'pending'))), fields=['assignee', 'priority_rank', 'created_at'], name='ticket_assignee_queue_idx'),
+        ),
+    ]
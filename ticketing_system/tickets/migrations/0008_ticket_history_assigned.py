@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-19 11:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0007_ticket_priority_rank'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='tickethistory',
+            name='event_type',
+            field=models.CharField(choices=[('status_change', 'Status Change'), ('created', 'Created'), ('updated', 'Updated'), ('resolved', 'Resolved'), ('closed', 'Closed'), ('comment', 'Comment Added'), ('assigned', 'Assigned')], default='updated', max_length=20),
+        ),
+    ]
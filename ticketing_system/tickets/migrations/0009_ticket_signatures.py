@@ -0,0 +1,40 @@
+# Generated by Django 5.1.7 on 2026-10-19 11:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0003_company_logo_alter_company_initials'),
+        ('tickets', '0008_ticket_history_assigned'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TicketSignature',
+            fields=[
+                ('ticket', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='signature', serialize=False, to='tickets.ticket')),
+                ('minhash', models.JSONField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='tickethistory',
+            name='event_type',
+            field=models.CharField(choices=[('status_change', 'Status Change'), ('created', 'Created'), ('updated', 'Updated'), ('resolved', 'Resolved'), ('closed', 'Closed'), ('comment', 'Comment Added'), ('assigned', 'Assigned'), ('merged', 'Merged')], default='updated', max_length=20),
+        ),
+        migrations.CreateModel(
+            name='TicketSignatureBand',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('key', models.BigIntegerField()),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='companies.company')),
+                ('ticket', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='signature_bands', to='tickets.ticket')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['company', 'key'], name='ticket_band_lookup_idx')],
+            },
+        ),
+    ]
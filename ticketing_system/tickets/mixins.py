@@ -1,34 +1,222 @@
+import hashlib
+import json
+import time
+from django.core.cache import cache
+from drf_spectacular.utils import OpenApiParameter, extend_schema
+from rest_framework import status
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.response import Response
+from .concurrency import VersionConflict
+from .conf import tickets_setting
+from .models import Ticket
+
+
 class StaffOrCompanyFilterMixin:
     """
-    Mixin providing a helper method to filter a given QuerySet
-    by the current user's staff status and ticket's company.
-    This assumes your objects have a `ticket` foreign key,
-    and the `ticket` has `company`.
+    Mixin giving views company-scoped access to tickets and to the rows
+    hanging off them (comments, history, time entries), on top of
+    `Ticket.objects.visible_to` and `<Child>.objects.for_ticket`.
     """
-    
-    def filter_tickets_by_company(self, queryset):
-        user = self.request.user
-        if user.is_staff or user.role == 'admin':
-            return queryset
-        else:
-            return queryset.filter(company=user.company)
+
+    def get_ticket(self, ticket_id_field='pk'):
+        """
+        The ticket named in the URL, or 404 if it doesn't exist or belongs to
+        another company. Resolved once per request and memoized on it, so
+        permission checks, creates and history writes share one lookup.
+        """
+        ticket_id = str(self.kwargs[ticket_id_field])
+        cache = getattr(self.request, '_visible_tickets', None)
+        if cache is None:
+            cache = self.request._visible_tickets = {}
+        if ticket_id not in cache:
+            try:
+                cache[ticket_id] = Ticket.objects.visible_to(self.request.user).get(pk=ticket_id)
+            except Ticket.DoesNotExist:
+                raise NotFound("Ticket not found or you don't have permission.")
+        return cache[ticket_id]
 
     def filter_by_ticket_company(self, queryset, ticket_id_field='pk'):
         """
-        Filters the `queryset` so:
-          - If user is staff, return all matching rows.
-          - If user is not staff, restrict to rows where row.ticket.company == user.company.
+        Restrict `queryset` (of a model with a `ticket` foreign key) to the
+        ticket named in the URL, and to the user's company unless they are
+        staff. Uses the memoized ticket when one was already resolved for
+        this request, avoiding the join on the ticket table.
+        """
+        ticket_id = str(self.kwargs[ticket_id_field])
+        ticket = getattr(self.request, '_visible_tickets', {}).get(ticket_id, ticket_id)
+        return queryset.for_ticket(ticket, self.request.user)
 
-        `ticket_id_field`: the name of the kwarg containing the ticket's UUID (default 'pk').
+    def filter_by_ticket_ids_company(self, queryset, ticket_ids):
+        """
+        Same rules as `filter_by_ticket_company`, for rows of several tickets at once.
         """
-        user = self.request.user
-        ticket_uuid = self.kwargs[ticket_id_field]  # e.g. self.kwargs['pk']
+        return queryset.for_tickets(ticket_ids, self.request.user)
+
+
+class OptimisticConcurrencyMixin:
+    """
+    Mixin for RetrieveUpdate views of versioned models (Ticket, Comment).
+    - GET responses carry the row version as an ETag.
+    - PUT/PATCH may send the version they were based on, either as an
+      `If-Match: "<version>"` header or a `version` field in the body.
+      A stale version is rejected with HTTP 409 and the current state.
+    """
+
+    def get_expected_version(self):
+        raw = self.request.headers.get('If-Match')
+        if raw is not None:
+            raw = raw.strip()
+            if raw == '*':
+                return None
+            raw = raw.removeprefix('W/').strip('"')
+        elif isinstance(self.request.data, dict):
+            raw = self.request.data.get('version')
+        else:
+            raise ValidationError("Expected a JSON object as the request body.")
+        if raw in (None, ''):
+            return None
+        try:
+            return int(raw)
+        except (TypeError, ValueError):
+            raise ValidationError({'version': "A valid integer is required."})
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.request is not None and self.request.method in ('PUT', 'PATCH'):
+            context['expected_version'] = self.get_expected_version()
+        return context
+
+    def retrieve(self, request, *args, **kwargs):
+        response = super().retrieve(request, *args, **kwargs)
+        return self._with_etag(response)
 
-        # Start by filtering only rows referencing this specific ticket ID
-        queryset = queryset.filter(ticket__id=ticket_uuid)
+    def update(self, request, *args, **kwargs):
+        try:
+            response = super().update(request, *args, **kwargs)
+        except VersionConflict:
+            current = self.get_object()
+            data = {
+                'detail': "This object was modified by someone else. Re-apply your changes to the current version.",
+                'current': self.get_serializer(current).data,
+            }
+            response = Response(data, status=status.HTTP_409_CONFLICT)
+            response['ETag'] = f'"{current.version}"'
+            return response
+        return self._with_etag(response)
 
-        if not user.is_staff and user.role != 'admin':
-            # Further filter: the ticket's company must match the user's company
-            queryset = queryset.filter(ticket__company=user.company)
+    def _with_etag(self, response):
+        version = response.data.get('version') if isinstance(response.data, dict) else None
+        if version is not None:
+            response['ETag'] = f'"{version}"'
+        return response
+
+
+IDEMPOTENCY_KEY_PARAMETER = OpenApiParameter(
+    name='Idempotency-Key',
+    location=OpenApiParameter.HEADER,
+    required=False,
+    type=str,
+    description=(
+        "Client-chosen unique key (e.g. a UUID) making a retried POST safe: a repeat with the same key and "
+        "body returns the stored result instead of creating again."
+    ),
+)
+
+
+class IdempotentCreateMixin:
+    """
+    Mixin for create views honouring an `Idempotency-Key` header.
+    - The first request with a key runs normally; a successful response is
+      cached with a fingerprint of the request for TICKETS['IDEMPOTENCY_TTL'].
+    - A replay (same user, path, key and body) returns the cached response
+      with `Idempotent-Replayed: true` and creates nothing.
+    - The same key with a different body is rejected with HTTP 422.
+    - Concurrent duplicates are single-flighted: one request does the work
+      while the others wait for its result, or get HTTP 409 if it takes too
+      long.
+    The cache must be shared by all workers (e.g. Redis or Memcached) for
+    the guarantees to hold across processes.
+    """
+    idempotency_header = 'Idempotency-Key'
+    # Response headers replayed along with the body.
+    idempotency_replayed_headers = ('Location',)
+
+    @extend_schema(parameters=[IDEMPOTENCY_KEY_PARAMETER])
+    def post(self, request, *args, **kwargs):
+        return super().post(request, *args, **kwargs)
+
+    def get_idempotency_cache_key(self, key):
+        scope = f"{self.request.user.pk}:{self.request.path}:{key}"
+        return 'idempotency:' + hashlib.sha256(scope.encode()).hexdigest()
+
+    def get_request_fingerprint(self):
+        body = json.dumps(self.request.data, sort_keys=True, default=str)
+        return hashlib.sha256(body.encode()).hexdigest()
+
+    def create(self, request, *args, **kwargs):
+        key = request.headers.get(self.idempotency_header)
+        if key is None:
+            return super().create(request, *args, **kwargs)
+        if not key or len(key) > 255:
+            raise ValidationError({self.idempotency_header: "Must be between 1 and 255 characters."})
+
+        cache_key = self.get_idempotency_cache_key(key)
+        lock_key = cache_key + ':lock'
+        fingerprint = self.get_request_fingerprint()
+
+        stored = cache.get(cache_key)
+        if stored is None and not cache.add(lock_key, True, tickets_setting('IDEMPOTENCY_LOCK_TIMEOUT')):
+            stored = self._wait_for_result(cache_key, lock_key)
+            if stored is None:
+                response = Response(
+                    {'detail': "A request with this Idempotency-Key is still being processed."},
+                    status=status.HTTP_409_CONFLICT,
+                )
+                response['Retry-After'] = '1'
+                return response
+        if stored is not None:
+            return self._replay(stored, fingerprint)
+
+        try:
+            # The previous holder may have stored its result just before we
+            # took the lock.
+            stored = cache.get(cache_key)
+            if stored is not None:
+                return self._replay(stored, fingerprint)
+            response = super().create(request, *args, **kwargs)
+            if status.is_success(response.status_code):
+                cache.set(cache_key, {
+                    'fingerprint': fingerprint,
+                    'status': response.status_code,
+                    'data': response.data,
+                    'headers': {name: response[name] for name in self.idempotency_replayed_headers if response.has_header(name)},
+                }, tickets_setting('IDEMPOTENCY_TTL'))
+            return response
+        finally:
+            cache.delete(lock_key)
+
+    def _wait_for_result(self, cache_key, lock_key):
+        """
+        Poll for the result of the request holding the lock, for up to
+        TICKETS['IDEMPOTENCY_WAIT'] seconds. None if it did not finish (or
+        failed, releasing the lock without a result).
+        """
+        deadline = time.monotonic() + tickets_setting('IDEMPOTENCY_WAIT')
+        delay = 0.02
+        while time.monotonic() < deadline:
+            time.sleep(delay)
+            stored = cache.get(cache_key)
+            if stored is not None or cache.get(lock_key) is None:
+                return stored
+            delay = min(delay * 2, 0.5)
+        return None
 
-        return queryset
+    def _replay(self, stored, fingerprint):
+        if stored['fingerprint'] != fingerprint:
+            return Response(
+                {'detail': "This Idempotency-Key was already used with a different request."},
+                status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            )
+        response = Response(stored['data'], status=stored['status'], headers=stored['headers'])
+        response['Idempotent-Replayed'] = 'true'
+        return response
@@ -1,7 +1,65 @@
 import uuid
 from django.db import models
-from django.db.models import Sum
+from django.db.models import OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
 from django.conf import settings
+from django.utils import timezone
+
+
+def sees_all_tickets(user):
+    """
+    Staff and admins see every company's tickets; everyone else only their own company's.
+    """
+    return user.is_staff or user.role == 'admin'
+
+
+class TicketQuerySet(models.QuerySet):
+    def visible_to(self, user):
+        """
+        Tickets `user` may see. Filters on the user's company_id, so it never
+        loads the Company row.
+        """
+        if sees_all_tickets(user):
+            return self
+        return self.filter(company_id=user.company_id)
+
+    def with_total_time(self):
+        """
+        Annotate each ticket's minutes of time spent, so total_time_spent
+        does not run one aggregate query per ticket.
+        """
+        minutes = TimeSpent.objects.filter(ticket=OuterRef('pk')).order_by().values('ticket').annotate(
+            total=Sum('minutes')
+        ).values('total')
+        return self.annotate(_cached_total_time=Coalesce(Subquery(minutes), 0))
+
+
+class TicketChildQuerySet(models.QuerySet):
+    """
+    QuerySet of rows hanging off a ticket (comments, history, time entries).
+    """
+
+    def for_ticket(self, ticket, user):
+        """
+        Rows of one ticket that `user` may see. `ticket` is a Ticket or its id.
+        With a Ticket instance the company check is done in Python and the
+        query is a plain ticket_id lookup; with an id, non-staff users get a
+        single join on the ticket table.
+        """
+        if isinstance(ticket, Ticket):
+            if not sees_all_tickets(user) and ticket.company_id != user.company_id:
+                return self.none()
+            return self.filter(ticket_id=ticket.pk)
+        return self.for_tickets([ticket], user)
+
+    def for_tickets(self, ticket_ids, user):
+        """
+        Same rules as `for_ticket`, for rows of several tickets at once.
+        """
+        queryset = self.filter(ticket_id__in=ticket_ids)
+        if sees_all_tickets(user):
+            return queryset
+        return queryset.filter(ticket__company_id=user.company_id)
 
 
 class Ticket(models.Model):
@@ -31,9 +89,17 @@ class Ticket(models.Model):
         ('closed', 'Closed'),
     )
 
+    # Statuses of tickets still waiting on staff; see the work queue.
+    UNRESOLVED_STATUSES = ('open', 'in_progress', 'pending')
+
+    # Numeric rank of each priority, most urgent first. Stored in
+    # priority_rank so "most urgent first" can be read off an index.
+    PRIORITY_RANKS = {'high': 1, 'medium': 2, 'low': 3}
+
     title = models.CharField(max_length=200)
     description = models.TextField()
     priority = models.CharField(max_length=10, choices=PRIORITY_CHOICES, default='low')
+    priority_rank = models.PositiveSmallIntegerField(default=3, editable=False)
     type = models.CharField(max_length=20, choices=TYPE_CHOICES, default='incident')
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='open')
     assignee = models.ForeignKey(
@@ -55,9 +121,27 @@ class Ticket(models.Model):
     unique_reference = models.CharField(max_length=8, unique=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True, db_index=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Bumped on every update; see tickets.concurrency.save_with_version.
+    version = models.PositiveIntegerField(default=1)
+
+    objects = TicketQuerySet.as_manager()
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Head of the work queue, overall and per assignee: unresolved
+            # tickets by rank, then age.
+            models.Index(
+                fields=['priority_rank', 'created_at'],
+                condition=models.Q(status__in=('open', 'in_progress', 'pending')),
+                name='ticket_queue_idx',
+            ),
+            models.Index(
+                fields=['assignee', 'priority_rank', 'created_at'],
+                condition=models.Q(status__in=('open', 'in_progress', 'pending')),
+                name='ticket_assignee_queue_idx',
+            ),
+        ]
     
     @property
     def total_time_spent(self):
@@ -71,11 +155,31 @@ class Ticket(models.Model):
         Example format: <COMPANY_INITIALS>-<incremental ID or count>
         """
         if not self.unique_reference and self.company:
-            last_count = Ticket.objects.filter(company=self.company).count() + 1
+            # Archived tickets keep their references, so they must be counted too.
+            from archive.services import archived_ticket_count
+            last_count = Ticket.objects.filter(company=self.company).count() + archived_ticket_count(self.company) + 1
             self.unique_reference = f"{self.company.initials}-{last_count:04d}"
 
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = self.sync_derived_fields(kwargs['update_fields'])
+        else:
+            self.sync_derived_fields()
         super().save(*args, **kwargs)
 
+    def sync_derived_fields(self, fields=None):
+        """
+        Refresh the stored priority_rank from priority. Given the fields about
+        to be written, returns them with priority_rank added when priority is
+        among them.
+        """
+        self.priority_rank = self.PRIORITY_RANKS.get(self.priority, self.PRIORITY_RANKS['low'])
+        if fields is None:
+            return None
+        fields = list(fields)
+        if 'priority' in fields and 'priority_rank' not in fields:
+            fields.append('priority_rank')
+        return fields
+
     def __str__(self):
         return f"{self.unique_reference} - {self.title}"
 
@@ -99,6 +203,9 @@ class Comment(models.Model):
     message = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    version = models.PositiveIntegerField(default=1)
+
+    objects = TicketChildQuerySet.as_manager()
 
     def __str__(self):
         return f"Comment {self.id} by {self.author} on {self.ticket}"
@@ -112,6 +219,8 @@ class TicketHistory(models.Model):
         ("resolved", "Resolved"),
         ("closed", "Closed"),
         ("comment", "Comment Added"),
+        ("assigned", "Assigned"),
+        ("merged", "Merged"),
     ]
 
     id = models.BigAutoField(primary_key=True)
@@ -120,6 +229,8 @@ class TicketHistory(models.Model):
     message = models.TextField(blank=True, null=True)
     previous_status = models.CharField(max_length=20, blank=True, null=True)
     new_status = models.CharField(max_length=20, blank=True, null=True)
+    # Compact {field: [old, new]} diff of the tracked ticket fields.
+    changes = models.JSONField(blank=True, null=True)
     changed_at = models.DateTimeField(auto_now_add=True)
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -127,6 +238,8 @@ class TicketHistory(models.Model):
         related_name='ticket_history',
     )
 
+    objects = TicketChildQuerySet.as_manager()
+
     def __str__(self):
         return f"{self.ticket.unique_reference} | {self.event_type} | {self.changed_at}"
 
@@ -137,6 +250,7 @@ class TimeSpent(models.Model):
     - operator: the staff user who spent the time
     - ticket: reference to the associated Ticket
     - minutes: number of minutes spent
+    - spent_on: the day the work was done (defaults to today)
     - created_at, updated_at for auditing
     """
     id = models.BigAutoField(primary_key=True)
@@ -151,8 +265,94 @@ class TimeSpent(models.Model):
         related_name='time_entries'
     )
     minutes = models.PositiveIntegerField()
+    spent_on = models.DateField(default=timezone.localdate)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = TicketChildQuerySet.as_manager()
+
+    def __str__(self):
+        return f"TimeSpent #{self.id} - {self.minutes} mins on {self.ticket}"
+
+class TicketSignature(models.Model):
+    """
+    MinHash signature of a ticket's title and description, used to find
+    near-duplicates (see tickets/duplicates.py).
+    """
+    ticket = models.OneToOneField(Ticket, on_delete=models.CASCADE, primary_key=True, related_name='signature')
+    minhash = models.JSONField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Signature of {self.ticket_id}"
+
+
+class TicketSignatureBand(models.Model):
+    """
+    One LSH band of a TicketSignature. Tickets sharing a band key (within a
+    company) are duplicate candidates.
+    """
+    id = models.BigAutoField(primary_key=True)
+    ticket = models.ForeignKey(Ticket, on_delete=models.CASCADE, related_name='signature_bands')
+    company = models.ForeignKey('companies.Company', on_delete=models.CASCADE, related_name='+')
+    key = models.BigIntegerField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['company', 'key'], name='ticket_band_lookup_idx'),
+        ]
+
+    def __str__(self):
+        return f"Band {self.key} of {self.ticket_id}"
+
+
+def blob_path(blob, filename):
+    # Content-addressed, fanned out over two directory levels.
+    return f"attachments/{blob.sha256[:2]}/{blob.sha256[2:4]}/{blob.sha256}"
+
+
+class AttachmentBlob(models.Model):
+    """
+    Stored file content, keyed by its SHA-256. Identical files uploaded
+    several times (to any ticket) share one blob.
+    """
+    sha256 = models.CharField(max_length=64, primary_key=True)
+    file = models.FileField(upload_to=blob_path, max_length=255)
+    size = models.BigIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.sha256} ({self.size} bytes)"
+
+
+class Attachment(models.Model):
+    """
+    A file attached to a ticket, optionally to one of its comments. The
+    content lives in an AttachmentBlob on disk, never in the ticket rows.
+    """
+    id = models.BigAutoField(primary_key=True)
+    ticket = models.ForeignKey(Ticket, on_delete=models.CASCADE, related_name='attachments')
+    comment = models.ForeignKey(
+        Comment,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='attachments'
+    )
+    blob = models.ForeignKey(AttachmentBlob, on_delete=models.PROTECT, related_name='attachments')
+    filename = models.CharField(max_length=255)
+    content_type = models.CharField(max_length=100)
+    uploaded_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='attachments'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = TicketChildQuerySet.as_manager()
+
+    class Meta:
+        ordering = ['created_at']
+
     def __str__(self):
-        return f"TimeSpent #{self.id} - {self.minutes} mins on {self.ticket}"
\ No newline at end of file
+        return f"{self.filename} on {self.ticket_id}"
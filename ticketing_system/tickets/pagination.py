@@ -0,0 +1,83 @@
+import base64
+import json
+import uuid
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class WorkQueuePagination(BasePagination):
+    """
+    Keyset pagination in work-queue order (priority_rank, created_at, id).
+
+    The cursor is the position of the last ticket of the previous page, so
+    every page is an index range read: no COUNT(*) and no OFFSET. (DRF's
+    CursorPagination positions on the first ordering column only, which for
+    a three-valued rank degrades to offsets.)
+    """
+    ordering = ('priority_rank', 'created_at', 'id')
+    page_size = 20
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(size, 1), self.max_page_size)
+
+    def encode_cursor(self, ticket):
+        position = [ticket.priority_rank, ticket.created_at.isoformat(), str(ticket.pk)]
+        return base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+
+    def decode_cursor(self, request):
+        raw = request.query_params.get(self.cursor_query_param)
+        if not raw:
+            return None
+        try:
+            rank, created_at, pk = json.loads(base64.urlsafe_b64decode(raw.encode()))
+            created_at = parse_datetime(created_at)
+            pk = uuid.UUID(str(pk))
+            if not isinstance(rank, int) or created_at is None:
+                raise ValueError
+        except (TypeError, ValueError):
+            raise NotFound("Invalid cursor.")
+        return rank, created_at, pk
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        size = self.get_page_size(request)
+        position = self.decode_cursor(request)
+        if position is not None:
+            rank, created_at, pk = position
+            queryset = queryset.filter(
+                Q(priority_rank__gt=rank)
+                | Q(priority_rank=rank, created_at__gt=created_at)
+                | Q(priority_rank=rank, created_at=created_at, id__gt=pk)
+            )
+        rows = list(queryset.order_by(*self.ordering)[:size + 1])
+        self.next_cursor = self.encode_cursor(rows[size - 1]) if len(rows) > size else None
+        return rows[:size]
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response(self, data):
+        return Response({'next': self.get_next_link(), 'results': data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
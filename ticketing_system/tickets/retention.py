@@ -0,0 +1,155 @@
+"""
+Retention policies for TicketHistory.
+
+History is append-only and receives a row for every PATCH and every comment,
+so it outgrows every other table. The policies here shrink it without
+touching the rows SLA computations rely on: 'created', 'status_change',
+'resolved' and 'closed' events are never modified or deleted.
+"""
+import time
+from datetime import timedelta
+from django.db import transaction
+from django.db.models import Count, IntegerField, TextField, Value
+from django.db.models.functions import Cast, Coalesce, Length
+from django.utils import timezone
+from .models import TicketHistory
+
+# Rough per-row cost of the fixed-size columns (ids, timestamps, foreign keys)
+# plus storage overhead, used to estimate reclaimed bytes.
+ROW_OVERHEAD_BYTES = 64
+
+PROTECTED_EVENTS = ('created', 'status_change', 'resolved', 'closed')
+
+
+def estimate_bytes(queryset):
+    """
+    Estimated on-disk size of the rows in `queryset`.
+    """
+    text_columns = ('event_type', 'message', 'previous_status', 'new_status', 'changes')
+    sizes = queryset.annotate(
+        row_bytes=sum(
+            (Coalesce(Length(Cast(column, TextField())), Value(0), output_field=IntegerField()) for column in text_columns),
+            Value(ROW_OVERHEAD_BYTES, output_field=IntegerField()),
+        )
+    ).values_list('row_bytes', flat=True)
+    return sum(sizes)
+
+
+def _delete(ids, dry_run):
+    queryset = TicketHistory.objects.filter(id__in=ids).exclude(event_type__in=PROTECTED_EVENTS)
+    reclaimed = estimate_bytes(queryset)
+    if dry_run:
+        return queryset.count(), reclaimed
+    deleted = queryset.delete()[1].get(TicketHistory._meta.label, 0)
+    return deleted, reclaimed
+
+
+def update_runs(rows):
+    """
+    Given history rows of one or more tickets as (id, ticket_id, event_type,
+    user_id, changes) tuples ordered by ticket and time, yield every run of
+    two or more consecutive 'updated' events by the same user on the same
+    ticket, as a list of (id, changes) pairs.
+    """
+    run = []
+    previous = None
+    for id_, ticket_id, event_type, user_id, changes in rows:
+        key = (ticket_id, user_id)
+        if event_type == 'updated' and previous == key and run:
+            run.append((id_, changes))
+            continue
+        if len(run) > 1:
+            yield run
+        run = [(id_, changes)] if event_type == 'updated' else []
+        previous = key if event_type == 'updated' else None
+    if len(run) > 1:
+        yield run
+
+
+def merge_changes(changes_list):
+    """
+    Fold a sequence of {field: [old, new]} diffs into one: the oldest 'old'
+    and the newest 'new' per field, dropping fields that ended where they began.
+    """
+    merged = {}
+    for changes in changes_list:
+        for field, (old, new) in (changes or {}).items():
+            merged[field] = [merged[field][0] if field in merged else old, new]
+    return {field: values for field, values in merged.items() if values[0] != values[1]}
+
+
+def collapse_updates(batch_size=500, pause=0.0, dry_run=False):
+    """
+    Collapse runs of generic 'updated' events, `batch_size` tickets at a time.
+    The surviving (latest) row of each run receives the merged field diff.
+    Returns (rows, bytes) reclaimed.
+    """
+    ticket_ids = list(
+        TicketHistory.objects.filter(event_type='updated')
+        .values('ticket_id').annotate(count=Count('id')).filter(count__gt=1)
+        .order_by('ticket_id').values_list('ticket_id', flat=True)
+    )
+    rows_total = bytes_total = 0
+    for start in range(0, len(ticket_ids), batch_size):
+        batch = ticket_ids[start:start + batch_size]
+        rows = (
+            TicketHistory.objects.filter(ticket_id__in=batch)
+            .order_by('ticket_id', 'changed_at', 'id')
+            .values_list('id', 'ticket_id', 'event_type', 'user_id', 'changes')
+        )
+        # Survivors and the rows they absorbed change together or not at all.
+        with transaction.atomic():
+            redundant = []
+            for run in update_runs(rows.iterator()):
+                redundant += [id_ for id_, _ in run[:-1]]
+                if not dry_run:
+                    TicketHistory.objects.filter(id=run[-1][0]).update(
+                        message=f"Ticket updated ({len(run)} edits)",
+                        changes=merge_changes(changes for _, changes in run),
+                    )
+            if redundant:
+                rows_deleted, reclaimed = _delete(redundant, dry_run)
+                rows_total += rows_deleted
+                bytes_total += reclaimed
+        if pause:
+            time.sleep(pause)
+    return rows_total, bytes_total
+
+
+def drop_comment_events(older_than_days, batch_size=1000, pause=0.0, dry_run=False):
+    """
+    Delete 'comment' history events older than `older_than_days`. The
+    Comment rows themselves are kept. Returns (rows, bytes) reclaimed.
+    """
+    cutoff = timezone.now() - timedelta(days=older_than_days)
+    queryset = TicketHistory.objects.filter(event_type='comment', changed_at__lt=cutoff).order_by('id')
+    rows_total = bytes_total = 0
+    last_id = 0
+    while True:
+        ids = list(queryset.filter(id__gt=last_id).values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return rows_total, bytes_total
+        last_id = ids[-1]
+        rows_deleted, reclaimed = _delete(ids, dry_run)
+        rows_total += rows_deleted
+        bytes_total += reclaimed
+        if pause:
+            time.sleep(pause)
+
+
+def apply_retention(comment_days=None, collapse=True, batch_size=500, pause=0.0, dry_run=False):
+    """
+    Run the configured policies and report what was (or would be) reclaimed.
+    """
+    report = {'collapsed_updates': 0, 'dropped_comment_events': 0, 'rows': 0, 'bytes': 0}
+    if collapse:
+        rows, reclaimed = collapse_updates(batch_size, pause, dry_run)
+        report['collapsed_updates'] = rows
+        report['rows'] += rows
+        report['bytes'] += reclaimed
+    if comment_days is not None:
+        rows, reclaimed = drop_comment_events(comment_days, batch_size, pause, dry_run)
+        report['dropped_comment_events'] = rows
+        report['rows'] += rows
+        report['bytes'] += reclaimed
+    return report
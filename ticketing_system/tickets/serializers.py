@@ -1,8 +1,69 @@
 from rest_framework import serializers
-from .models import Ticket, TicketHistory, Comment, TimeSpent
+from drf_spectacular.utils import extend_schema_field
+from .models import Ticket, TicketHistory, Comment, TimeSpent, Attachment
+from .concurrency import VersionConflict, save_with_version
 
 
-class TicketSerializerLight(serializers.ModelSerializer):
+def changed_fields(instance, validated_data):
+    """
+    Names of the fields in `validated_data` whose value differs from the
+    instance. Relations are compared by id, so no related row is loaded.
+    """
+    changed = []
+    for attr, value in validated_data.items():
+        field = instance._meta.get_field(attr)
+        if field.many_to_many:
+            continue
+        if field.is_relation:
+            current, new = getattr(instance, field.attname), getattr(value, 'pk', value)
+        else:
+            current, new = getattr(instance, attr), value
+        if current != new:
+            changed.append(attr)
+    return changed
+
+
+class MinimalUpdateMixin:
+    """
+    ModelSerializer mixin that writes only the columns an update actually
+    changed (plus updated_at), instead of rewriting the whole row.
+    An update that changes nothing does not touch the database.
+    """
+
+    def update(self, instance, validated_data):
+        changed = changed_fields(instance, validated_data)
+        for attr in changed:
+            setattr(instance, attr, validated_data[attr])
+        if changed:
+            instance.save(update_fields=changed + ['updated_at'])
+        return instance
+
+
+class VersionedUpdateMixin:
+    """
+    ModelSerializer mixin that saves updates with a conditional
+    `UPDATE ... WHERE version = n` covering only the changed columns.
+    The view passes the version the client based its edit on as
+    context['expected_version']; without one, the version loaded for this
+    request is used, which still catches writes racing this request.
+    """
+
+    def update(self, instance, validated_data):
+        expected_version = self.context.get('expected_version')
+        if expected_version is None:
+            expected_version = instance.version
+        elif expected_version != instance.version:
+            raise VersionConflict(f"Expected version {expected_version}, found {instance.version}.")
+
+        changed = changed_fields(instance, validated_data)
+        if not changed:
+            return instance
+        for attr in changed:
+            setattr(instance, attr, validated_data[attr])
+        return save_with_version(instance, expected_version, fields=changed)
+
+
+class TicketSerializerLight(VersionedUpdateMixin, serializers.ModelSerializer):
     company_logo = serializers.ReadOnlyField(source='company.logo')
     created_by_fullname = serializers.SerializerMethodField( method_name='get_created_by_fullname')
     def get_created_by_fullname(self, obj):
@@ -20,6 +81,7 @@ class TicketSerializerLight(serializers.ModelSerializer):
             'title',
             # 'description', # Hide description
             'priority',
+            'priority_rank',
             'type',
             'status',
             'assignee',
@@ -32,6 +94,7 @@ class TicketSerializerLight(serializers.ModelSerializer):
             'updated_at',
             'total_time_spent',
             'company_logo',
+            'version',
         ]
         read_only_fields = [
             'id',
@@ -43,6 +106,8 @@ class TicketSerializerLight(serializers.ModelSerializer):
             'assignee_fullname',
             'total_time_spent',
             'company_logo',
+            'version',
+            'priority_rank',
         ]
 
     def get_fields(self):
@@ -58,7 +123,7 @@ class TicketSerializerLight(serializers.ModelSerializer):
 
         return fields
 
-class TicketSerializer(serializers.ModelSerializer):
+class TicketSerializer(VersionedUpdateMixin, serializers.ModelSerializer):
     company_logo = serializers.ReadOnlyField(source='company.logo')
     created_by_fullname = serializers.SerializerMethodField( method_name='get_created_by_fullname')
     def get_created_by_fullname(self, obj):
@@ -76,6 +141,7 @@ class TicketSerializer(serializers.ModelSerializer):
             'title',
             'description',
             'priority',
+            'priority_rank',
             'type',
             'status',
             'assignee',
@@ -88,6 +154,7 @@ class TicketSerializer(serializers.ModelSerializer):
             'updated_at',
             'total_time_spent',
             'company_logo',
+            'version',
         ]
         read_only_fields = [
             'id',
@@ -99,6 +166,8 @@ class TicketSerializer(serializers.ModelSerializer):
             'assignee_fullname',
             'total_time_spent',
             'company_logo',
+            'version',
+            'priority_rank',
         ]
 
     def get_fields(self):
@@ -127,6 +196,7 @@ class TicketHistorySerializer(serializers.ModelSerializer):
             'message',
             'previous_status',
             'new_status',
+            'changes',
             'changed_at',
             'ticket',
             'user',
@@ -134,7 +204,7 @@ class TicketHistorySerializer(serializers.ModelSerializer):
         ]
 
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(VersionedUpdateMixin, serializers.ModelSerializer):
     """
     Serializer for creating and retrieving comments on a ticket.
     """
@@ -159,11 +229,32 @@ class CommentSerializer(serializers.ModelSerializer):
             'message',
             'created_at',
             'updated_at',
+            'version',
         ]
-        read_only_fields = ['id', 'author', 'author_fullName', 'author_role', 'author_avatar', 'author_username', 'ticket', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'author', 'author_fullName', 'author_role', 'author_avatar', 'author_username', 'ticket', 'created_at', 'updated_at', 'version']
+
+
+class LatestCommentsQuerySerializer(serializers.Serializer):
+    """
+    Query parameters of the batched latest-comments endpoint.
+    """
+    tickets = serializers.CharField(help_text="Comma-separated ticket ids (at most 100).")
+    limit = serializers.IntegerField(min_value=1, max_value=20, default=3)
+
+    def validate_tickets(self, value):
+        ids = []
+        for raw in value.split(','):
+            raw = raw.strip()
+            if raw:
+                ids.append(serializers.UUIDField().to_internal_value(raw))
+        if not ids:
+            raise serializers.ValidationError("At least one ticket id is required.")
+        if len(ids) > 100:
+            raise serializers.ValidationError("At most 100 ticket ids are allowed.")
+        return ids
 
 
-class TimeSpentSerializer(serializers.ModelSerializer):
+class TimeSpentSerializer(MinimalUpdateMixin, serializers.ModelSerializer):
     operator_name = serializers.ReadOnlyField(source='operator.username')
     operator_fullname = serializers.SerializerMethodField( method_name='get_operator_fullname')
     def get_operator_fullname(self, obj):
@@ -178,7 +269,115 @@ class TimeSpentSerializer(serializers.ModelSerializer):
             'operator_name',
             'operator_fullname',
             'minutes',
+            'spent_on',
             'created_at',
             'updated_at',
         ]
-        read_only_fields = ['id', 'ticket', 'operator', 'operator_fullname', 'created_at', 'updated_at']
\ No newline at end of file
+        read_only_fields = ['id', 'ticket', 'operator', 'operator_fullname', 'created_at', 'updated_at']
+
+
+class TimeEntryBatchItemSerializer(serializers.Serializer):
+    """
+    One item of a bulk time-entry request.
+    """
+    ticket = serializers.UUIDField()
+    minutes = serializers.IntegerField(min_value=1)
+    date = serializers.DateField(required=False)
+
+
+class TimeEntryBatchSerializer(serializers.Serializer):
+    """
+    Bulk time-entry request. Items are validated one by one so that a bad
+    item is reported back without rejecting the rest of the batch.
+    """
+    entries = serializers.ListField(child=serializers.DictField(), allow_empty=False, max_length=500)
+
+
+class TimeEntryBatchErrorSerializer(serializers.Serializer):
+    index = serializers.IntegerField()
+    errors = serializers.DictField()
+
+
+class TimeEntryBatchResultSerializer(serializers.Serializer):
+    created = TimeSpentSerializer(many=True)
+    errors = TimeEntryBatchErrorSerializer(many=True)
+    totals = serializers.DictField(child=serializers.IntegerField(), help_text="Total minutes per affected ticket.")
+
+
+class TicketDetailSerializer(TicketSerializer):
+    """
+    TicketSerializer with optional embedded child collections, for
+    GET /tickets/<uuid>/?include=comments,history,time_entries.
+    The view prefetches the bounded collections into `included_<name>`;
+    collections that were not requested are left out of the output.
+    """
+    INCLUDES = ('comments', 'history', 'time_entries')
+
+    comments = CommentSerializer(many=True, read_only=True, source='included_comments')
+    history = TicketHistorySerializer(many=True, read_only=True, source='included_history')
+    time_entries = TimeSpentSerializer(many=True, read_only=True, source='included_time_entries')
+
+    class Meta(TicketSerializer.Meta):
+        fields = TicketSerializer.Meta.fields + ['comments', 'history', 'time_entries']
+
+    def get_fields(self):
+        fields = super().get_fields()
+        include = self.context.get('include', ())
+        for name in self.INCLUDES:
+            if name not in include:
+                fields.pop(name, None)
+        return fields
+
+
+class DuplicateCandidateSerializer(serializers.ModelSerializer):
+    similarity = serializers.FloatField(read_only=True, help_text="Estimated text similarity, from 0 to 1.")
+
+    class Meta:
+        model = Ticket
+        fields = ['id', 'unique_reference', 'title', 'status', 'created_at', 'similarity']
+        read_only_fields = fields
+
+
+class TicketCreateSerializer(TicketSerializer):
+    """
+    TicketSerializer for POST /tickets/, whose response also lists the
+    near-duplicates found for the new ticket (see tickets/duplicates.py).
+    """
+    duplicates = serializers.SerializerMethodField()
+
+    class Meta(TicketSerializer.Meta):
+        fields = TicketSerializer.Meta.fields + ['duplicates']
+
+    @extend_schema_field(DuplicateCandidateSerializer(many=True))
+    def get_duplicates(self, obj):
+        return DuplicateCandidateSerializer(self.context.get('duplicates', []), many=True).data
+
+
+class TicketMergeSerializer(serializers.Serializer):
+    into = serializers.UUIDField(help_text="Ticket that receives the comments, time entries and attachments.")
+
+
+class TicketMergeResultSerializer(serializers.Serializer):
+    ticket = TicketSerializer()
+    moved = serializers.DictField(child=serializers.IntegerField(), help_text="Rows moved per collection.")
+
+
+class AttachmentSerializer(serializers.ModelSerializer):
+    """
+    Attachment metadata. On upload (multipart), `file` carries the content
+    and `comment` optionally ties it to a comment of the same ticket.
+    """
+    file = serializers.FileField(write_only=True, use_url=False)
+    size = serializers.ReadOnlyField(source='blob.size')
+    sha256 = serializers.ReadOnlyField(source='blob_id')
+
+    class Meta:
+        model = Attachment
+        fields = ['id', 'ticket', 'comment', 'file', 'filename', 'content_type', 'size', 'sha256', 'uploaded_by', 'created_at']
+        read_only_fields = ['id', 'ticket', 'filename', 'content_type', 'size', 'sha256', 'uploaded_by', 'created_at']
+
+    def validate_comment(self, comment):
+        ticket = self.context.get('ticket')
+        if comment is not None and ticket is not None and comment.ticket_id != ticket.pk:
+            raise serializers.ValidationError("This comment belongs to another ticket.")
+        return comment
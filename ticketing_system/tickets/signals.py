@@ -0,0 +1,10 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from .assignment import track_history
+from .models import TicketHistory
+
+
+@receiver(post_save, sender=TicketHistory, dispatch_uid='tickets_track_assignee_load')
+def ticket_history_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        track_history(instance)
@@ -0,0 +1,17 @@
+from django.db import transaction
+from jobs.registry import task
+from .duplicates import index_ticket
+from .models import Ticket
+
+
+@task('tickets.index_signature')
+def index_signature(ticket_id):
+    """
+    Recompute the duplicate-detection signature of a ticket whose title or
+    description changed.
+    """
+    ticket = Ticket.objects.only('id', 'company_id', 'title', 'description').filter(pk=ticket_id).first()
+    if ticket is None:
+        return {'indexed': False}
+    with transaction.atomic():
+        return {'indexed': index_ticket(ticket) is not None}
@@ -0,0 +1,426 @@
+import base64
+import hashlib
+import json
+import shutil
+import tempfile
+from datetime import timedelta
+from unittest import mock
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from accounts.models import User
+from companies.models import Company
+from jobs.models import Job
+from jobs.worker import Worker
+from . import assignment
+from .duplicates import MAX_TEXT_LENGTH, minhash
+from .models import Attachment, Comment, Ticket, TicketHistory, TicketSignature, TimeSpent
+from .retention import apply_retention
+
+
+class TicketAPITestCase(APITestCase):
+    """
+    A company with one customer, a staff operator, and a scratch MEDIA_ROOT.
+    """
+
+    def setUp(self):
+        cache.clear()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+        self.company = Company.objects.create(name="Acme", initials="AC")
+        self.staff = User.objects.create_user(
+            email="s@example.com", username="s", password="pw", first_name="S", last_name="Taff",
+            is_staff=True, role='staff',
+        )
+        self.user = User.objects.create_user(
+            email="u@example.com", username="u", password="pw", first_name="U", last_name="One",
+            company=self.company,
+        )
+
+    def create_ticket(self, title):
+        self.client.force_authenticate(self.user)
+        response = self.client.post('/tickets/', {'title': title, 'description': f"{title}, please help"})
+        self.assertEqual(response.status_code, 201, response.data)
+        return Ticket.objects.get(pk=response.data['id'])
+
+    def upload(self, ticket, content, name='notes.txt'):
+        return self.client.post(
+            f'/tickets/{ticket.pk}/attachments/',
+            {'file': SimpleUploadedFile(name, content, content_type='text/plain')},
+            format='multipart',
+        )
+
+
+@override_settings(TICKETS={'ASSIGNMENT_STRATEGY': 'least_loaded', 'DUPLICATE_DETECTION': False})
+class TicketMergeTests(TicketAPITestCase):
+    def test_merge_moves_work_and_keeps_each_timeline(self):
+        source = self.create_ticket("Printer jammed")
+        target = self.create_ticket("VPN is down")
+        self.assertEqual(source.assignee_id, self.staff.id)
+        self.client.post(f'/tickets/{source.pk}/comments/', {'message': "Still jammed"})
+        self.assertEqual(self.upload(source, b"paper tray log").status_code, 201)
+        TimeSpent.objects.create(ticket=source, operator=self.staff, minutes=15)
+        source_events = list(TicketHistory.objects.filter(ticket=source).order_by('id').values_list('id', flat=True))
+
+        self.client.force_authenticate(self.staff)
+        response = self.client.post(f'/tickets/{source.pk}/merge/', {'into': str(target.pk)})
+
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(response.data['moved'], {'comments': 1, 'time_entries': 1, 'attachments': 1})
+        self.assertEqual(Comment.objects.get().ticket_id, target.pk)
+        self.assertEqual(TimeSpent.objects.get().ticket_id, target.pk)
+        self.assertEqual(Attachment.objects.get().ticket_id, target.pk)
+
+        source.refresh_from_db()
+        self.assertEqual(source.status, 'closed')
+        source_history = TicketHistory.objects.filter(ticket=source).order_by('id')
+        self.assertEqual(list(source_history.values_list('id', flat=True))[:-1], source_events)
+        self.assertEqual(source_history.last().event_type, 'closed')
+        target_events = list(
+            TicketHistory.objects.filter(ticket=target).order_by('id').values_list('event_type', flat=True)
+        )
+        self.assertEqual(target_events.count('created'), 1)
+        self.assertEqual(target_events.count('assigned'), 1)
+        self.assertEqual(target_events[-1], 'merged')
+
+    def test_only_staff_can_merge(self):
+        source = self.create_ticket("Printer jammed")
+        target = self.create_ticket("VPN is down")
+
+        response = self.client.post(f'/tickets/{source.pk}/merge/', {'into': str(target.pk)})
+
+        self.assertEqual(response.status_code, 403)
+        source.refresh_from_db()
+        self.assertNotEqual(source.status, 'closed')
+
+    def test_cannot_merge_into_itself(self):
+        ticket = self.create_ticket("Printer jammed")
+        self.client.force_authenticate(self.staff)
+
+        response = self.client.post(f'/tickets/{ticket.pk}/merge/', {'into': str(ticket.pk)})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('into', response.data)
+
+
+    def test_merging_a_closed_ticket_keeps_its_status_history(self):
+        source = self.create_ticket("Printer jammed")
+        target = self.create_ticket("VPN is down")
+        Ticket.objects.filter(pk=source.pk).update(status='closed')
+        events = TicketHistory.objects.filter(ticket=source).count()
+
+        self.client.force_authenticate(self.staff)
+        response = self.client.post(f'/tickets/{source.pk}/merge/', {'into': str(target.pk)})
+
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(TicketHistory.objects.filter(ticket=source).count(), events)
+        self.assertTrue(TicketHistory.objects.filter(ticket=target, event_type='merged').exists())
+
+
+@override_settings(TICKETS={'DUPLICATE_DETECTION': False, 'IDEMPOTENCY_WAIT': 5})
+class IdempotentCreateTests(TicketAPITestCase):
+    BODY = {'title': "Printer jammed", 'description': "Help"}
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.user)
+
+    def post(self, key, body=BODY):
+        return self.client.post('/tickets/', body, HTTP_IDEMPOTENCY_KEY=key)
+
+    def cache_key(self, key):
+        return 'idempotency:' + hashlib.sha256(f"{self.user.pk}:/tickets/:{key}".encode()).hexdigest()
+
+    def test_replay_returns_the_stored_response(self):
+        first = self.post('key-1')
+        replay = self.post('key-1')
+
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(replay.status_code, 201)
+        self.assertEqual(replay.data, first.data)
+        self.assertEqual(replay['Idempotent-Replayed'], 'true')
+        self.assertEqual(Ticket.objects.count(), 1)
+
+    def test_same_key_with_another_body_is_422(self):
+        self.post('key-1')
+
+        response = self.post('key-1', {'title': "VPN is down", 'description': "Help"})
+
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(Ticket.objects.count(), 1)
+
+    def test_concurrent_duplicate_waits_for_the_result(self):
+        self.post('key-1')
+        stored = cache.get(self.cache_key('key-1'))
+        # A request with key-2 is in flight elsewhere and finishes while we wait.
+        cache.add(self.cache_key('key-2') + ':lock', True)
+
+        def finish(delay):
+            cache.set(self.cache_key('key-2'), stored)
+
+        with mock.patch('tickets.mixins.time.sleep', side_effect=finish) as sleep:
+            response = self.post('key-2')
+
+        sleep.assert_called_once()
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response['Idempotent-Replayed'], 'true')
+        self.assertEqual(Ticket.objects.count(), 1)
+
+    @override_settings(TICKETS={'DUPLICATE_DETECTION': False, 'IDEMPOTENCY_WAIT': 0})
+    def test_concurrent_duplicate_gets_409_when_the_wait_runs_out(self):
+        cache.add(self.cache_key('key-1') + ':lock', True)
+
+        response = self.post('key-1')
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response['Retry-After'], '1')
+        self.assertFalse(Ticket.objects.exists())
+
+
+@override_settings(TICKETS={'ASSIGNMENT_STRATEGY': 'least_loaded', 'DUPLICATE_DETECTION': False})
+class LeastLoadedAssignmentTests(TicketAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.busy = self.staff
+        self.idle = User.objects.create_user(
+            email="t@example.com", username="t", password="pw", first_name="T", last_name="Wo",
+            is_staff=True, role='staff',
+        )
+        for n in range(2):
+            Ticket.objects.create(
+                title=f"Open {n}", description="Help", created_by=self.user, company=self.company, assignee=self.busy,
+            )
+        Ticket.objects.create(
+            title="Done", description="Help", created_by=self.user, company=self.company, assignee=self.idle,
+            status='resolved',
+        )
+        self.roster = assignment.get_roster()
+
+    def test_new_ticket_goes_to_the_least_loaded_operator(self):
+        self.assertEqual(self.create_ticket("Printer jammed").assignee, self.idle)
+        self.assertEqual(assignment.get_loads(self.roster), {str(self.busy.id): 2, str(self.idle.id): 0})
+
+    def test_counters_follow_assign_and_resolve(self):
+        assignment.get_loads(self.roster)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ticket = self.create_ticket("Printer jammed")
+        self.assertEqual(assignment.get_loads(self.roster)[str(self.idle.id)], 1)
+
+        self.client.force_authenticate(self.staff)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(f'/tickets/{ticket.pk}/', {'status': 'resolved'})
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(assignment.get_loads(self.roster)[str(self.idle.id)], 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(f'/tickets/{ticket.pk}/', {'status': 'open', 'assignee': self.busy.id})
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(assignment.get_loads(self.roster), {str(self.busy.id): 3, str(self.idle.id): 0})
+
+    def test_cold_cache_counts_from_the_database(self):
+        # Another process is seeding the counters: use our own counts, cache nothing.
+        cache.add(assignment.LOADS_PRIMING_KEY, True)
+        self.assertEqual(assignment.get_loads(self.roster), {str(self.busy.id): 2, str(self.idle.id): 0})
+        self.assertIsNone(cache.get(assignment.LOADS_PRIMED_KEY))
+        assignment.adjust_load(str(self.idle.id), 1)
+        self.assertIsNone(cache.get(assignment._load_key(self.idle.id)))
+
+        cache.delete(assignment.LOADS_PRIMING_KEY)
+        assignment.get_loads(self.roster)
+        self.assertTrue(cache.get(assignment.LOADS_PRIMED_KEY))
+        with self.assertNumQueries(0):
+            self.assertEqual(assignment.get_loads(self.roster), {str(self.busy.id): 2, str(self.idle.id): 0})
+
+
+@override_settings(TICKETS={'DUPLICATE_DETECTION': True, 'DUPLICATE_THRESHOLD': 0.5})
+class DuplicateDetectionTests(TicketAPITestCase):
+    DESCRIPTION = "The printer on the second floor jams on every page and shows error E42."
+
+    def test_create_reports_near_duplicates(self):
+        self.client.force_authenticate(self.user)
+        first = self.client.post('/tickets/', {'title': "Printer jams", 'description': self.DESCRIPTION}).data
+        self.assertEqual(first['duplicates'], [])
+
+        response = self.client.post('/tickets/', {'title': "Printer jams again", 'description': self.DESCRIPTION})
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual([d['id'] for d in response.data['duplicates']], [first['id']])
+        self.assertTrue(TicketSignature.objects.filter(ticket_id=response.data['id']).exists())
+
+    def test_update_resigns_ticket_after_commit(self):
+        ticket = self.create_ticket("Printer jammed")
+        self.client.force_authenticate(self.staff)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(f'/tickets/{ticket.pk}/', {'description': self.DESCRIPTION})
+
+        self.assertEqual(response.status_code, 200, response.data)
+        job = Job.objects.get(name='tickets.index_signature')
+        self.assertEqual(job.payload, {'ticket_id': str(ticket.pk)})
+        Worker(worker_id='test').execute(job.id)
+        self.assertEqual(
+            TicketSignature.objects.get(ticket=ticket).minhash, minhash("Printer jammed", self.DESCRIPTION),
+        )
+
+    def test_long_text_is_capped(self):
+        text = "word " * MAX_TEXT_LENGTH
+        self.assertEqual(minhash("", text), minhash("", text + "and a very different ending"))
+
+
+@override_settings(TICKETS={'DUPLICATE_DETECTION': False})
+class WorkQueueTests(TicketAPITestCase):
+    def test_pages_follow_the_cursor(self):
+        created = [self.create_ticket(f"Ticket {n}") for n in range(3)]
+        self.client.force_authenticate(self.staff)
+
+        first = self.client.get('/tickets/queue/', {'page_size': 2})
+        second = self.client.get(first.data['next'])
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(
+            [t['id'] for t in first.data['results'] + second.data['results']], [str(t.pk) for t in created],
+        )
+        self.assertIsNone(second.data['next'])
+
+    def test_malformed_cursors_are_404(self):
+        self.client.force_authenticate(self.staff)
+        for position in ([3, "2024-01-01T00:00:00+00:00", "not-a-uuid"], [3, "yesterday", "x"], [3]):
+            cursor = base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+            with self.subTest(position=position):
+                response = self.client.get('/tickets/queue/', {'cursor': cursor})
+                self.assertEqual(response.status_code, 404)
+        self.assertEqual(self.client.get('/tickets/queue/', {'cursor': '%%%'}).status_code, 404)
+
+@override_settings(TICKETS={'ATTACHMENT_MAX_SIZE': 1000, 'DUPLICATE_DETECTION': False})
+class AttachmentTests(TicketAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.ticket = self.create_ticket("Printer jammed")
+
+    def download(self, attachment_id, **headers):
+        response = self.client.get(
+            f'/tickets/{self.ticket.pk}/attachments/{attachment_id}/download/', headers=headers,
+        )
+        return response, b''.join(response.streaming_content) if response.streaming else response.content
+
+    def test_upload_and_download(self):
+        response = self.upload(self.ticket, b"0123456789")
+        self.assertEqual(response.status_code, 201, response.data)
+
+        download, body = self.download(response.data['id'])
+
+        self.assertEqual(download.status_code, 200)
+        self.assertEqual(body, b"0123456789")
+        self.assertEqual(download['Accept-Ranges'], 'bytes')
+
+    def test_range_request_returns_partial_content(self):
+        attachment_id = self.upload(self.ticket, b"0123456789").data['id']
+
+        response, body = self.download(attachment_id, Range='bytes=2-5')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], 'bytes 2-5/10')
+        self.assertEqual(body, b"2345")
+
+        response, body = self.download(attachment_id, Range='bytes=-3')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(body, b"789")
+
+    def test_unsatisfiable_range(self):
+        attachment_id = self.upload(self.ticket, b"0123456789").data['id']
+
+        response, _ = self.download(attachment_id, Range='bytes=20-30')
+
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], 'bytes */10')
+
+    def test_identical_uploads_share_a_blob(self):
+        first = self.upload(self.ticket, b"same bytes").data['id']
+        second = self.upload(self.ticket, b"same bytes", name='copy.txt').data['id']
+
+        self.assertEqual(
+            Attachment.objects.get(id=first).blob_id, Attachment.objects.get(id=second).blob_id,
+        )
+
+    def test_oversized_upload_is_rejected(self):
+        # Just over the limit: caught by the upload handler while streaming.
+        response = self.upload(self.ticket, b"x" * 1500)
+        self.assertEqual(response.status_code, 413)
+
+        # Far over the limit: refused from Content-Length before reading.
+        response = self.upload(self.ticket, b"x" * 200_000)
+        self.assertEqual(response.status_code, 413)
+
+        self.assertFalse(Attachment.objects.exists())
+
+
+class HistoryRetentionTests(TestCase):
+    def setUp(self):
+        company = Company.objects.create(name="Acme", initials="AC")
+        self.staff = User.objects.create_user(
+            email="s@example.com", username="s", password="pw", first_name="S", last_name="Taff",
+            is_staff=True, role='staff',
+        )
+        self.user = User.objects.create_user(
+            email="u@example.com", username="u", password="pw", first_name="U", last_name="One", company=company,
+        )
+        self.ticket = Ticket.objects.create(title="A", description="Help", created_by=self.user, company=company)
+        TicketHistory.objects.filter(ticket=self.ticket).delete()
+
+    def event(self, event_type, user=None, changes=None, age_days=0):
+        row = TicketHistory.objects.create(
+            ticket=self.ticket, event_type=event_type, user=user or self.staff, changes=changes,
+        )
+        if age_days:
+            TicketHistory.objects.filter(id=row.id).update(changed_at=timezone.now() - timedelta(days=age_days))
+        return row
+
+    def test_update_runs_collapse_into_their_last_row(self):
+        created = self.event('created', user=self.user)
+        self.event('updated', changes={'title': ["A", "B"]})
+        self.event('updated', changes={'title': ["B", "C"], 'priority': ["low", "high"]})
+        last = self.event('updated', changes={'priority': ["high", "medium"]})
+        status_change = self.event('status_change', changes={'status': ["open", "in_progress"]})
+        # Different users: not a run.
+        alone = [self.event('updated', changes={'title': ["C", "D"]}), self.event('updated', user=self.user)]
+
+        report = apply_retention()
+
+        self.assertEqual(report['collapsed_updates'], 2)
+        self.assertGreater(report['bytes'], 0)
+        remaining = list(TicketHistory.objects.order_by('id').values_list('id', flat=True))
+        self.assertEqual(remaining, [created.id, last.id, status_change.id] + [row.id for row in alone])
+        last.refresh_from_db()
+        self.assertEqual(last.changes, {'title': ["A", "C"], 'priority': ["low", "medium"]})
+        self.assertEqual(last.message, "Ticket updated (3 edits)")
+
+    def test_protected_events_survive(self):
+        for event_type in ('created', 'status_change', 'resolved', 'closed'):
+            self.event(event_type, age_days=400)
+            self.event(event_type, age_days=400)
+
+        report = apply_retention(comment_days=0)
+
+        self.assertEqual(report['rows'], 0)
+        self.assertEqual(TicketHistory.objects.count(), 8)
+
+    def test_old_comment_events_are_dropped(self):
+        Comment.objects.create(ticket=self.ticket, author=self.user, message="Old news")
+        old = self.event('comment', user=self.user, age_days=100)
+        recent = self.event('comment', user=self.user, age_days=5)
+
+        dry_run = apply_retention(comment_days=30, collapse=False, dry_run=True)
+        self.assertEqual(dry_run['dropped_comment_events'], 1)
+        self.assertTrue(TicketHistory.objects.filter(id=old.id).exists())
+
+        report = apply_retention(comment_days=30, collapse=False)
+
+        self.assertEqual(report['dropped_comment_events'], 1)
+        self.assertEqual(list(TicketHistory.objects.values_list('id', flat=True)), [recent.id])
+        self.assertTrue(Comment.objects.exists())
@@ -2,17 +2,28 @@ from django.urls import path
 from .views import (
     TicketListCreateView,
     TicketRetrieveUpdateView,
+    TicketWorkQueueView,
+    TicketDuplicatesView,
+    TicketMergeView,
     TicketHistoryListView,
     TicketHistoryRetrieveView,
     TicketCommentListCreateView,
     TicketCommentRetrieveUpdateDestroyView,
+    LatestCommentsView,
     TimeSpentListCreateView,
-    TimeSpentRetrieveUpdateDestroyView
+    TimeSpentRetrieveUpdateDestroyView,
+    TimeSpentBulkCreateView,
+    TicketAttachmentListCreateView,
+    TicketAttachmentRetrieveDestroyView,
+    TicketAttachmentDownloadView,
 )
 
 urlpatterns = [
     path('', TicketListCreateView.as_view(), name='ticket-list-create'),
     path('<uuid:pk>/', TicketRetrieveUpdateView.as_view(), name='ticket-detail'),
+    path('queue/', TicketWorkQueueView.as_view(), name='ticket-work-queue'),
+    path('<uuid:pk>/duplicates/', TicketDuplicatesView.as_view(), name='ticket-duplicates'),
+    path('<uuid:pk>/merge/', TicketMergeView.as_view(), name='ticket-merge'),
     
     # History
     path('<uuid:pk>/history/', TicketHistoryListView.as_view(), name='ticket-history'),
@@ -21,8 +32,15 @@ urlpatterns = [
     # Comments
     path('<uuid:pk>/comments/', TicketCommentListCreateView.as_view(), name='ticket-comments-list-create'),
     path('<uuid:pk>/comments/<int:comment_id>/', TicketCommentRetrieveUpdateDestroyView.as_view(), name='ticket-comment-detail'),
+    path('comments/latest/', LatestCommentsView.as_view(), name='ticket-comments-latest'),
 
     # Time Spent
     path('<uuid:pk>/time-entries/', TimeSpentListCreateView.as_view(), name='time-spent-list-create'),
     path('<uuid:pk>/time-entries/<int:time_id>/', TimeSpentRetrieveUpdateDestroyView.as_view(), name='time-spent-detail'),
+    path('time-entries/bulk/', TimeSpentBulkCreateView.as_view(), name='time-spent-bulk-create'),
+
+    # Attachments
+    path('<uuid:pk>/attachments/', TicketAttachmentListCreateView.as_view(), name='ticket-attachments-list-create'),
+    path('<uuid:pk>/attachments/<int:attachment_id>/', TicketAttachmentRetrieveDestroyView.as_view(), name='ticket-attachment-detail'),
+    path('<uuid:pk>/attachments/<int:attachment_id>/download/', TicketAttachmentDownloadView.as_view(), name='ticket-attachment-download'),
 ]
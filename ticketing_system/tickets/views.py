@@ -1,18 +1,45 @@
-from rest_framework import generics, permissions
+import uuid
+from django.db import transaction
+from django.http import Http404
+from django.db.models import F, Prefetch, Sum, Window
+from django.db.models.functions import RowNumber
+from rest_framework import generics, permissions, status
+from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework.filters import OrderingFilter, SearchFilter
-from rest_framework.exceptions import PermissionDenied
+from rest_framework.filters import SearchFilter
+from rest_framework.exceptions import NotFound, PermissionDenied, ValidationError
+from rest_framework.parsers import MultiPartParser
+from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import extend_schema, OpenApiParameter
-from .models import Ticket, TicketHistory, Comment, TimeSpent
+from .models import Ticket, TicketHistory, TicketSignature, Comment, TimeSpent, Attachment
 from .serializers import (
     TicketSerializer,
     TicketSerializerLight,
+    TicketDetailSerializer,
+    TicketCreateSerializer,
+    DuplicateCandidateSerializer,
+    TicketMergeSerializer,
+    TicketMergeResultSerializer,
+    AttachmentSerializer,
     TicketHistorySerializer,
     CommentSerializer,
-    TimeSpentSerializer
+    LatestCommentsQuerySerializer,
+    TimeSpentSerializer,
+    TimeEntryBatchItemSerializer,
+    TimeEntryBatchSerializer,
+    TimeEntryBatchResultSerializer,
 )
-from .filters import TicketFilter
-from .mixins import StaffOrCompanyFilterMixin
+from .filters import TicketFilter, TicketOrderingFilter
+from .pagination import WorkQueuePagination
+from .mixins import StaffOrCompanyFilterMixin, OptimisticConcurrencyMixin, IdempotentCreateMixin
+from .history import snapshot, record_update
+from .assignment import choose_assignee, record_assignment
+from .conf import tickets_setting
+from .duplicates import find_duplicates, merge_tickets, minhash, store_signature
+from .attachments import CHUNK_SIZE, AttachmentUploadHandler, PayloadTooLarge, release_blobs, serve_blob, store_blob
+from archive.models import ArchivedTicket, ArchivedComment, ArchivedTicketHistory, ArchivedTimeSpent, ArchivedAttachment
+from archive.serializers import ArchivedTicketSerializer
+from jobs.registry import enqueue_unique
 
 
 # ----------------------------------------------------------------------------
@@ -27,109 +54,305 @@ from .mixins import StaffOrCompanyFilterMixin
         OpenApiParameter(name="status", description="Filter by ticket status", required=False, type=str),
     ]
 )
-class TicketListCreateView(StaffOrCompanyFilterMixin, generics.ListCreateAPIView):
+class TicketListCreateView(IdempotentCreateMixin, generics.ListCreateAPIView):
     serializer_class = TicketSerializerLight
     permission_classes = [permissions.IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, OrderingFilter, SearchFilter]
+    query_budget = {'GET': 3}
+    filter_backends = [DjangoFilterBackend, TicketOrderingFilter, SearchFilter]
     filterset_class = TicketFilter
 
     # Optional DRF's ?search= queries
     search_fields = ['title', 'description']
-    ordering_fields = ['priority', 'status', 'created_at', 'updated_at']
+    ordering_fields = ['priority', 'priority_rank', 'status', 'created_at', 'updated_at']
 
     def get_queryset(self):
-        queryset = Ticket.objects.all()
-        return self.filter_tickets_by_company(queryset)
+        return Ticket.objects.visible_to(self.request.user).select_related(
+            'company', 'created_by', 'assignee'
+        ).with_total_time()
     
     def get_serializer_class(self):
         if self.request.method == 'POST':
-            return TicketSerializer
+            return TicketCreateSerializer
         return TicketSerializerLight
 
 
     def perform_create(self, serializer):
         user = self.request.user
-        if user.is_staff:
-            ticket = serializer.save(created_by=user)
-        else:
-            ticket = serializer.save(created_by=user, company=user.company)
+        extra = {'created_by': user}
+        if not user.is_staff:
+            extra['company'] = user.company
+
+        # The duplicate-detection signature is pure CPU work: compute it
+        # before the transaction rather than while holding its locks.
+        detect_duplicates = tickets_setting('DUPLICATE_DETECTION')
+        if detect_duplicates:
+            data = serializer.validated_data
+            signature = minhash(data.get('title', ''), data.get('description', ''))
+
+        with transaction.atomic():
+            # Tickets created without an assignee go to the operator picked by
+            # TICKETS['ASSIGNMENT_STRATEGY'] (see tickets/assignment.py).
+            strategy = None
+            if not serializer.validated_data.get('assignee'):
+                company = extra.get('company') or serializer.validated_data.get('company')
+                assignee_id = choose_assignee(Ticket(company=company))
+                if assignee_id:
+                    serializer.validated_data.pop('assignee', None)
+                    extra['assignee_id'] = assignee_id
+                    strategy = tickets_setting('ASSIGNMENT_STRATEGY')
+
+            ticket = serializer.save(**extra)
 
-        TicketHistory.objects.create(
-            ticket=ticket,
-            event_type="created",
-            message="Ticket created",
-            user=user
-        )
+            TicketHistory.objects.create(
+                ticket=ticket,
+                event_type="created",
+                message="Ticket created",
+                user=user
+            )
+            if ticket.assignee_id:
+                record_assignment(ticket, user, strategy)
+
+            if detect_duplicates:
+                store_signature(ticket, signature, created=True)
+
+        if detect_duplicates:
+            serializer.context['duplicates'] = find_duplicates(ticket, signature)
+
+
+@extend_schema(
+    description=(
+        "Staff work queue: unresolved tickets (open, in progress, pending), most urgent first, "
+        "then oldest first. Paginated with an opaque `cursor`; follow `next` for the following page."
+    ),
+    parameters=[
+        OpenApiParameter(name="assignee", description="`me`, `none` (unassigned) or a user id", required=False, type=str),
+        OpenApiParameter(name="cursor", description="Position returned in `next`", required=False, type=str),
+        OpenApiParameter(name="page_size", description="Tickets per page (default 20, max 100)", required=False, type=int),
+    ],
+)
+class TicketWorkQueueView(generics.ListAPIView):
+    serializer_class = TicketSerializerLight
+    permission_classes = [permissions.IsAuthenticated]
+    query_budget = 2
+    pagination_class = WorkQueuePagination
+    filter_backends = []
+
+    def get_queryset(self):
+        if not self.request.user.is_staff:
+            raise PermissionDenied("Only staff can read the work queue.")
+        # Matches the partial indexes on (assignee,) priority_rank, created_at.
+        queryset = Ticket.objects.filter(status__in=Ticket.UNRESOLVED_STATUSES).select_related(
+            'company', 'created_by', 'assignee'
+        ).with_total_time()
+        assignee = self.request.query_params.get('assignee')
+        if assignee == 'me':
+            queryset = queryset.filter(assignee=self.request.user)
+        elif assignee == 'none':
+            queryset = queryset.filter(assignee__isnull=True)
+        elif assignee:
+            try:
+                queryset = queryset.filter(assignee_id=uuid.UUID(assignee))
+            except ValueError:
+                raise ValidationError({'assignee': "Expected `me`, `none` or a user id."})
+        return queryset
 
 
 @extend_schema(
-    description="Retrieve or update a single ticket. Staff users can see all tickets, while regular users see only their company's tickets.",
+    description=(
+        "Retrieve or update a single ticket. Staff users can see all tickets, while regular users see only their company's tickets. "
+        "On GET, `include` embeds the latest comments, history events and/or time entries in the same response."
+    ),
+    parameters=[
+        OpenApiParameter(name="include", description="GET only. Comma-separated list of comments, history, time_entries", required=False, type=str),
+        OpenApiParameter(name="include_limit", description="GET only. Maximum items per embedded collection (default 20, max 100)", required=False, type=int),
+    ],
     responses={
-        200: TicketSerializer,
+        200: TicketDetailSerializer,
         400: {"description": "Bad request, validation error."},
         403: {"description": "Permission denied."},
-        404: {"description": "Ticket not found."}
+        404: {"description": "Ticket not found."},
+        409: {"description": "Version conflict: the ticket was modified since the version sent in If-Match (or `version`)."}
     }
 )
-class TicketRetrieveUpdateView(StaffOrCompanyFilterMixin, generics.RetrieveUpdateAPIView):
+class TicketRetrieveUpdateView(OptimisticConcurrencyMixin, generics.RetrieveUpdateAPIView):
     serializer_class = TicketSerializer
     permission_classes = [permissions.IsAuthenticated]
+    query_budget = {'GET': 6, 'PUT': 18, 'PATCH': 18}
+    include_limit = 20
+    max_include_limit = 100
+
+    def get_serializer_class(self):
+        if self.request.method == 'GET':
+            return TicketDetailSerializer
+        return TicketSerializer
+
+    def get_includes(self):
+        """
+        Parse ?include= into a tuple of child collections to embed.
+        """
+        if getattr(self, 'swagger_fake_view', False) or self.request.method != 'GET':
+            return ()
+        raw = self.request.query_params.get('include', '')
+        includes = tuple(dict.fromkeys(name.strip() for name in raw.split(',') if name.strip()))
+        unknown = [name for name in includes if name not in TicketDetailSerializer.INCLUDES]
+        if unknown:
+            raise ValidationError({'include': f"Unknown collection(s): {', '.join(unknown)}."})
+        return includes
+
+    def get_include_limit(self):
+        raw = self.request.query_params.get('include_limit')
+        if raw is None:
+            return self.include_limit
+        try:
+            limit = int(raw)
+        except ValueError:
+            raise ValidationError({'include_limit': "A valid integer is required."})
+        if not 1 <= limit <= self.max_include_limit:
+            raise ValidationError({'include_limit': f"Must be between 1 and {self.max_include_limit}."})
+        return limit
+
+    def get_include_prefetches(self, includes):
+        """
+        One bounded Prefetch per requested collection, newest first, so the
+        response costs one query per collection whatever the ticket's size.
+        """
+        limit = self.get_include_limit()
+        querysets = {
+            'comments': Comment.objects.select_related('author').order_by('-created_at', '-id'),
+            'history': TicketHistory.objects.select_related('user').order_by('-changed_at', '-id'),
+            'time_entries': TimeSpent.objects.select_related('operator').order_by('-created_at', '-id'),
+        }
+        return [
+            Prefetch(name, queryset=querysets[name][:limit], to_attr=f'included_{name}')
+            for name in includes
+        ]
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['include'] = self.get_includes()
+        return context
 
     def get_queryset(self):
-        queryset = Ticket.objects.all()
-        return self.filter_tickets_by_company(queryset)
+        queryset = Ticket.objects.visible_to(self.request.user).select_related('company', 'created_by', 'assignee')
+        includes = self.get_includes()
+        if includes:
+            queryset = queryset.prefetch_related(*self.get_include_prefetches(includes))
+        return queryset
 
+    def retrieve(self, request, *args, **kwargs):
+        try:
+            return super().retrieve(request, *args, **kwargs)
+        except Http404:
+            # Closed tickets may have been moved to the archive tables.
+            archived = self.get_archived_ticket()
+            if archived is None:
+                raise
+            return Response(ArchivedTicketSerializer(archived, context=self.get_serializer_context()).data)
+
+    def get_archived_ticket(self):
+        """
+        The archived ticket named in the URL with its newest children, each
+        collection bounded by include_limit like the embedded ones above.
+        """
+        limit = self.get_include_limit()
+        children = {
+            'comments': ArchivedComment.objects.select_related('author').order_by('-created_at', '-id'),
+            'history': ArchivedTicketHistory.objects.select_related('user').order_by('-changed_at', '-id'),
+            'time_entries': ArchivedTimeSpent.objects.select_related('operator').order_by('-created_at', '-id'),
+            'attachments': ArchivedAttachment.objects.select_related('blob').order_by('-created_at', '-id'),
+        }
+        queryset = (
+            ArchivedTicket.objects.select_related('company', 'created_by', 'assignee')
+            .annotate(total_minutes=Sum('time_entries__minutes'))
+            .prefetch_related(*(Prefetch(name, queryset=child[:limit], to_attr=f'included_{name}') for name, child in children.items()))
+        )
+        return queryset.visible_to(self.request.user).filter(pk=self.kwargs['pk']).first()
+
+    @transaction.atomic
     def perform_update(self, serializer):
-        user = self.request.user
-        ticket = self.get_object()
-        old_status = ticket.status
-
-        updated_ticket = serializer.save(company=user.company if not user.is_staff else ticket.company)
-
-        if old_status != updated_ticket.status:
-            if updated_ticket.status == "closed":
-                TicketHistory.objects.create(
-                    ticket=updated_ticket,
-                    event_type="closed",
-                    previous_status=old_status,
-                    new_status=updated_ticket.status,
-                    message="Ticket closed",
-                    user=user
-                )
-            elif updated_ticket.status == "resolved":
-                TicketHistory.objects.create(
-                    ticket=updated_ticket,
-                    event_type="resolved",
-                    previous_status=old_status,
-                    new_status=updated_ticket.status,
-                    message="Ticket resolved",
-                    user=user
-                )
-            else:
-                TicketHistory.objects.create(
-                    ticket=updated_ticket,
-                    event_type="status_change",
-                    previous_status=old_status,
-                    new_status=updated_ticket.status,
-                    message="Status changed",
-                    user=user
-                )
-        else:
-            # Log a generic update event
-            TicketHistory.objects.create(
-                ticket=updated_ticket,
-                event_type="updated",
-                message="Ticket updated",
-                user=user
+        # The instance was already loaded (and permission-checked) by update();
+        # snapshot it instead of fetching the ticket a second time.
+        ticket = serializer.instance
+        before = snapshot(ticket)
+
+        # The company never changes on update; the queryset already limited
+        # non-staff users to their own company's tickets.
+        updated_ticket = serializer.save(company=ticket.company)
+        record_update(updated_ticket, before, self.request.user)
+        if tickets_setting('DUPLICATE_DETECTION') and (
+            'title' in serializer.validated_data or 'description' in serializer.validated_data
+        ):
+            # Re-signed by a worker, outside this transaction.
+            transaction.on_commit(
+                lambda: enqueue_unique('tickets.index_signature', {'ticket_id': str(updated_ticket.pk)})
             )
 
 
+@extend_schema(
+    description=(
+        "Recent unresolved tickets of the same company whose title and description look like this "
+        "ticket's, most similar first."
+    ),
+)
+class TicketDuplicatesView(StaffOrCompanyFilterMixin, generics.ListAPIView):
+    serializer_class = DuplicateCandidateSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = None
+
+    def get_queryset(self):
+        if getattr(self, 'swagger_fake_view', False):
+            return Ticket.objects.none()
+        ticket = self.get_ticket()
+        signature = getattr(TicketSignature.objects.filter(ticket=ticket).first(), 'minhash', None)
+        return find_duplicates(ticket, signature)
+
+
+@extend_schema(
+    description=(
+        "Merge this ticket into another one of the same company (staff only): its comments, time entries "
+        "and attachments move to the target, and this ticket is closed as a duplicate. Each ticket keeps its "
+        "own history; the target records a `merged` event."
+    ),
+    request=TicketMergeSerializer,
+    responses={200: TicketMergeResultSerializer},
+)
+class TicketMergeView(StaffOrCompanyFilterMixin, generics.GenericAPIView):
+    serializer_class = TicketMergeSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        if not request.user.is_staff:
+            raise PermissionDenied("Only staff can merge tickets.")
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        source = self.get_ticket()
+        target_id = serializer.validated_data['into']
+        if target_id == source.pk:
+            raise ValidationError({'into': "A ticket cannot be merged into itself."})
+        target = Ticket.objects.select_related('company', 'created_by', 'assignee').filter(pk=target_id).first()
+        if target is None:
+            raise ValidationError({'into': "Ticket not found."})
+        if target.company_id != source.company_id:
+            raise ValidationError({'into': "Only tickets of the same company can be merged."})
+
+        moved = merge_tickets(source, target, request.user)
+        data = {
+            'ticket': TicketSerializer(target, context=self.get_serializer_context()).data,
+            'moved': moved,
+        }
+        return Response(data)
+
+
 # ----------------------------------------------------------------------------
 #  TICKET HISTORY
 # ----------------------------------------------------------------------------
 
 @extend_schema(
-    description="Retrieve a list of status changes for a given ticket."
+    description="Retrieve a list of status changes for a given ticket.",
+    parameters=[
+        OpenApiParameter(name="field", description="Only events that changed this field (status, priority, type, title or assignee)", required=False, type=str),
+    ]
 )
 class TicketHistoryListView(StaffOrCompanyFilterMixin, generics.ListAPIView):
     """
@@ -138,10 +361,15 @@ class TicketHistoryListView(StaffOrCompanyFilterMixin, generics.ListAPIView):
     """
     serializer_class = TicketHistorySerializer
     permission_classes = [permissions.IsAuthenticated]
+    query_budget = 3
 
     def get_queryset(self):
-        queryset = TicketHistory.objects.select_related('ticket')
+        queryset = TicketHistory.objects.select_related('user')
         queryset = self.filter_by_ticket_company(queryset, ticket_id_field='pk')
+
+        field = self.request.query_params.get('field')
+        if field:
+            queryset = queryset.filter(changes__has_key=field)
         return queryset.order_by('-changed_at')
     
 
@@ -152,12 +380,13 @@ class TicketHistoryRetrieveView(StaffOrCompanyFilterMixin, generics.RetrieveAPIV
     """
     serializer_class = TicketHistorySerializer
     permission_classes = [permissions.IsAuthenticated]
+    query_budget = 2
 
     lookup_url_kwarg = 'history_id'
     lookup_field = 'id'
 
     def get_queryset(self):
-        queryset = TicketHistory.objects.all()
+        queryset = TicketHistory.objects.select_related('user')
         queryset = self.filter_by_ticket_company(queryset, ticket_id_field='pk')
 
         history_id = self.kwargs['history_id']
@@ -171,34 +400,28 @@ class TicketHistoryRetrieveView(StaffOrCompanyFilterMixin, generics.RetrieveAPIV
 @extend_schema(
     description="Retrieve a list of comments for a given ticket or create a new comment."
 )
-class TicketCommentListCreateView(StaffOrCompanyFilterMixin, generics.ListCreateAPIView):
+class TicketCommentListCreateView(IdempotentCreateMixin, StaffOrCompanyFilterMixin, generics.ListCreateAPIView):
     """
     - GET: list all comments for a given ticket
     - POST: create a new comment on that ticket
     """
     serializer_class = CommentSerializer
     permission_classes = [permissions.IsAuthenticated]
+    query_budget = {'GET': 3, 'POST': 12}
 
     def get_queryset(self):
-        queryset = Comment.objects.select_related('ticket', 'author')
+        queryset = Comment.objects.select_related('author')
         queryset = self.filter_by_ticket_company(queryset, ticket_id_field='pk')
         return queryset.order_by('created_at')
 
+    @transaction.atomic
     def perform_create(self, serializer):
         """
         Ties the new comment to the specified ticket and the request.user.
         """
         user = self.request.user
-        ticket_id = self.kwargs['pk']
-
-        # Check the ticket exists and belongs to user.company (unless staff)
-        try:
-            if user.is_staff:
-                ticket = Ticket.objects.get(id=ticket_id)
-            else:
-                ticket = Ticket.objects.get(id=ticket_id, company=user.company)
-        except Ticket.DoesNotExist:
-            raise generics.exceptions.NotFound("Ticket not found or you don't have permission.")
+        # 404 unless the ticket exists and belongs to user.company (or user is staff)
+        ticket = self.get_ticket()
 
         # Now create the comment
         serializer.save(author=user, ticket=ticket)
@@ -211,10 +434,43 @@ class TicketCommentListCreateView(StaffOrCompanyFilterMixin, generics.ListCreate
         )
 
 
+@extend_schema(
+    description=(
+        "Latest comments of many tickets in one call: for every id in `tickets`, up to `limit` comments, "
+        "newest first, keyed by ticket id. Tickets you cannot see come back with an empty list."
+    ),
+    parameters=[LatestCommentsQuerySerializer],
+    responses={200: {"type": "object", "additionalProperties": {"type": "array", "items": {"$ref": "#/components/schemas/Comment"}}}},
+)
+class LatestCommentsView(StaffOrCompanyFilterMixin, generics.GenericAPIView):
+    serializer_class = CommentSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    query_budget = 2
+    pagination_class = None
+
+    def get(self, request, *args, **kwargs):
+        params = LatestCommentsQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        ticket_ids = params.validated_data['tickets']
+        limit = params.validated_data['limit']
+
+        # One windowed query: number each ticket's comments newest first
+        # and keep the first `limit` of every partition.
+        queryset = self.filter_by_ticket_ids_company(Comment.objects.select_related('author'), ticket_ids)
+        queryset = queryset.annotate(
+            row_number=Window(RowNumber(), partition_by=F('ticket_id'), order_by=F('created_at').desc())
+        ).filter(row_number__lte=limit).order_by('ticket_id', 'row_number')
+
+        data = {str(ticket_id): [] for ticket_id in ticket_ids}
+        for comment in self.get_serializer(queryset, many=True).data:
+            data[str(comment['ticket'])].append(comment)
+        return Response(data)
+
+
 @extend_schema(
     description="Retrieve a single comment, update it, or delete it."
 )
-class TicketCommentRetrieveUpdateDestroyView(StaffOrCompanyFilterMixin, generics.RetrieveUpdateDestroyAPIView):
+class TicketCommentRetrieveUpdateDestroyView(OptimisticConcurrencyMixin, StaffOrCompanyFilterMixin, generics.RetrieveUpdateDestroyAPIView):
     """
     - GET a single comment
     - PUT/PATCH to edit it (maybe only staff or the original author)
@@ -222,12 +478,13 @@ class TicketCommentRetrieveUpdateDestroyView(StaffOrCompanyFilterMixin, generics
     """
     serializer_class = CommentSerializer
     permission_classes = [permissions.IsAuthenticated]
+    query_budget = {'GET': 2}
 
     lookup_url_kwarg = 'comment_id'
     lookup_field = 'id'
 
     def get_queryset(self):
-        queryset = Comment.objects.all()
+        queryset = Comment.objects.select_related('author')
         # Filter by the ticket's UUID (pk) using the mixin
         queryset = self.filter_by_ticket_company(queryset, ticket_id_field='pk')
 
@@ -238,15 +495,15 @@ class TicketCommentRetrieveUpdateDestroyView(StaffOrCompanyFilterMixin, generics
     def perform_update(self, serializer):
         # Optionally enforce that only the 'author' or staff can edit
         if not self.request.user.is_staff:
-            comment = self.get_object()
-            if comment.author != self.request.user:
+            comment = serializer.instance
+            if comment.author_id != self.request.user.id:
                 raise generics.exceptions.PermissionDenied("You cannot edit someone else's comment.")
         serializer.save()
 
     def perform_destroy(self, instance):
         # Same check if you want
         if not self.request.user.is_staff:
-            if instance.author != self.request.user:
+            if instance.author_id != self.request.user.id:
                 raise generics.exceptions.PermissionDenied("You cannot delete someone else's comment.")
         instance.delete()
 
@@ -258,12 +515,14 @@ class TicketCommentRetrieveUpdateDestroyView(StaffOrCompanyFilterMixin, generics
 @extend_schema(
     description="Retrieve a list of time entries for a given ticket or create a new time entry."
 )
-class TimeSpentListCreateView(StaffOrCompanyFilterMixin, generics.ListCreateAPIView):
+class TimeSpentListCreateView(IdempotentCreateMixin, StaffOrCompanyFilterMixin, generics.ListCreateAPIView):
     serializer_class = TimeSpentSerializer
     permission_classes = [permissions.IsAuthenticated]
+    query_budget = {'GET': 3, 'POST': 3}
+    throttle_budgets = {'write': 'time_entry_write'}
 
     def get_queryset(self):
-        queryset = TimeSpent.objects.select_related('ticket', 'operator')
+        queryset = TimeSpent.objects.select_related('operator')
         queryset = self.filter_by_ticket_company(queryset, ticket_id_field='pk')
         return queryset.order_by('-created_at')
 
@@ -272,23 +531,93 @@ class TimeSpentListCreateView(StaffOrCompanyFilterMixin, generics.ListCreateAPIV
         if not self.request.user.is_staff:
             raise PermissionDenied("Only staff can log time.")
 
-        ticket_id = self.kwargs['pk']
-        ticket = Ticket.objects.get(id=ticket_id)  # staff can see all tickets
+        ticket = self.get_ticket()  # staff can see all tickets
         serializer.save(ticket=ticket, operator=self.request.user)
 
 
+@extend_schema(
+    description=(
+        "Log many time entries at once (staff only). Every item is validated on its own: valid items are "
+        "created, invalid ones are reported under `errors` with their index. Returns 201 when every item "
+        "was created, 207 when only some were, 400 when none were."
+    ),
+    request=TimeEntryBatchSerializer,
+    responses={201: TimeEntryBatchResultSerializer, 207: TimeEntryBatchResultSerializer, 400: TimeEntryBatchResultSerializer},
+)
+class TimeSpentBulkCreateView(generics.GenericAPIView):
+    serializer_class = TimeEntryBatchSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    throttle_budgets = {'write': 'time_entry_write'}
+
+    def post(self, request, *args, **kwargs):
+        if not request.user.is_staff:
+            raise PermissionDenied("Only staff can log time.")
+
+        batch = self.get_serializer(data=request.data)
+        batch.is_valid(raise_exception=True)
+
+        errors, valid = [], []
+        for index, item in enumerate(batch.validated_data['entries']):
+            item_serializer = TimeEntryBatchItemSerializer(data=item)
+            if item_serializer.is_valid():
+                valid.append((index, item_serializer.validated_data))
+            else:
+                errors.append({'index': index, 'errors': item_serializer.errors})
+
+        # One query to validate every referenced ticket.
+        ticket_ids = {item['ticket'] for _, item in valid}
+        known = set(
+            Ticket.objects.visible_to(request.user).filter(id__in=ticket_ids).values_list('id', flat=True)
+        )
+
+        entries = []
+        for index, item in valid:
+            if item['ticket'] not in known:
+                errors.append({'index': index, 'errors': {'ticket': ["Ticket not found."]}})
+                continue
+            entry = TimeSpent(ticket_id=item['ticket'], operator=request.user, minutes=item['minutes'])
+            if 'date' in item:
+                entry.spent_on = item['date']
+            entries.append(entry)
+
+        with transaction.atomic():
+            created = TimeSpent.objects.bulk_create(entries)
+
+        # Recompute the totals of every affected ticket in a single aggregate.
+        totals = {
+            str(row['ticket_id']): row['total']
+            for row in TimeSpent.objects.filter(ticket_id__in={entry.ticket_id for entry in created})
+            .values('ticket_id').annotate(total=Sum('minutes')).order_by()
+        }
+
+        errors.sort(key=lambda error: error['index'])
+        if not created:
+            response_status = status.HTTP_400_BAD_REQUEST
+        elif errors:
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_201_CREATED
+        data = {
+            'created': TimeSpentSerializer(created, many=True, context=self.get_serializer_context()).data,
+            'errors': errors,
+            'totals': totals,
+        }
+        return Response(data, status=response_status)
+
+
 @extend_schema(
     description="Retrieve a single time entry, update it, or delete it."
 )
 class TimeSpentRetrieveUpdateDestroyView(StaffOrCompanyFilterMixin, generics.RetrieveUpdateDestroyAPIView):
     serializer_class = TimeSpentSerializer
     permission_classes = [permissions.IsAuthenticated]
+    query_budget = {'GET': 2}
 
     lookup_url_kwarg = 'time_id'
     lookup_field = 'id'
 
     def get_queryset(self):
-        queryset = TimeSpent.objects.all()
+        queryset = TimeSpent.objects.select_related('operator')
         # Filter by the ticket's UUID (pk) using the mixin
         queryset = self.filter_by_ticket_company(queryset, ticket_id_field='pk')
 
@@ -305,3 +634,113 @@ class TimeSpentRetrieveUpdateDestroyView(StaffOrCompanyFilterMixin, generics.Ret
         if not self.request.user.is_staff:
             raise PermissionDenied("Only staff can delete time entries.")
         instance.delete()
+
+
+# ----------------------------------------------------------------------------
+#  ATTACHMENTS
+# ----------------------------------------------------------------------------
+
+@extend_schema(
+    description=(
+        "List the files attached to a ticket, or upload one (multipart, field `file`, optional `comment`). "
+        "Uploads are streamed to disk and deduplicated by content; files over the configured limit get a 413."
+    ),
+)
+class TicketAttachmentListCreateView(StaffOrCompanyFilterMixin, generics.ListCreateAPIView):
+    serializer_class = AttachmentSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    parser_classes = [MultiPartParser]
+
+    def get_queryset(self):
+        if getattr(self, 'swagger_fake_view', False):
+            return Attachment.objects.none()
+        return self.filter_by_ticket_company(Attachment.objects.select_related('blob'))
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.request is not None and self.request.method == 'POST':
+            context['ticket'] = self.get_ticket()
+        return context
+
+    def initialize_request(self, request, *args, **kwargs):
+        # Installed before authentication: SessionAuthentication's CSRF check
+        # reads request.POST, which parses the whole body with whatever
+        # handlers are in place at that point.
+        if request.method == 'POST':
+            self.upload_handler = AttachmentUploadHandler(request)
+            request.upload_handlers = [self.upload_handler]
+        return super().initialize_request(request, *args, **kwargs)
+
+    def create(self, request, *args, **kwargs):
+        # Resolve the ticket (or 404) before reading a possibly large body.
+        self.get_ticket()
+        max_size = tickets_setting('ATTACHMENT_MAX_SIZE')
+        if int(request.META.get('CONTENT_LENGTH') or 0) > max_size + CHUNK_SIZE:
+            raise PayloadTooLarge(f"Attachments are limited to {max_size} bytes.")
+        request.data  # parse now (unless the CSRF check did), streaming the file through the handler
+        if self.upload_handler.too_large:
+            raise PayloadTooLarge(f"Attachments are limited to {max_size} bytes.")
+        return super().create(request, *args, **kwargs)
+
+    @transaction.atomic
+    def perform_create(self, serializer):
+        uploaded = serializer.validated_data.pop('file')
+        serializer.save(
+            ticket=self.get_ticket(),
+            blob=store_blob(uploaded),
+            filename=uploaded.name[:255],
+            content_type=(uploaded.content_type or 'application/octet-stream')[:100],
+            uploaded_by=self.request.user,
+        )
+
+
+@extend_schema(
+    description="Retrieve an attachment's metadata, or delete it (its uploader or staff)."
+)
+class TicketAttachmentRetrieveDestroyView(StaffOrCompanyFilterMixin, generics.RetrieveDestroyAPIView):
+    serializer_class = AttachmentSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    lookup_url_kwarg = 'attachment_id'
+    lookup_field = 'id'
+
+    def get_queryset(self):
+        return self.filter_by_ticket_company(Attachment.objects.select_related('blob'))
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        if not self.request.user.is_staff and instance.uploaded_by_id != self.request.user.id:
+            raise PermissionDenied("You cannot delete someone else's attachment.")
+        instance.delete()
+        release_blobs([instance.blob_id])
+
+
+@extend_schema(
+    description=(
+        "Download an attachment. Supports `Range: bytes=...` (206 Partial Content) for resuming large files, "
+        "and `If-None-Match` with the returned ETag."
+    ),
+    responses={(200, 'application/octet-stream'): OpenApiTypes.BINARY, (206, 'application/octet-stream'): OpenApiTypes.BINARY},
+)
+class TicketAttachmentDownloadView(StaffOrCompanyFilterMixin, generics.GenericAPIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def perform_content_negotiation(self, request, force=False):
+        # The file is sent as is whatever the Accept header says; only
+        # errors go through the JSON renderer.
+        return super().perform_content_negotiation(request, force=True)
+
+    def get(self, request, *args, **kwargs):
+        queryset = self.filter_by_ticket_company(Attachment.objects.select_related('blob'))
+        attachment = queryset.filter(id=self.kwargs['attachment_id']).first()
+        if attachment is None:
+            # Attachments of archived tickets stay downloadable.
+            attachment = (
+                ArchivedAttachment.objects.select_related('blob')
+                .filter(id=self.kwargs['attachment_id'], ticket_id=self.kwargs['pk'])
+                .filter(ticket__in=ArchivedTicket.objects.visible_to(request.user))
+                .first()
+            )
+        if attachment is None:
+            raise NotFound("Attachment not found or you don't have permission.")
+        return serve_blob(request, attachment.blob, attachment.filename, attachment.content_type)
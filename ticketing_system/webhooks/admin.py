@@ -0,0 +1,21 @@
+from django.contrib import admin
+from tickets.admin_tools import LargeTableAdmin
+from .models import WebhookEndpoint, WebhookDelivery
+
+
+@admin.register(WebhookEndpoint)
+class WebhookEndpointAdmin(admin.ModelAdmin):
+    list_display = ('id', 'company', 'url', 'is_active', 'max_in_flight', 'created_at')
+    list_select_related = ('company',)
+    autocomplete_fields = ('company',)
+    raw_id_fields = ('created_by',)
+    search_fields = ('url', 'company__name')
+    list_filter = ('is_active',)
+
+
+@admin.register(WebhookDelivery)
+class WebhookDeliveryAdmin(LargeTableAdmin):
+    list_display = ('id', 'endpoint', 'event_type', 'status', 'attempts', 'response_status', 'created_at', 'delivered_at')
+    list_select_related = ('endpoint__company',)
+    list_filter = ('status', 'event_type')
+    raw_id_fields = ('endpoint', 'history')
@@ -0,0 +1,21 @@
+from django.conf import settings
+
+DEFAULTS = {
+    'TIMEOUT': 5,
+    'BATCH_SIZE': 20,
+    'WORKERS': 8,
+    'MAX_IN_FLIGHT': 4,
+    'MAX_ATTEMPTS': 10,
+    'BACKOFF_BASE': 10,
+    'BACKOFF_MAX': 3600,
+    'LOCK_TIMEOUT': 300,
+    'ALLOW_HTTP': False,
+    'ALLOW_PRIVATE_ADDRESSES': False,
+}
+
+
+def webhooks_setting(name):
+    """
+    Read a value from settings.WEBHOOKS, falling back to the defaults above.
+    """
+    return getattr(settings, 'WEBHOOKS', {}).get(name, DEFAULTS[name])
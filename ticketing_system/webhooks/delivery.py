@@ -0,0 +1,217 @@
+import hashlib
+import hmac
+import json
+import logging
+import os
+import random
+import socket
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import timedelta
+from itertools import zip_longest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count, F, Min
+from django.utils import timezone
+from jobs.registry import enqueue_unique
+from notifications.transport import HTTPConnectionPool
+from .conf import webhooks_setting
+from .metrics import record_delivery
+from .models import WebhookEndpoint, WebhookDelivery
+from .validators import UnsafeURL, check_url
+
+logger = logging.getLogger(__name__)
+
+
+def sign(secret, timestamp, body):
+    """
+    HMAC-SHA256 over "<timestamp>.<body>". Receivers recompute it with their
+    copy of the secret and reject stale timestamps to prevent replays.
+    """
+    message = f"{timestamp}.".encode() + body
+    return hmac.new(secret.encode(), message, hashlib.sha256).hexdigest()
+
+
+def backoff_delay(attempts):
+    """
+    Exponential backoff with jitter, capped at BACKOFF_MAX seconds.
+    """
+    ceiling = min(webhooks_setting('BACKOFF_BASE') * (2 ** max(attempts - 1, 0)), webhooks_setting('BACKOFF_MAX'))
+    return timedelta(seconds=random.uniform(ceiling / 2, ceiling))
+
+
+def requeue_stale_deliveries():
+    """
+    Deliveries left in flight by a crashed worker go back to pending.
+    """
+    cutoff = timezone.now() - timedelta(seconds=webhooks_setting('LOCK_TIMEOUT'))
+    return WebhookDelivery.objects.filter(
+        status=WebhookDelivery.STATUS_IN_FLIGHT,
+        locked_at__lt=cutoff,
+    ).update(status=WebhookDelivery.STATUS_PENDING, locked_by='', locked_at=None)
+
+
+def claim(endpoint, limit, worker_id):
+    now = timezone.now()
+    ids = list(
+        WebhookDelivery.objects.filter(
+            endpoint=endpoint,
+            status=WebhookDelivery.STATUS_PENDING,
+            next_attempt_at__lte=now,
+        ).order_by('id').values_list('id', flat=True)[:limit]
+    )
+    WebhookDelivery.objects.filter(id__in=ids, status=WebhookDelivery.STATUS_PENDING).update(
+        status=WebhookDelivery.STATUS_IN_FLIGHT,
+        locked_by=worker_id,
+        locked_at=now,
+    )
+    return list(
+        WebhookDelivery.objects.filter(id__in=ids, status=WebhookDelivery.STATUS_IN_FLIGHT, locked_by=worker_id)
+        .order_by('id')
+    )
+
+
+def send_batch(pool, endpoint, deliveries):
+    """
+    POST one batch to its endpoint. Runs in a pool thread and does no
+    database work; returns (status_code, error, seconds).
+    """
+    body = json.dumps(
+        {'deliveries': [dict(delivery.payload, id=delivery.id) for delivery in deliveries]},
+        cls=DjangoJSONEncoder,
+    ).encode()
+    timestamp = str(int(time.time()))
+    headers = {
+        'Content-Type': 'application/json',
+        'X-Webhook-Timestamp': timestamp,
+        'X-Webhook-Signature': f"sha256={sign(endpoint.secret, timestamp, body)}",
+    }
+    started = time.monotonic()
+    try:
+        check_url(endpoint.url)
+    except UnsafeURL as exc:
+        return None, f"Blocked: {exc}", 0.0
+    try:
+        status, _ = pool.request('POST', endpoint.url, body=body, headers=headers)
+    except Exception as exc:
+        return None, str(exc) or exc.__class__.__name__, time.monotonic() - started
+    error = '' if 200 <= status < 300 else f"HTTP {status}"
+    return status, error, time.monotonic() - started
+
+
+def _apply_result(deliveries, status, error):
+    now = timezone.now()
+    ids = [delivery.id for delivery in deliveries]
+    if not error:
+        WebhookDelivery.objects.filter(id__in=ids).update(
+            status=WebhookDelivery.STATUS_DELIVERED,
+            attempts=F('attempts') + 1,
+            response_status=status,
+            last_error='',
+            delivered_at=now,
+            locked_by='',
+            locked_at=None,
+        )
+        return len(ids), 0, 0
+
+    # One UPDATE per outcome: the ones out of attempts fail, the rest go
+    # back to pending with a backoff by attempt count (usually one group,
+    # as a batch's deliveries tend to have been retried together).
+    by_attempts = defaultdict(list)
+    for delivery in deliveries:
+        by_attempts[delivery.attempts + 1].append(delivery.id)
+    max_attempts = webhooks_setting('MAX_ATTEMPTS')
+    outcome = {
+        'attempts': F('attempts') + 1,
+        'response_status': status,
+        'last_error': error,
+        'locked_by': '',
+        'locked_at': None,
+    }
+    failed_ids = [id_ for attempts, group in by_attempts.items() if attempts >= max_attempts for id_ in group]
+    if failed_ids:
+        WebhookDelivery.objects.filter(id__in=failed_ids).update(status=WebhookDelivery.STATUS_FAILED, **outcome)
+    retried = 0
+    for attempts, group in by_attempts.items():
+        if attempts < max_attempts:
+            WebhookDelivery.objects.filter(id__in=group).update(
+                status=WebhookDelivery.STATUS_PENDING, next_attempt_at=now + backoff_delay(attempts), **outcome,
+            )
+            retried += len(group)
+    return 0, retried, len(failed_ids)
+
+
+def deliver_pending():
+    """
+    Deliver due webhook events, batched per endpoint.
+
+    Each endpoint gets at most `max_in_flight` concurrent requests (capped by
+    WEBHOOKS['MAX_IN_FLIGHT'], counting batches other workers already have
+    in flight), and batches are interleaved across endpoints, so a slow
+    receiver only ever ties up its own share of the thread pool. The next
+    run is scheduled as soon as this one's batches are submitted.
+    """
+    requeue_stale_deliveries()
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    batch_size = webhooks_setting('BATCH_SIZE')
+    now = timezone.now()
+
+    in_flight = dict(
+        WebhookDelivery.objects.filter(status=WebhookDelivery.STATUS_IN_FLIGHT)
+        .values('endpoint').annotate(count=Count('id')).values_list('endpoint', 'count')
+    )
+    due_endpoints = WebhookEndpoint.objects.filter(
+        is_active=True,
+        deliveries__status=WebhookDelivery.STATUS_PENDING,
+        deliveries__next_attempt_at__lte=now,
+    ).distinct()
+
+    # Rows saved before the cap existed (or edited in the admin) are held to it too.
+    max_in_flight = webhooks_setting('MAX_IN_FLIGHT')
+    per_endpoint = []
+    for endpoint in due_endpoints:
+        capacity = min(endpoint.max_in_flight, max_in_flight) - in_flight.get(endpoint.id, 0)
+        if capacity <= 0:
+            continue
+        claimed = claim(endpoint, capacity * batch_size, worker_id)
+        per_endpoint.append([
+            (endpoint, claimed[i:i + batch_size]) for i in range(0, len(claimed), batch_size)
+        ])
+    batches = [batch for round_ in zip_longest(*per_endpoint) for batch in round_ if batch]
+
+    stats = {'batches': len(batches), 'delivered': 0, 'retried': 0, 'failed': 0}
+    if batches:
+        pool = HTTPConnectionPool(timeout=webhooks_setting('TIMEOUT'))
+        try:
+            with ThreadPoolExecutor(max_workers=webhooks_setting('WORKERS'), thread_name_prefix='webhook') as executor:
+                futures = {executor.submit(send_batch, pool, *batch): batch for batch in batches}
+                # Deliveries left pending (endpoints over their share this
+                # run) get the next run now, not once the slowest receiver
+                # of this one has answered.
+                schedule_next_run()
+                # Record each outcome as soon as it arrives; a slow endpoint
+                # must not hold back bookkeeping for the fast ones.
+                for future in as_completed(futures):
+                    endpoint, deliveries = futures[future]
+                    status, error, seconds = future.result()
+                    delivered, retried, failed = _apply_result(deliveries, status, error)
+                    stats['delivered'] += delivered
+                    stats['retried'] += retried
+                    stats['failed'] += failed
+                    record_delivery(endpoint, deliveries, seconds, ok=not error)
+                    if error:
+                        logger.warning("Webhook batch to %s failed: %s", endpoint.url, error)
+        finally:
+            pool.close()
+
+    schedule_next_run()
+    return stats
+
+
+def schedule_next_run():
+    next_due = WebhookDelivery.objects.filter(
+        status=WebhookDelivery.STATUS_PENDING,
+        endpoint__is_active=True,
+    ).aggregate(next_due=Min('next_attempt_at'))['next_due']
+    if next_due is not None:
+        enqueue_unique('webhooks.deliver', run_at=max(next_due, timezone.now() + timedelta(seconds=1)))
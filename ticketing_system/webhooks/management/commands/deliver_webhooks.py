@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from webhooks.delivery import deliver_pending
+
+
+class Command(BaseCommand):
+    help = "Deliver due webhook events once."
+
+    def handle(self, *args, **options):
+        stats = deliver_pending()
+        self.stdout.write(self.style.SUCCESS(
+            f"{stats['batches']} batch(es): {stats['delivered']} delivered, "
+            f"{stats['retried']} to retry, {stats['failed']} failed."
+        ))
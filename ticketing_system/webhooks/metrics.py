@@ -0,0 +1,77 @@
+import logging
+from datetime import timedelta
+from django.db.models import Count, Min
+from django.utils import timezone
+from .models import WebhookDelivery
+
+logger = logging.getLogger('webhooks.metrics')
+
+LATENCY_SAMPLE_SIZE = 1000
+
+
+def record_delivery(endpoint, deliveries, request_seconds, ok):
+    """
+    Emit per-batch delivery metrics as a structured log record:
+    request duration and end-to-end latency (event written -> delivered).
+    """
+    now = timezone.now()
+    latencies = [(now - delivery.created_at).total_seconds() for delivery in deliveries]
+    logger.info(
+        "webhook_batch endpoint=%s ok=%s size=%s request_ms=%.1f max_latency_s=%.1f",
+        endpoint.id, ok, len(deliveries), request_seconds * 1000, max(latencies, default=0),
+        extra={
+            'endpoint': str(endpoint.id),
+            'ok': ok,
+            'batch_size': len(deliveries),
+            'request_ms': round(request_seconds * 1000, 1),
+            'max_latency_s': round(max(latencies, default=0), 3),
+        },
+    )
+
+
+def _percentile(values, fraction):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+def queue_stats(endpoints):
+    """
+    Queue depth and delivery latency for the given endpoints:
+    pending / in-flight / failed counts, age of the oldest pending event,
+    and p50/p95 latency over the last hour of successful deliveries.
+    """
+    now = timezone.now()
+    endpoint_ids = [endpoint.id for endpoint in endpoints]
+    counts = {}
+    for row in (
+        WebhookDelivery.objects.filter(endpoint_id__in=endpoint_ids)
+        .exclude(status=WebhookDelivery.STATUS_DELIVERED)
+        .values('endpoint', 'status')
+        .annotate(count=Count('id'), oldest=Min('created_at'))
+    ):
+        counts[(row['endpoint'], row['status'])] = row
+
+    stats = []
+    for endpoint in endpoints:
+        pending = counts.get((endpoint.id, WebhookDelivery.STATUS_PENDING), {})
+        latencies = [
+            (delivered_at - created_at).total_seconds()
+            for created_at, delivered_at in WebhookDelivery.objects.filter(
+                endpoint=endpoint,
+                status=WebhookDelivery.STATUS_DELIVERED,
+                delivered_at__gte=now - timedelta(hours=1),
+            ).order_by('-delivered_at').values_list('created_at', 'delivered_at')[:LATENCY_SAMPLE_SIZE]
+        ]
+        stats.append({
+            'endpoint': endpoint.id,
+            'url': endpoint.url,
+            'pending': pending.get('count', 0),
+            'in_flight': counts.get((endpoint.id, WebhookDelivery.STATUS_IN_FLIGHT), {}).get('count', 0),
+            'failed': counts.get((endpoint.id, WebhookDelivery.STATUS_FAILED), {}).get('count', 0),
+            'oldest_pending_age': (now - pending['oldest']).total_seconds() if pending else None,
+            'latency_p50': _percentile(latencies, 0.5),
+            'latency_p95': _percentile(latencies, 0.95),
+        })
+    return stats
@@ -0,0 +1,101 @@
+import secrets
+import uuid
+from django.db import models
+from django.conf import settings
+from django.utils import timezone
+
+
+def generate_secret():
+    return secrets.token_hex(32)
+
+
+class WebhookEndpoint(models.Model):
+    """
+    A company's subscription to its tickets' history events.
+    - secret: key used to sign every payload (HMAC-SHA256)
+    - max_in_flight: how many requests may be outstanding to this URL at once
+    """
+    id = models.UUIDField(
+        primary_key=True,
+        default=uuid.uuid4,
+        editable=False
+    )
+    company = models.ForeignKey(
+        'companies.Company',
+        on_delete=models.CASCADE,
+        related_name='webhook_endpoints'
+    )
+    url = models.URLField(max_length=500)
+    secret = models.CharField(max_length=64, default=generate_secret, editable=False)
+    is_active = models.BooleanField(default=True)
+    max_in_flight = models.PositiveSmallIntegerField(default=2)
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='webhook_endpoints'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.company} -> {self.url}"
+
+
+class WebhookDelivery(models.Model):
+    """
+    Outbox row: one TicketHistory event to be delivered to one endpoint.
+    Rows are written in the same transaction as the history row and only
+    marked delivered after the receiver answered 2xx (at-least-once).
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_IN_FLIGHT = 'in_flight'
+    STATUS_DELIVERED = 'delivered'
+    STATUS_FAILED = 'failed'
+
+    STATUS_CHOICES = (
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_IN_FLIGHT, 'In Flight'),
+        (STATUS_DELIVERED, 'Delivered'),
+        (STATUS_FAILED, 'Failed'),
+    )
+
+    id = models.BigAutoField(primary_key=True)
+    endpoint = models.ForeignKey(
+        WebhookEndpoint,
+        on_delete=models.CASCADE,
+        related_name='deliveries'
+    )
+    history = models.ForeignKey(
+        'tickets.TicketHistory',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='webhook_deliveries'
+    )
+    event_type = models.CharField(max_length=20)
+    payload = models.JSONField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(blank=True, null=True)
+    response_status = models.PositiveSmallIntegerField(blank=True, null=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    delivered_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ['id']
+        verbose_name_plural = 'webhook deliveries'
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='webhook_due_idx'),
+            models.Index(fields=['endpoint', 'status', 'next_attempt_at'], name='webhook_endpoint_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"Delivery #{self.id} to {self.endpoint.url} [{self.status}]"
@@ -0,0 +1,49 @@
+from django.db import transaction
+from jobs.registry import enqueue_unique
+from .models import WebhookEndpoint, WebhookDelivery
+
+
+def build_payload(history):
+    ticket = history.ticket
+    return {
+        'event': history.event_type,
+        'ticket': {
+            'id': str(ticket.id),
+            'unique_reference': ticket.unique_reference,
+            'title': ticket.title,
+            'status': ticket.status,
+            'priority': ticket.priority,
+            'type': ticket.type,
+        },
+        'history': {
+            'id': history.id,
+            'message': history.message,
+            'previous_status': history.previous_status,
+            'new_status': history.new_status,
+            'changes': history.changes,
+            'changed_at': history.changed_at.isoformat(),
+            'user': str(history.user_id),
+        },
+    }
+
+
+def record_history_event(history):
+    """
+    Queue a delivery of `history` to every active endpoint of the ticket's
+    company. Called from the TicketHistory post_save signal, so the rows
+    commit or roll back together with the history row.
+    """
+    endpoint_ids = list(
+        WebhookEndpoint.objects.filter(company_id=history.ticket.company_id, is_active=True)
+        .values_list('id', flat=True)
+    )
+    if not endpoint_ids:
+        return []
+
+    payload = build_payload(history)
+    deliveries = WebhookDelivery.objects.bulk_create([
+        WebhookDelivery(endpoint_id=endpoint_id, history=history, event_type=history.event_type, payload=payload)
+        for endpoint_id in endpoint_ids
+    ])
+    transaction.on_commit(lambda: enqueue_unique('webhooks.deliver'))
+    return deliveries
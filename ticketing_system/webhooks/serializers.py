@@ -0,0 +1,86 @@
+from rest_framework import serializers
+from .conf import webhooks_setting
+from .models import WebhookEndpoint, WebhookDelivery
+from .validators import UnsafeURL, check_url
+
+
+class WebhookEndpointSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = WebhookEndpoint
+        fields = [
+            'id',
+            'company',
+            'url',
+            'is_active',
+            'max_in_flight',
+            'created_by',
+            'created_at',
+            'updated_at',
+        ]
+        read_only_fields = ['id', 'created_by', 'created_at', 'updated_at']
+
+    def get_fields(self):
+        """
+        Non-staff users always subscribe for their own company.
+        """
+        fields = super().get_fields()
+        request = self.context.get('request')
+
+        if request and not request.user.is_staff:
+            fields.pop('company', None)
+
+        return fields
+
+    def validate_url(self, value):
+        try:
+            check_url(value)
+        except UnsafeURL as exc:
+            raise serializers.ValidationError(str(exc))
+        return value
+
+    def validate_max_in_flight(self, value):
+        limit = webhooks_setting('MAX_IN_FLIGHT')
+        if not 1 <= value <= limit:
+            raise serializers.ValidationError(f"Must be between 1 and {limit}.")
+        return value
+
+
+class WebhookEndpointCreateSerializer(WebhookEndpointSerializer):
+    """
+    Subscription as returned once, on creation: the only response that
+    carries the signing secret.
+    """
+    class Meta(WebhookEndpointSerializer.Meta):
+        fields = WebhookEndpointSerializer.Meta.fields + ['secret']
+        read_only_fields = WebhookEndpointSerializer.Meta.read_only_fields + ['secret']
+
+
+class WebhookDeliverySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = WebhookDelivery
+        fields = [
+            'id',
+            'endpoint',
+            'history',
+            'event_type',
+            'payload',
+            'status',
+            'attempts',
+            'next_attempt_at',
+            'response_status',
+            'last_error',
+            'created_at',
+            'delivered_at',
+        ]
+        read_only_fields = fields
+
+
+class WebhookStatsSerializer(serializers.Serializer):
+    endpoint = serializers.UUIDField()
+    url = serializers.URLField()
+    pending = serializers.IntegerField()
+    in_flight = serializers.IntegerField()
+    failed = serializers.IntegerField()
+    oldest_pending_age = serializers.FloatField(allow_null=True)
+    latency_p50 = serializers.FloatField(allow_null=True)
+    latency_p95 = serializers.FloatField(allow_null=True)
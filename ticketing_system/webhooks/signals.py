@@ -0,0 +1,10 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from tickets.models import TicketHistory
+from .outbox import record_history_event
+
+
+@receiver(post_save, sender=TicketHistory, dispatch_uid='webhooks_record_history_event')
+def ticket_history_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        record_history_event(instance)
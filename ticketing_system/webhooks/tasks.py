@@ -0,0 +1,9 @@
+from jobs.registry import task
+
+
+@task('webhooks.deliver')
+def deliver():
+    # Imported here so web processes, which only enqueue, don't load the
+    # delivery engine and its thread pool/HTTP dependencies at startup.
+    from .delivery import deliver_pending
+    return deliver_pending()
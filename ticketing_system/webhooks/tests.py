@@ -0,0 +1,195 @@
+import hashlib
+import hmac
+import json
+import threading
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from accounts.models import User
+from companies.models import Company
+from .delivery import deliver_pending, sign
+from .models import WebhookEndpoint, WebhookDelivery
+
+LOCAL_WEBHOOKS = {
+    'BATCH_SIZE': 2,
+    'WORKERS': 4,
+    'MAX_IN_FLIGHT': 4,
+    'MAX_ATTEMPTS': 3,
+    'ALLOW_HTTP': True,
+    'ALLOW_PRIVATE_ADDRESSES': True,
+}
+
+
+class Receiver(BaseHTTPRequestHandler):
+    """
+    Records every POST it gets and answers with the server's `status`.
+    """
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        self.server.received.append((dict(self.headers), body))
+        self.send_response(self.server.status)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class SignatureTests(TestCase):
+    def test_sign_is_hmac_sha256_of_timestamp_and_body(self):
+        expected = hmac.new(b'secret', b'1700000000.{"a": 1}', hashlib.sha256).hexdigest()
+        self.assertEqual(sign('secret', '1700000000', b'{"a": 1}'), expected)
+        self.assertNotEqual(sign('secret', '1700000000', b'{}'), sign('secret', '1700000001', b'{}'))
+        self.assertNotEqual(sign('secret', '1700000000', b'{}'), sign('other', '1700000000', b'{}'))
+
+
+@override_settings(WEBHOOKS=LOCAL_WEBHOOKS)
+class DeliveryTests(TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Receiver)
+        self.server.received = []
+        self.server.status = 200
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+        company = Company.objects.create(name="Acme", initials="AC")
+        self.endpoint = WebhookEndpoint.objects.create(
+            company=company, url=f"http://127.0.0.1:{self.server.server_port}/hook", max_in_flight=1,
+        )
+
+    def queue(self, count):
+        return WebhookDelivery.objects.bulk_create([
+            WebhookDelivery(endpoint=self.endpoint, event_type='comment', payload={'event': 'comment', 'n': n})
+            for n in range(count)
+        ])
+
+    def test_batch_is_signed(self):
+        self.queue(2)
+
+        stats = deliver_pending()
+
+        self.assertEqual(stats, {'batches': 1, 'delivered': 2, 'retried': 0, 'failed': 0})
+        headers, body = self.server.received[0]
+        self.assertEqual(
+            headers['X-Webhook-Signature'],
+            f"sha256={sign(self.endpoint.secret, headers['X-Webhook-Timestamp'], body)}",
+        )
+        self.assertEqual([d['n'] for d in json.loads(body)['deliveries']], [0, 1])
+        self.assertEqual(
+            WebhookDelivery.objects.filter(status=WebhookDelivery.STATUS_DELIVERED).count(), 2,
+        )
+
+    def test_endpoint_gets_at_most_max_in_flight_batches(self):
+        self.queue(5)
+
+        stats = deliver_pending()
+
+        # max_in_flight=1 and BATCH_SIZE=2: one batch this run, the rest wait.
+        self.assertEqual(stats['batches'], 1)
+        self.assertEqual(len(self.server.received), 1)
+        self.assertEqual(WebhookDelivery.objects.filter(status=WebhookDelivery.STATUS_PENDING).count(), 3)
+
+    def test_batches_in_flight_elsewhere_count_against_the_cap(self):
+        busy = self.queue(1)[0]
+        WebhookDelivery.objects.filter(id=busy.id).update(
+            status=WebhookDelivery.STATUS_IN_FLIGHT, locked_by='other-worker', locked_at=timezone.now(),
+        )
+        self.queue(2)
+
+        stats = deliver_pending()
+
+        self.assertEqual(stats['batches'], 0)
+        self.assertEqual(self.server.received, [])
+
+    def test_failed_batch_is_retried_later(self):
+        self.server.status = 500
+        delivery = self.queue(1)[0]
+
+        with self.assertLogs('webhooks.delivery', 'WARNING'):
+            stats = deliver_pending()
+
+        self.assertEqual(stats['retried'], 1)
+        delivery.refresh_from_db()
+        self.assertEqual(delivery.status, WebhookDelivery.STATUS_PENDING)
+        self.assertEqual(delivery.attempts, 1)
+        self.assertEqual(delivery.response_status, 500)
+        self.assertGreater(delivery.next_attempt_at, timezone.now() + timedelta(seconds=1))
+
+    def test_failed_batch_is_recorded_per_outcome(self):
+        self.server.status = 500
+        fresh, exhausted = self.queue(2)
+        WebhookDelivery.objects.filter(id=exhausted.id).update(attempts=2)
+
+        with self.assertLogs('webhooks.delivery', 'WARNING'):
+            stats = deliver_pending()
+
+        self.assertEqual(stats, {'batches': 1, 'delivered': 0, 'retried': 1, 'failed': 1})
+        fresh.refresh_from_db()
+        exhausted.refresh_from_db()
+        self.assertEqual((fresh.status, fresh.attempts), (WebhookDelivery.STATUS_PENDING, 1))
+        self.assertEqual((exhausted.status, exhausted.attempts), (WebhookDelivery.STATUS_FAILED, 3))
+        self.assertEqual(exhausted.last_error, "HTTP 500")
+        self.assertEqual(exhausted.locked_by, '')
+
+
+@override_settings(WEBHOOKS={'MAX_IN_FLIGHT': 4})
+class EndpointAPITests(APITestCase):
+    def setUp(self):
+        self.company = Company.objects.create(name="Acme", initials="AC")
+        self.admin = User.objects.create_user(
+            email="a@example.com", username="a", password="pw", first_name="A", last_name="Dmin",
+            company=self.company, role='admin',
+        )
+        self.client.force_authenticate(self.admin)
+
+    def test_only_staff_and_company_admins_manage_webhooks(self):
+        customer = User.objects.create_user(
+            email="u@example.com", username="u", password="pw", first_name="U", last_name="One",
+            company=self.company,
+        )
+        endpoint = WebhookEndpoint.objects.create(company=self.company, url="https://hooks.example.com/tickets")
+        self.client.force_authenticate(customer)
+
+        for path in ('/webhooks/', '/webhooks/stats/', f'/webhooks/{endpoint.pk}/', f'/webhooks/{endpoint.pk}/deliveries/'):
+            with self.subTest(path=path):
+                self.assertEqual(self.client.get(path).status_code, 403)
+        self.assertEqual(self.client.post('/webhooks/', {'url': 'https://hooks.example.com/x'}).status_code, 403)
+
+    def test_admins_only_see_their_company(self):
+        other = Company.objects.create(name="Globex", initials="GX")
+        WebhookEndpoint.objects.create(company=other, url="https://hooks.example.com/globex")
+        mine = WebhookEndpoint.objects.create(company=self.company, url="https://hooks.example.com/acme")
+
+        response = self.client.get('/webhooks/')
+
+        self.assertEqual([endpoint['id'] for endpoint in response.data['results']], [str(mine.pk)])
+
+    def test_secret_is_only_returned_on_creation(self):
+        with mock.patch('webhooks.serializers.check_url'):
+            response = self.client.post('/webhooks/', {'url': 'https://hooks.example.com/tickets'})
+
+        self.assertEqual(response.status_code, 201, response.data)
+        endpoint = WebhookEndpoint.objects.get()
+        self.assertEqual(response.data['secret'], endpoint.secret)
+        self.assertEqual(endpoint.company, self.company)
+        self.assertNotIn('secret', self.client.get(f'/webhooks/{endpoint.pk}/').data)
+        self.assertNotIn('secret', self.client.get('/webhooks/').data['results'][0])
+
+    def test_max_in_flight_is_capped(self):
+        response = self.client.post('/webhooks/', {'url': 'https://127.0.0.1/hook', 'max_in_flight': 50})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('max_in_flight', response.data)
+
+    def test_internal_urls_are_rejected(self):
+        for url in ('http://example.com/hook', 'https://127.0.0.1/hook', 'https://169.254.169.254/latest'):
+            with self.subTest(url=url):
+                response = self.client.post('/webhooks/', {'url': url})
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('url', response.data)
+        self.assertFalse(WebhookEndpoint.objects.exists())
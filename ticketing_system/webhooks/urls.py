@@ -0,0 +1,14 @@
+from django.urls import path
+from .views import (
+    WebhookEndpointListCreateView,
+    WebhookEndpointRetrieveUpdateDestroyView,
+    WebhookDeliveryListView,
+    WebhookStatsView,
+)
+
+urlpatterns = [
+    path('', WebhookEndpointListCreateView.as_view(), name='webhook-list-create'),
+    path('stats/', WebhookStatsView.as_view(), name='webhook-stats'),
+    path('<uuid:pk>/', WebhookEndpointRetrieveUpdateDestroyView.as_view(), name='webhook-detail'),
+    path('<uuid:pk>/deliveries/', WebhookDeliveryListView.as_view(), name='webhook-deliveries'),
+]
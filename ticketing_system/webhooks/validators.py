@@ -0,0 +1,43 @@
+"""
+Checks keeping webhook URLs from pointing back into our own network
+(server-side request forgery): run when an endpoint is saved and again
+before every delivery, since DNS answers can change in between.
+"""
+import ipaddress
+import socket
+from urllib.parse import urlsplit
+from .conf import webhooks_setting
+
+
+class UnsafeURL(ValueError):
+    pass
+
+
+def check_url(url):
+    """
+    Raise UnsafeURL unless `url` is https (or http with WEBHOOKS['ALLOW_HTTP'])
+    and every address its host resolves to is a public one.
+    """
+    parts = urlsplit(url)
+    schemes = ('https', 'http') if webhooks_setting('ALLOW_HTTP') else ('https',)
+    if parts.scheme not in schemes:
+        raise UnsafeURL(f"URL scheme must be {' or '.join(schemes)}.")
+    try:
+        port = parts.port or (443 if parts.scheme == 'https' else 80)
+    except ValueError:
+        raise UnsafeURL("URL has an invalid port.")
+    if not parts.hostname:
+        raise UnsafeURL("URL has no host.")
+    if webhooks_setting('ALLOW_PRIVATE_ADDRESSES'):
+        return
+
+    try:
+        addresses = {info[4][0] for info in socket.getaddrinfo(parts.hostname, port, proto=socket.IPPROTO_TCP)}
+    except (socket.gaierror, UnicodeError):
+        raise UnsafeURL(f"Cannot resolve {parts.hostname}.")
+    for address in addresses:
+        ip = ipaddress.ip_address(address.split('%', 1)[0])
+        # is_global is False for private, loopback, link-local (cloud metadata),
+        # shared and reserved ranges, including IPv4-mapped IPv6 forms of them.
+        if not ip.is_global or ip.is_multicast:
+            raise UnsafeURL(f"{parts.hostname} resolves to a non-public address ({ip}).")
@@ -0,0 +1,95 @@
+from rest_framework import generics, permissions
+from rest_framework.exceptions import PermissionDenied
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from drf_spectacular.utils import extend_schema
+from .metrics import queue_stats
+from .models import WebhookEndpoint, WebhookDelivery
+from .serializers import (
+    WebhookEndpointSerializer,
+    WebhookEndpointCreateSerializer,
+    WebhookDeliverySerializer,
+    WebhookStatsSerializer,
+)
+
+
+class CompanyEndpointMixin:
+    """
+    Webhooks are managed by staff and admins only. Staff sees every
+    endpoint, admins of a company only their company's.
+    """
+
+    def check_permissions(self, request):
+        super().check_permissions(request)
+        user = request.user
+        if not (user.is_staff or (user.role == 'admin' and user.company_id)):
+            raise PermissionDenied("Only staff and company admins can manage webhooks.")
+
+    def get_endpoints(self):
+        queryset = WebhookEndpoint.objects.all()
+        user = self.request.user
+        if user.is_staff:
+            return queryset
+        return queryset.filter(company_id=user.company_id)
+
+
+@extend_schema(
+    description=(
+        "List the webhook subscriptions of your company or subscribe a new URL to ticket history events. "
+        "Staff and company admins only. The signing secret is returned once, in the response to the subscription."
+    )
+)
+class WebhookEndpointListCreateView(CompanyEndpointMixin, generics.ListCreateAPIView):
+    serializer_class = WebhookEndpointSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        return self.get_endpoints()
+
+    def get_serializer_class(self):
+        if self.request.method == 'POST':
+            return WebhookEndpointCreateSerializer
+        return WebhookEndpointSerializer
+
+    def perform_create(self, serializer):
+        user = self.request.user
+        if user.is_staff:
+            serializer.save(created_by=user)
+        else:
+            serializer.save(created_by=user, company=user.company)
+
+
+@extend_schema(
+    description="Retrieve, update or delete a webhook subscription."
+)
+class WebhookEndpointRetrieveUpdateDestroyView(CompanyEndpointMixin, generics.RetrieveUpdateDestroyAPIView):
+    serializer_class = WebhookEndpointSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        return self.get_endpoints()
+
+
+@extend_schema(
+    description="List recent deliveries of a webhook subscription, with their status and last error."
+)
+class WebhookDeliveryListView(CompanyEndpointMixin, generics.ListAPIView):
+    serializer_class = WebhookDeliverySerializer
+    permission_classes = [permissions.IsAuthenticated]
+    filterset_fields = ['status', 'event_type']
+
+    def get_queryset(self):
+        endpoint_ids = self.get_endpoints().filter(pk=self.kwargs['pk']).values('pk')
+        return WebhookDelivery.objects.filter(endpoint_id__in=endpoint_ids).order_by('-id')
+
+
+@extend_schema(
+    description="Queue depth and delivery latency (seconds) per webhook subscription.",
+    responses=WebhookStatsSerializer(many=True),
+)
+class WebhookStatsView(CompanyEndpointMixin, APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        stats = queue_stats(list(self.get_endpoints()))
+        return Response(WebhookStatsSerializer(stats, many=True).data)